@@ -1,31 +1,68 @@
 import os
-from flask import Flask, request, jsonify, make_response, url_for
+import csv
+import json
+import click
+from functools import wraps
+from flask import Flask, Response, abort, request, jsonify, make_response, url_for, stream_with_context, send_from_directory
 from flask_bcrypt import Bcrypt
 from flask_migrate import Migrate
 from flask_restful import Api, Resource
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, jwt_required, create_access_token, create_refresh_token, get_jwt_identity
+from flask_jwt_extended import JWTManager, jwt_required, create_access_token, create_refresh_token, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
-from models import db, User, Student, Teacher, Course, Class, Grade, Enrollment, Attendance, StudentProfile, Progress
-from datetime import datetime
+from marshmallow import ValidationError
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from models import db, User, Student, Teacher, Course, Class, Grade, Enrollment, Attendance, StudentProfile, Progress, AttendanceSummary, ImageAsset
+from datetime import datetime, timedelta
 from config import Config
-from utils.email import send_email
-from utils.image import process_and_upload_image
-from utils.error_handling import handle_bad_request, handle_unauthorized, handle_forbidden, handle_not_found, handle_internal_error
-from cloudinary.uploader import upload
+from utils.email import queue_email, get_transport
+from utils.outbox import OutboxWorkerPool, process_outbox
+from utils.image import image_format
+from utils.image_pipeline import ImageWorkerPool, process_images, queue_image
+from utils.storage import get_storage
+from utils.pagination import decode_cursor, encode_cursor, get_limit, paginate, paginate_columns, paginate_columns_list
+from utils.serializers import IsoJSONProvider, json_response
+from utils.export import generate_csv, generate_ndjson
+from utils.gradebook import import_gradebook
+from utils.grading import COHORTS, RANKING_TABLES, cohort_ranking, init_grading
+from utils.provisioning import ProvisioningError, provision_users
+from utils.query_plans import check_query_plans
+from utils.attendance_summary import apply_attendance_changes, rebuild_attendance_summaries
+from utils.attendance_bitmap import absence_streaks, attendance_counts, daily_counts, rebuild_attendance_bitmaps, term_bounds
+from utils.reports import GROUP_BY_CHOICES, attendance_rates, enrollment_counts, grade_distribution
+from utils.response_cache import cached, init_response_cache
+from utils.dashboards import student_dashboard, teacher_roster
+from utils.query_counter import init_query_counter
+from utils.metrics import init_metrics, render_metrics
+from utils.database import init_database
+from utils.slow_queries import init_slow_query_log, read_log
+from utils.search import SEARCH_KINDS, MIN_QUERY_LENGTH, init_search, rebuild_search_index, search
+from utils.error_handling import handle_bad_request, handle_unauthorized, handle_forbidden, handle_not_found, handle_internal_error, handle_validation_error
+from utils.validators import AttendanceSchema, AttendanceRosterSchema
 from cloudinary.utils import cloudinary_url
 
 
 # Initialize the Flask application
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = IsoJSONProvider(app)
 
 # Initialize CORS, Bcrypt, and Migrate
 CORS(app, resources={r"/*": {"origins": "*"}})
 bcrypt = Bcrypt(app)
+init_database(app)
 db.init_app(app)
 migrate = Migrate(app, db)
 api = Api(app)
+init_response_cache(app)
+init_search(app)
+init_grading(app)
+init_query_counter(app)
+init_metrics(app)
+init_slow_query_log(app)
 
 # Initialize JWT Manager
 jwt = JWTManager(app)
@@ -46,6 +83,22 @@ def expired_token_callback(jwt_header, jwt_payload):
 def needs_fresh_token_callback(jwt_header, jwt_payload):
     return handle_unauthorized("Fresh token required")
 
+def admin_required(fn):
+    """Require a valid access token belonging to an Admin user."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        # Verified here rather than with @jwt_required so Flask-RESTful does not
+        # turn a missing or bad token into a 500
+        try:
+            verify_jwt_in_request()
+        except (JWTExtendedException, PyJWTError):
+            return handle_unauthorized("Missing or invalid token")
+        user = db.session.get(User, int(get_jwt_identity()))
+        if user is None or user.role != 'Admin':
+            return handle_forbidden("Admin access required")
+        return fn(*args, **kwargs)
+    return wrapper
+
 # Index route
 class Index(Resource):
     def get(self):
@@ -53,13 +106,65 @@ class Index(Resource):
 
 api.add_resource(Index, '/')
 
+# Ranked search over students, teachers and courses for the admin screens
+class Search(Resource):
+    # @jwt_required()
+    @cached('search_documents')
+    def get(self):
+        query = request.args.get('q', '').strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            return handle_bad_request(f"q must be at least {MIN_QUERY_LENGTH} characters")
+        kinds = [kind for kind in request.args.get('types', ','.join(SEARCH_KINDS)).split(',') if kind]
+        unknown = set(kinds) - set(SEARCH_KINDS)
+        if unknown:
+            return handle_bad_request(f"Unknown types: {', '.join(sorted(unknown))}")
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return handle_bad_request("limit must be an integer")
+        if not 1 <= limit <= 100:
+            return handle_bad_request("limit must be between 1 and 100")
+        results = search(query, kinds, limit)
+        return make_response(jsonify({"count": len(results), "results": results}), 200)
+
+api.add_resource(Search, '/search')
+
+# Prometheus metrics, aggregated across all worker processes
+class Metrics(Resource):
+    def get(self):
+        body = render_metrics(app.extensions['metrics'])
+        return Response(body, mimetype='text/plain; version=0.0.4')
+
+api.add_resource(Metrics, '/metrics')
+
+# Slow statements with their query plans, newest first
+class SlowQueries(Resource):
+    @admin_required
+    def get(self):
+        try:
+            limit = min(int(request.args.get('limit', 50)), app.config['SLOW_QUERY_BUFFER_SIZE'])
+        except ValueError:
+            return handle_bad_request("limit must be an integer")
+        if limit < 1:
+            return handle_bad_request("limit must be a positive integer")
+        source = request.args.get('source', 'buffer')
+        if source == 'log':
+            # The log file is shared, so it covers every worker process
+            records = read_log(app.config['SLOW_QUERY_LOG_FILE'], limit)
+        elif source == 'buffer':
+            recorder = app.extensions.get('slow_queries')
+            records = recorder.recent(limit) if recorder else []
+        else:
+            return handle_bad_request("source must be 'buffer' or 'log'")
+        return jsonify({"count": len(records), "slow_queries": records})
+
+api.add_resource(SlowQueries, '/admin/slow-queries')
+
 # CRUD operations for Users
 class Users(Resource):
     # @jwt_required()
     def get(self):
-        users = User.query.all()
-        users_list = [user.to_dict() for user in users]
-        return make_response(jsonify({"count": len(users_list), "users": users_list}), 200)
+        return json_response(paginate_columns(User, "users"))
 
     def post(self):
         hashed_password = bcrypt.generate_password_hash(request.json.get("password")).decode('utf-8')
@@ -69,7 +174,6 @@ class Users(Resource):
             role=request.json.get("role")
         )
         db.session.add(new_user)
-        db.session.commit()
 
         # Generate email verification token
         token = serializer.dumps(new_user.email, salt='email-confirm')
@@ -77,10 +181,11 @@ class Users(Resource):
         # Build the verification URL
         verify_url = url_for('verifyemail', token=token, _external=True)
 
-        # Send verification email
+        # Queue the verification email; it commits with the user and is sent by the outbox workers
         subject = "Please verify your email address"
         content = f"Click the link to verify your email: {verify_url}"
-        send_email(new_user.email, subject, content, from_email=app.config['DEFAULT_FROM_EMAIL'])
+        queue_email(new_user.email, subject, content, from_email=app.config['DEFAULT_FROM_EMAIL'])
+        db.session.commit()
 
         return make_response(jsonify(new_user.to_dict()), 201)
 
@@ -129,8 +234,10 @@ class Login(Resource):
 
         user = User.query.filter_by(email=email).first()
         if user and bcrypt.check_password_hash(user.password, password):
-            access_token = create_access_token(identity=user.id)
-            return jsonify(access_token=access_token)
+            # PyJWT 2 only accepts a string subject, so the id is sent as one
+            access_token = create_access_token(identity=str(user.id))
+            refresh_token = create_refresh_token(identity=str(user.id))
+            return jsonify(access_token=access_token, refresh_token=refresh_token)
         return handle_unauthorized("Invalid credentials")
 
 api.add_resource(Users, '/users')
@@ -141,10 +248,9 @@ api.add_resource(VerifyEmail, '/verify/<token>')
 # CRUD operations for Students
 class Students(Resource):
     # @jwt_required()
+    @cached('students')
     def get(self):
-        students = Student.query.all()
-        students_list = [student.to_dict() for student in students]
-        return make_response(jsonify({"count": len(students_list), "students": students_list}), 200)
+        return json_response(paginate_columns(Student, "students"))
 
     # @jwt_required()
     def post(self):
@@ -163,6 +269,7 @@ class Students(Resource):
 
 class StudentResource(Resource):
     # @jwt_required()
+    @cached('students')
     def get(self, student_id):
         student = Student.query.get_or_404(student_id)
         return make_response(jsonify(student.to_dict()), 200)
@@ -192,16 +299,26 @@ class StudentResource(Resource):
         db.session.commit()
         return make_response("", 204)
 
+class StudentDashboard(Resource):
+    # @jwt_required()
+    @cached('students', 'profiles', 'grades', 'courses', 'classes', 'teachers',
+            'enrollments', 'progress', 'attendance_summaries')
+    def get(self, student_id):
+        dashboard = student_dashboard(student_id)
+        if dashboard is None:
+            return handle_not_found(f"Student {student_id} not found")
+        return make_response(jsonify(dashboard), 200)
+
 api.add_resource(Students, '/students')
 api.add_resource(StudentResource, '/students/<int:student_id>')
+api.add_resource(StudentDashboard, '/students/<int:student_id>/dashboard')
 
 # CRUD operations for Student Profile
 class StudentProfile(Resource):
     # @jwt_required()
     def get(self):
-        students = Student.query.all()
-        students_list = [student.to_dict() for student in students]
-        return make_response(jsonify(students_list), 200)
+        # Clients read this endpoint as a plain list, so the next page goes in a Link header
+        return paginate_columns_list(Student)
 
     # @jwt_required()
     def put(self):
@@ -242,10 +359,9 @@ api.add_resource(StudentProfile, '/profiles')
 # CRUD operations for Teachers
 class Teachers(Resource):
     # @jwt_required()
+    @cached('teachers')
     def get(self):
-        teachers = Teacher.query.all()
-        teachers_list = [teacher.to_dict() for teacher in teachers]
-        return make_response(jsonify({"count": len(teachers_list), "teachers": teachers_list}), 200)
+        return json_response(paginate_columns(Teacher, "teachers"))
 
     # @jwt_required()
     def post(self):
@@ -259,6 +375,7 @@ class Teachers(Resource):
 
 class TeacherResource(Resource):
     # @jwt_required()
+    @cached('teachers')
     def get(self, teacher_id):
         teacher = Teacher.query.get_or_404(teacher_id)
         return make_response(jsonify(teacher.to_dict()), 200)
@@ -278,16 +395,25 @@ class TeacherResource(Resource):
         db.session.commit()
         return make_response("", 204)
 
+class TeacherRoster(Resource):
+    # @jwt_required()
+    @cached('teachers', 'classes', 'courses', 'enrollments', 'students')
+    def get(self, teacher_id):
+        roster = teacher_roster(teacher_id)
+        if roster is None:
+            return handle_not_found(f"Teacher {teacher_id} not found")
+        return make_response(jsonify(roster), 200)
+
 api.add_resource(Teachers, '/teachers')
 api.add_resource(TeacherResource, '/teachers/<int:teacher_id>')
+api.add_resource(TeacherRoster, '/teachers/<int:teacher_id>/roster')
 
 # CRUD operations for Courses
 class Courses(Resource):
     # @jwt_required()
+    @cached('courses')
     def get(self):
-        courses = Course.query.all()
-        courses_list = [course.to_dict() for course in courses]
-        return make_response(jsonify({"count": len(courses_list), "courses": courses_list}), 200)
+        return json_response(paginate_columns(Course, "courses"))
 
     # @jwt_required()
     def post(self):
@@ -303,6 +429,7 @@ class Courses(Resource):
 
 class CourseResource(Resource):
     # @jwt_required()
+    @cached('courses')
     def get(self, course_id):
         course = Course.query.get_or_404(course_id)
         return make_response(jsonify(course.to_dict()), 200)
@@ -334,16 +461,16 @@ api.add_resource(CourseResource, '/courses/<int:course_id>')
 # CRUD operations for Classes
 class Classes(Resource):
     # @jwt_required()
+    @cached('classes')
     def get(self):
-        classes = Class.query.all()
-        classes_list = [class_.to_dict() for class_ in classes]
-        return make_response(jsonify({"count": len(classes_list), "classes": classes_list}), 200)
+        return json_response(paginate_columns(Class, "classes"))
 
     # @jwt_required()
     def post(self):
         new_class = Class(
             name=request.json.get("name"),
-            teacher_id=request.json.get("teacher_id")
+            teacher_id=request.json.get("teacher_id"),
+            credits=request.json.get("credits", 1.0)
         )
         db.session.add(new_class)
         db.session.commit()
@@ -351,6 +478,7 @@ class Classes(Resource):
 
 class ClassResource(Resource):
     # @jwt_required()
+    @cached('classes')
     def get(self, class_id):
         class_ = Class.query.get_or_404(class_id)
         return make_response(jsonify(class_.to_dict()), 200)
@@ -362,6 +490,8 @@ class ClassResource(Resource):
             class_.name = request.json.get("name")
         if request.json.get("teacher_id"):
             class_.teacher_id = request.json.get("teacher_id")
+        if request.json.get("credits") is not None:
+            class_.credits = request.json.get("credits")
         db.session.commit()
         return make_response(jsonify(class_.to_dict()), 200)
 
@@ -376,22 +506,28 @@ api.add_resource(Classes, '/classes')
 api.add_resource(ClassResource, '/classes/<int:class_id>')
 
 # CRUD operations for Grades
+DUPLICATE_GRADE = "A grade for this student, course, class and term already exists"
+
 class Grades(Resource):
     # @jwt_required()
     def get(self):
-        grades = Grade.query.all()
-        grades_list = [grade.to_dict() for grade in grades]
-        return make_response(jsonify({"count": len(grades_list), "grades": grades_list}), 200)
+        return json_response(paginate_columns(Grade, "grades"))
 
     # @jwt_required()
     def post(self):
         new_grade = Grade(
             student_id=request.json.get("student_id"),
-            course_name=request.json.get("course_name"),
-            grade=request.json.get("grade")
+            course_id=request.json.get("course_id"),
+            class_id=request.json.get("class_id"),
+            grade=request.json.get("grade"),
+            term=request.json.get("term")
         )
         db.session.add(new_grade)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return handle_bad_request(DUPLICATE_GRADE)
         return make_response(jsonify(new_grade.to_dict()), 201)
 
 class GradeResource(Resource):
@@ -405,7 +541,13 @@ class GradeResource(Resource):
         grade = Grade.query.get_or_404(grade_id)
         if request.json.get("grade"):
             grade.grade = request.json.get("grade")
-        db.session.commit()
+        if "term" in request.json:
+            grade.term = request.json.get("term")
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return handle_bad_request(DUPLICATE_GRADE)
         return make_response(jsonify(grade.to_dict()), 200)
 
     # @jwt_required()
@@ -415,16 +557,75 @@ class GradeResource(Resource):
         db.session.commit()
         return make_response("", 204)
 
+class GradeImport(Resource):
+    # @jwt_required()
+    def post(self):
+        """Upsert a CSV grade sheet (student_id, course_id, class_id, grade, optional term)."""
+        if 'file' in request.files:
+            stream = request.files['file'].stream
+        elif request.mimetype == 'text/csv':
+            stream = request.stream
+        else:
+            return handle_bad_request("Upload a CSV file in the 'file' field or send a text/csv body")
+
+        summary, errors = import_gradebook(stream, app.config['GRADE_IMPORT_BATCH_SIZE'])
+        if errors:
+            db.session.rollback()
+            return handle_validation_error(errors)
+        db.session.commit()
+        return make_response(jsonify(summary), 200)
+
+class GradeRankings(Resource):
+    # @jwt_required()
+    @cached(*RANKING_TABLES)
+    def get(self):
+        """
+        GPA, rank and percentile of every student in a cohort, best first.
+
+        ?cohort=all|course|class (with cohort_id for course/class), optional
+        ?term=, and ?student_id= to return just that student's entry.
+        """
+        cohort = request.args.get('cohort', 'all')
+        if cohort not in COHORTS:
+            return handle_bad_request("cohort must be one of: " + ", ".join(COHORTS))
+        cohort_id = request.args.get('cohort_id', type=int)
+        if cohort != 'all' and cohort_id is None:
+            return handle_bad_request(f"cohort_id is required for a {cohort} cohort")
+        if cohort == 'all':
+            cohort_id = None
+        term = request.args.get('term') or None
+        ranking = cohort_ranking(cohort, cohort_id, term)
+        body = {"cohort": cohort, "cohort_id": cohort_id, "term": term, **ranking.summary()}
+
+        student_id = request.args.get('student_id', type=int)
+        if student_id is not None:
+            entry = ranking.find(student_id)
+            if entry is None:
+                return handle_not_found("Student has no graded work in this cohort")
+            return make_response(jsonify(dict(body, ranking=entry)), 200)
+
+        # Pages are positions in rank order; the cursor is the last position served
+        limit = get_limit()
+        after = decode_cursor(request.args.get('after'))
+        start = 0 if after is None else after + 1
+        stop = min(start + limit, len(ranking))
+        next_url = None
+        if stop < len(ranking):
+            args = dict(request.args.to_dict(), after=encode_cursor(stop - 1), limit=limit)
+            next_url = url_for(request.endpoint, _external=True, **args)
+        rankings = [ranking.entry(position) for position in range(start, stop)]
+        return make_response(jsonify(dict(body, count=len(rankings), rankings=rankings, next=next_url)), 200)
+
 api.add_resource(Grades, '/grades')
+api.add_resource(GradeImport, '/grades/import')
+api.add_resource(GradeRankings, '/grades/rankings')
 api.add_resource(GradeResource, '/grades/<int:grade_id>')
 
 # CRUD operations for Enrollments
 class Enrollments(Resource):
     # @jwt_required()
     def get(self):
-        enrollments = Enrollment.query.all()
-        enrollments_list = [enrollment.to_dict() for enrollment in enrollments]
-        return make_response(jsonify({"count": len(enrollments_list), "enrollments": enrollments_list}), 200)
+        return json_response(paginate_columns(Enrollment, "enrollments"))
 
     # @jwt_required()
     def post(self):
@@ -465,19 +666,23 @@ api.add_resource(EnrollmentResource, '/enrollments/<int:enrollment_id>')
 class Attendances(Resource):
     # @jwt_required()
     def get(self):
-        attendances = Attendance.query.all()
-        attendances_list = [attendance.to_dict() for attendance in attendances]
-        return make_response(jsonify({"count": len(attendances_list), "attendances": attendances_list}), 200)
+        return json_response(paginate_columns(Attendance, "attendances"))
 
     # @jwt_required()
     def post(self):
+        # Validated before the summary and bitmap upkeep sees the row
+        try:
+            data = AttendanceSchema(partial=('class_id',)).load(request.get_json(silent=True) or {})
+        except ValidationError as err:
+            return handle_validation_error(err.messages)
         new_attendance = Attendance(
-            student_id=request.json.get("student_id"),
-            class_id=request.json.get("class_id"),
-            date=datetime.strptime(request.json.get("date"), '%Y-%m-%d'),
-            status=request.json.get("status")
+            student_id=data["student_id"],
+            class_id=data.get("class_id"),
+            date=data["date"],
+            status=data["status"]
         )
         db.session.add(new_attendance)
+        apply_attendance_changes(added=[new_attendance])
         db.session.commit()
         return make_response(jsonify(new_attendance.to_dict()), 201)
 
@@ -490,8 +695,17 @@ class AttendanceResource(Resource):
     # @jwt_required()
     def put(self, attendance_id):
         attendance = Attendance.query.get_or_404(attendance_id)
-        if request.json.get("status"):
-            attendance.status = request.json.get("status")
+        status = request.json.get("status")
+        if status:
+            try:
+                AttendanceSchema(only=('status',)).load({"status": status})
+            except ValidationError as err:
+                return handle_validation_error(err.messages)
+        if status and status != attendance.status:
+            previous = {'student_id': attendance.student_id, 'course_id': attendance.course_id,
+                        'class_id': attendance.class_id, 'date': attendance.date, 'status': attendance.status}
+            attendance.status = status
+            apply_attendance_changes(added=[attendance], removed=[previous])
         db.session.commit()
         return make_response(jsonify(attendance.to_dict()), 200)
 
@@ -499,19 +713,194 @@ class AttendanceResource(Resource):
     def delete(self, attendance_id):
         attendance = Attendance.query.get_or_404(attendance_id)
         db.session.delete(attendance)
+        apply_attendance_changes(removed=[attendance])
         db.session.commit()
         return make_response("", 204)
 
+class AttendanceBulk(Resource):
+    # @jwt_required()
+    def post(self):
+        """Record a whole class roster for one date in a single transaction."""
+        try:
+            roster = AttendanceRosterSchema().load(request.get_json(silent=True) or {})
+        except ValidationError as err:
+            return handle_validation_error(err.messages)
+
+        record_schema = AttendanceSchema()
+        results = []
+        pending = []
+        for index, record in enumerate(roster['records']):
+            result = {'index': index, 'student_id': record.get('student_id')}
+            results.append(result)
+            try:
+                row = record_schema.load({
+                    'student_id': record.get('student_id'),
+                    'class_id': roster['class_id'],
+                    'date': roster['date'].isoformat(),
+                    'status': record.get('status'),
+                })
+            except ValidationError as err:
+                result.update(result='error', errors=err.messages)
+                continue
+            row['course_id'] = roster.get('course_id')
+            pending.append((result, row))
+
+        # Unknown ids are reported as validation errors, not left to the foreign keys
+        for model, column in ((Class, 'class_id'), (Course, 'course_id')):
+            if roster.get(column) is not None and db.session.get(model, roster[column]) is None:
+                return handle_validation_error({column: [f"{model.__name__} does not exist."]})
+
+        # Check every student exists with one lookup rather than one per row
+        student_ids = {row['student_id'] for _, row in pending}
+        known = set(db.session.scalars(select(Student.id).where(Student.id.in_(student_ids))))
+        accepted = []
+        seen = set()
+        for result, row in pending:
+            if row['student_id'] not in known:
+                result.update(result='error', errors={'student_id': ['Student does not exist.']})
+            elif row['student_id'] in seen:
+                result.update(result='error', errors={'student_id': ['Duplicate student in roster.']})
+            else:
+                seen.add(row['student_id'])
+                accepted.append((result, row))
+
+        created = updated = 0
+        if accepted:
+            # A roster posted again for the day replaces the statuses already on file
+            existing = {}
+            for record in db.session.execute(
+                select(Attendance.id, Attendance.student_id, Attendance.course_id, Attendance.class_id,
+                       Attendance.date, Attendance.status)
+                .where(Attendance.class_id == roster['class_id'], Attendance.date == roster['date'],
+                       Attendance.student_id.in_(seen))
+                .order_by(Attendance.id)
+                .with_for_update()
+            ).mappings():
+                existing.setdefault(record['student_id'], []).append(dict(record))
+
+            new_rows = [row for _, row in accepted if row['student_id'] not in existing]
+            changes = [
+                (record, row) for _, row in accepted for record in existing.get(row['student_id'], ())
+                if (record['status'], record['course_id']) != (row['status'], row['course_id'])
+            ]
+            ids = {student_id: records[-1]['id'] for student_id, records in existing.items()}
+            if changes:
+                db.session.execute(update(Attendance), [
+                    {'id': record['id'], 'status': row['status'], 'course_id': row['course_id']}
+                    for record, row in changes
+                ])
+            if new_rows:
+                if db.engine.dialect.insert_executemany_returning:
+                    # Unordered RETURNING keeps the batched executemany; rows are matched by student
+                    ids.update(db.session.execute(
+                        insert(Attendance).returning(Attendance.student_id, Attendance.id), new_rows
+                    ).all())
+                else:
+                    db.session.execute(insert(Attendance), new_rows)
+                    ids.update(db.session.execute(
+                        select(Attendance.student_id, func.max(Attendance.id))
+                        .where(Attendance.class_id == roster['class_id'], Attendance.date == roster['date'],
+                               Attendance.student_id.in_({row['student_id'] for row in new_rows}))
+                        .group_by(Attendance.student_id)
+                    ).all())
+            apply_attendance_changes(
+                added=new_rows + [{**record, 'status': row['status'], 'course_id': row['course_id']}
+                                  for record, row in changes],
+                removed=[record for record, _ in changes],
+            )
+            db.session.commit()
+            for result, row in accepted:
+                outcome = 'updated' if row['student_id'] in existing else 'created'
+                result.update(result=outcome, id=ids[row['student_id']])
+            created = len(new_rows)
+            updated = len(accepted) - created
+
+        failed = len(results) - len(accepted)
+        status_code = 201 if not failed else 207
+        return make_response(jsonify({"created": created, "updated": updated, "failed": failed,
+                                      "results": results}), status_code)
+
+class AttendanceSummaries(Resource):
+    # @jwt_required()
+    def get(self):
+        """Present/absent/late counters per student and course/class."""
+        query = AttendanceSummary.query
+        for column in ('student_id', 'course_id', 'class_id'):
+            value = request.args.get(column, type=int)
+            if value is not None:
+                query = query.filter(getattr(AttendanceSummary, column) == value)
+        return make_response(jsonify(paginate(query, AttendanceSummary.id, "summaries")), 200)
+
+def attendance_range():
+    """date_from/date_to from the query string, defaulting to the current term."""
+    date_to = report_date('date_to')
+    date_from = report_date('date_from')
+    if date_from is None or date_to is None:
+        start, end = term_bounds(date_to or date_from or datetime.now().date())
+        date_from = date_from or start
+        date_to = date_to or end - timedelta(days=1)
+    if date_from > date_to:
+        abort(handle_bad_request("date_from must not be after date_to"))
+    if (date_to - date_from).days >= app.config['ATTENDANCE_RANGE_MAX_DAYS']:
+        abort(handle_bad_request(f"Date range must be under {app.config['ATTENDANCE_RANGE_MAX_DAYS']} days"))
+    return date_from, date_to
+
+def attendance_subject():
+    student_id = request.args.get('student_id', type=int)
+    class_id = request.args.get('class_id', type=int)
+    if student_id is None and class_id is None:
+        abort(handle_bad_request("student_id or class_id is required"))
+    return student_id, class_id
+
+class AttendanceRange(Resource):
+    # @jwt_required()
+    @cached('attendance_bitmaps')
+    def get(self):
+        """Present/absent/late counts per student and class between two dates."""
+        student_id, class_id = attendance_subject()
+        date_from, date_to = attendance_range()
+        records = attendance_counts(date_from, date_to, student_id, class_id)
+        return make_response(jsonify({"date_from": date_from.isoformat(), "date_to": date_to.isoformat(),
+                                      "records": records}), 200)
+
+class AttendanceStreaks(Resource):
+    # @jwt_required()
+    @cached('attendance_bitmaps')
+    def get(self):
+        """Runs of consecutive absences, longest first."""
+        student_id, class_id = attendance_subject()
+        date_from, date_to = attendance_range()
+        min_length = request.args.get('min_length', 2, type=int)
+        if min_length < 1:
+            return handle_bad_request("min_length must be at least 1")
+        streaks = absence_streaks(date_from, date_to, min_length, student_id, class_id)
+        return make_response(jsonify({"date_from": date_from.isoformat(), "date_to": date_to.isoformat(),
+                                      "streaks": streaks}), 200)
+
+class AttendanceDaily(Resource):
+    # @jwt_required()
+    @cached('attendance_bitmaps')
+    def get(self):
+        """Whole-class present/absent/late counts for each day."""
+        class_id = request.args.get('class_id', type=int)
+        if class_id is None:
+            return handle_bad_request("class_id is required")
+        date_from, date_to = attendance_range()
+        return make_response(jsonify({"class_id": class_id, "days": daily_counts(class_id, date_from, date_to)}), 200)
+
 api.add_resource(Attendances, '/attendances')
+api.add_resource(AttendanceSummaries, '/attendances/summary')
+api.add_resource(AttendanceRange, '/attendances/range')
+api.add_resource(AttendanceStreaks, '/attendances/streaks')
+api.add_resource(AttendanceDaily, '/attendances/daily')
+api.add_resource(AttendanceBulk, '/attendances/bulk')
 api.add_resource(AttendanceResource, '/attendances/<int:attendance_id>')
 
 # CRUD operations for Progress
 class Progresses(Resource):
     # @jwt_required()
     def get(self):
-        progresses = Progress.query.all()
-        progresses_list = [progress.to_dict() for progress in progresses]
-        return make_response(jsonify({"count": len(progresses_list), "progresses": progresses_list}), 200)
+        return json_response(paginate_columns(Progress, "progresses"))
 
     # @jwt_required()
     def post(self):
@@ -559,6 +948,82 @@ class ProgressResource(Resource):
 api.add_resource(Progresses, '/progresses')
 api.add_resource(ProgressResource, '/progresses/<int:progress_id>')
 
+# Streaming bulk export of whole tables
+EXPORTABLE_TABLES = {
+    'students': Student.__table__,
+    'teachers': Teacher.__table__,
+    'courses': Course.__table__,
+    'classes': Class.__table__,
+    'grades': Grade.__table__,
+    'enrollments': Enrollment.__table__,
+    'attendances': Attendance.__table__,
+    'progresses': Progress.__table__,
+}
+
+EXPORT_FORMATS = {
+    'ndjson': (generate_ndjson, 'application/x-ndjson'),
+    'csv': (generate_csv, 'text/csv'),
+}
+
+class Export(Resource):
+    # @jwt_required()
+    def get(self, table_name):
+        table = EXPORTABLE_TABLES.get(table_name)
+        if table is None:
+            return handle_not_found(f"No exportable table named '{table_name}'")
+
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return handle_bad_request("format must be one of: " + ", ".join(EXPORT_FORMATS))
+
+        generate, mimetype = EXPORT_FORMATS[export_format]
+        rows = generate(table, app.config['EXPORT_BATCH_SIZE'])
+        response = Response(stream_with_context(rows), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename={table_name}.{export_format}'
+        return response
+
+api.add_resource(Export, '/export/<string:table_name>')
+
+# Aggregated reports for the admin dashboard
+def report_group_by():
+    group_by = request.args.get('group_by', 'course')
+    if group_by not in GROUP_BY_CHOICES:
+        abort(handle_bad_request("group_by must be one of: " + ", ".join(GROUP_BY_CHOICES)))
+    return group_by
+
+def report_date(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        abort(handle_bad_request(f"{name} must be a date in YYYY-MM-DD format"))
+
+class GradeReport(Resource):
+    # @jwt_required()
+    def get(self):
+        group_by = report_group_by()
+        return make_response(jsonify({"group_by": group_by, "groups": grade_distribution(group_by)}), 200)
+
+class AttendanceReport(Resource):
+    # @jwt_required()
+    def get(self):
+        group_by = report_group_by()
+        groups = attendance_rates(group_by, report_date('date_from'), report_date('date_to'))
+        return make_response(jsonify({"group_by": group_by, "groups": groups}), 200)
+
+class EnrollmentReport(Resource):
+    # @jwt_required()
+    def get(self):
+        group_by = report_group_by()
+        return make_response(jsonify({"group_by": group_by, "groups": enrollment_counts(group_by)}), 200)
+
+api.add_resource(GradeReport, '/reports/grades')
+api.add_resource(AttendanceReport, '/reports/attendance')
+api.add_resource(EnrollmentReport, '/reports/enrollments')
+
+# Uploads return 202 at once; the image worker renders and stores every size
 class ImageUpload(Resource):
     # @jwt_required()
     def post(self):
@@ -570,17 +1035,148 @@ class ImageUpload(Resource):
         if file.filename == '':
             return handle_bad_request("No selected file")
 
-        try:
-            # Upload the file to Cloudinary
-            result = upload(file, folder="uploads/students")
-            url = result.get("url")
-            return jsonify({"message": "Image uploaded successfully", "url": url}), 201
+        max_bytes = app.config['IMAGE_MAX_UPLOAD_BYTES']
+        image_data = file.read(max_bytes + 1)
+        if len(image_data) > max_bytes:
+            return handle_bad_request(f"Image is larger than {max_bytes} bytes")
+        if image_format(image_data) is None:
+            return handle_bad_request("File is not a supported image")
 
-        except Exception as e:
-            return handle_internal_error(f"Failed to upload image: {str(e)}")
+        asset, queued = queue_image(image_data, file.mimetype)
+        status_url = url_for('imagestatus', asset_id=asset.id, _external=True)
+        body = {"image": asset.to_dict(), "status_url": status_url}
+        if asset.status == 'Done':
+            body["message"] = "Image already uploaded"
+            return make_response(jsonify(body), 200)
+
+        if asset.status == 'Failed':
+            return handle_internal_error(f"Image could not be processed: {asset.last_error}")
+
+        body["message"] = "Image accepted for processing" if queued else "Image is already being processed"
+        response = make_response(jsonify(body), 202)
+        response.headers['Location'] = status_url
+        return response
 
 api.add_resource(ImageUpload, '/upload')
 
+class ImageStatus(Resource):
+    # @jwt_required()
+    def get(self, asset_id):
+        asset = db.session.get(ImageAsset, asset_id)
+        if asset is None:
+            return handle_not_found("Image not found")
+        return make_response(jsonify(asset.to_dict()), 200)
+
+api.add_resource(ImageStatus, '/upload/<int:asset_id>')
+
+# Files written by the local image storage backend
+class Media(Resource):
+    def get(self, filename):
+        return send_from_directory(app.config['IMAGE_LOCAL_DIR'], filename, max_age=31536000)
+
+api.add_resource(Media, '/media/<path:filename>')
+
+
+@app.cli.command('outbox-worker')
+@click.option('--threads', type=int, default=None, help='Number of delivery threads (default: EMAIL_OUTBOX_WORKERS).')
+@click.option('--once', is_flag=True, help='Deliver everything currently due and exit.')
+def outbox_worker(threads, once):
+    """Deliver queued emails from the outbox."""
+    if once:
+        delivered = process_outbox(get_transport(app.config), app.config)
+        click.echo(f"Delivered {delivered} emails")
+        return
+    pool = OutboxWorkerPool(app, lambda: get_transport(app.config), threads)
+    pool.start()
+    click.echo(f"Outbox worker running with {pool.threads} threads")
+    try:
+        pool.stop_event.wait()
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+@app.cli.command('image-worker')
+@click.option('--threads', type=int, default=None, help='Number of processing threads (default: IMAGE_WORKERS).')
+@click.option('--once', is_flag=True, help='Process everything currently queued and exit.')
+def image_worker(threads, once):
+    """Render and store queued image uploads."""
+    if once:
+        completed = process_images(get_storage(app.config), app.config)
+        click.echo(f"Processed {completed} images")
+        return
+    pool = ImageWorkerPool(app, lambda: get_storage(app.config), threads)
+    pool.start()
+    click.echo(f"Image worker running with {pool.threads} threads")
+    try:
+        pool.stop_event.wait()
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+@app.cli.command('provision-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--processes', type=int, default=None, help='Password hashing processes (default: one per CPU).')
+@click.option('--batch-size', type=int, default=500, help='Users inserted per transaction.')
+def provision_users_command(path, processes, batch_size):
+    """Create users, students and teachers in bulk from a CSV or JSON file."""
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        if path.endswith('.json'):
+            records = json.load(handle)
+        else:
+            # Blank CSV cells mean "not provided" rather than an empty string
+            records = [{key: value for key, value in row.items() if value != ''} for row in csv.DictReader(handle)]
+
+    try:
+        summary = provision_users(records, app.config, processes=processes, batch_size=batch_size)
+    except ProvisioningError as e:
+        raise click.ClickException(f"{e}. Run the same file again to create the rest; existing emails are skipped.")
+    for error in summary['errors']:
+        click.echo(f"row {error['index']} ({error['email']}): {error['errors']}", err=True)
+    click.echo(f"Created {summary['created']} users, {summary['failed']} failed, "
+               f"in {summary['seconds']}s ({summary['users_per_second']} users/sec)")
+
+
+@app.cli.command('check-query-plans')
+@click.option('--verbose', is_flag=True, help='Print the full plan of every query.')
+def check_query_plans_command(verbose):
+    """Fail if any hot query is not planned through its index."""
+    report = check_query_plans()
+    failures = 0
+    for name, result in report.items():
+        failed = result['scans'] or not result['uses_index']
+        click.echo(f"[{'FAIL' if failed else 'ok':4}] {name}")
+        if not result['uses_index']:
+            click.echo(f"         expected index: {' or '.join(result['indexes'])}")
+        for line in (result['plan'] if verbose or failed else []):
+            click.echo(f"         {line}")
+        failures += bool(failed)
+    if failures:
+        raise SystemExit(f"{failures} of {len(report)} hot queries do not use their index")
+
+
+@app.cli.command('rebuild-attendance-summary')
+def rebuild_attendance_summary_command():
+    """Recompute the attendance summary table from scratch."""
+    rows = rebuild_attendance_summaries()
+    db.session.commit()
+    click.echo(f"Rebuilt {rows} attendance summary rows")
+
+
+@app.cli.command('rebuild-attendance-bitmaps')
+def rebuild_attendance_bitmaps_command():
+    """Recompute the packed attendance bitmaps from scratch."""
+    rows = rebuild_attendance_bitmaps()
+    db.session.commit()
+    click.echo(f"Rebuilt {rows} attendance bitmap rows")
+
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Rebuild the search index from students, teachers and courses."""
+    documents = rebuild_search_index()
+    db.session.commit()
+    click.echo(f"Indexed {documents} search documents")
+
 
 # Global error handling
 @app.errorhandler(400)
@@ -0,0 +1,115 @@
+"""
+Compare the packed attendance bitmaps with the attendances table.
+
+Seeds a synthetic school, then reports the on-disk size of each
+representation (table plus indexes, from SQLite's dbstat) and the time of
+term-wide queries answered from the rows with SQL and from the bitmaps with
+NumPy. Run from the Server directory:
+
+    python benchmarks/attendance_bitmaps.py --students 400 --classes-per-student 4
+"""
+import argparse
+import datetime
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--students', type=int, default=400, help='students in the seeded school')
+parser.add_argument('--classes-per-student', type=int, default=4, help='classes each student attends')
+parser.add_argument('--repeat', type=int, default=20, help='timed runs per query')
+args = parser.parse_args()
+
+# Point the app at a throwaway file database before it is imported
+db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+db_file.close()
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_file.name}'
+Config.SLOW_QUERY_THRESHOLD_MS = 0
+
+from sqlalchemy import func, select
+from app import app
+from models import db, Attendance
+from utils.attendance_bitmap import absence_streaks, attendance_counts, daily_counts, rebuild_attendance_bitmaps
+from utils.synthetic import generate_dataset
+
+
+def footprint(connection, table):
+    names = [table] + [row[0] for row in connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,))]
+    placeholders = ','.join('?' * len(names))
+    return connection.execute(f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({placeholders})", names).fetchone()[0]
+
+
+def timed(function):
+    function()
+    samples = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+with app.app_context():
+    db.create_all()
+    counts = generate_dataset(app.config, students=args.students, classes_per_student=args.classes_per_student,
+                              years=1, start_year=2023)
+    start = time.perf_counter()
+    rebuild_attendance_bitmaps()
+    db.session.commit()
+    rebuild_seconds = time.perf_counter() - start
+
+connection = sqlite3.connect(db_file.name)
+row_bytes = footprint(connection, 'attendances')
+bitmap_bytes = footprint(connection, 'attendance_bitmaps')
+connection.close()
+print(f"{counts['attendances']} attendance rows -> {counts['attendance_bitmaps']} bitmaps "
+      f"(rebuilt in {rebuild_seconds:.2f}s)")
+print(f"  attendances:        {row_bytes / 1024:10.0f} KiB")
+print(f"  attendance_bitmaps: {bitmap_bytes / 1024:10.0f} KiB  ({row_bytes / bitmap_bytes:.0f}x smaller)")
+
+term_from, term_to = datetime.date(2023, 9, 1), datetime.date(2023, 12, 31)
+year_from, year_to = datetime.date(2023, 9, 1), datetime.date(2024, 6, 30)
+class_id, student_id = 1, 1
+queries = {
+    'class daily counts, term': (
+        lambda: db.session.execute(
+            select(Attendance.date, Attendance.status, func.count())
+            .where(Attendance.class_id == class_id, Attendance.date.between(term_from, term_to))
+            .group_by(Attendance.date, Attendance.status)).all(),
+        lambda: daily_counts(class_id, term_from, term_to),
+    ),
+    'student counts, year': (
+        lambda: db.session.execute(
+            select(Attendance.class_id, Attendance.status, func.count())
+            .where(Attendance.student_id == student_id, Attendance.date.between(year_from, year_to))
+            .group_by(Attendance.class_id, Attendance.status)).all(),
+        lambda: attendance_counts(year_from, year_to, student_id=student_id),
+    ),
+    'class counts, year': (
+        lambda: db.session.execute(
+            select(Attendance.student_id, Attendance.status, func.count())
+            .where(Attendance.class_id == class_id, Attendance.date.between(year_from, year_to))
+            .group_by(Attendance.student_id, Attendance.status)).all(),
+        lambda: attendance_counts(year_from, year_to, class_id=class_id),
+    ),
+    'class absence streaks, year': (
+        None,
+        lambda: absence_streaks(year_from, year_to, 3, class_id=class_id),
+    ),
+}
+
+print(f"{'query':30} {'rows (SQL)':>12} {'bitmaps':>12}")
+with app.app_context():
+    for name, (sql, bitmap) in queries.items():
+        sql_ms = f"{timed(sql):9.2f} ms" if sql else f"{'-':>12}"
+        print(f"{name:30} {sql_ms:>12} {timed(bitmap):9.2f} ms")
+
+os.remove(db_file.name)
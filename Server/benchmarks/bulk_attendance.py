@@ -0,0 +1,76 @@
+"""
+Compare per-row attendance posting against the bulk roster endpoint.
+
+Run from the Server directory:
+
+    python benchmarks/bulk_attendance.py --students 40 --days 20
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--students', type=int, default=40, help='students in the class roster')
+parser.add_argument('--days', type=int, default=20, help='number of days of attendance to record')
+args = parser.parse_args()
+
+# Point the app at a throwaway file database before it is imported
+db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+db_file.close()
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_file.name}'
+
+from app import app
+from models import db, Class, Student
+from utils.query_counter import count_queries
+
+with app.app_context():
+    db.create_all()
+    db.session.add(Class(id=1, name='Class 1', teacher_id=1))
+    db.session.add_all([
+        Student(user_id=i, name=f'Student {i}', enrollment_date=datetime.date(2024, 1, 1),
+                date_of_birth=datetime.date(2010, 1, 1), course_id=1)
+        for i in range(1, args.students + 1)
+    ])
+    db.session.commit()
+
+client = app.test_client()
+statuses = ['Present', 'Absent', 'Late']
+rows = args.students * args.days
+start_date = datetime.date(2024, 1, 1)
+
+start = time.perf_counter()
+with count_queries() as per_row_queries:
+    for day in range(args.days):
+        date = (start_date + datetime.timedelta(days=day)).isoformat()
+        for student_id in range(1, args.students + 1):
+            client.post('/attendances', json={'student_id': student_id, 'class_id': 1,
+                                              'date': date, 'status': statuses[student_id % 3]})
+per_row = time.perf_counter() - start
+
+start = time.perf_counter()
+with count_queries() as bulk_queries:
+    for day in range(args.days):
+        date = (start_date + datetime.timedelta(days=args.days + day)).isoformat()
+        client.post('/attendances/bulk', json={
+            'class_id': 1,
+            'date': date,
+            'records': [{'student_id': student_id, 'status': statuses[student_id % 3]}
+                        for student_id in range(1, args.students + 1)],
+        })
+bulk = time.perf_counter() - start
+
+os.unlink(db_file.name)
+
+print(f"{rows} rows ({args.students} students x {args.days} days)")
+print(f"per-row POST /attendances:      {per_row:8.3f}s  {rows / per_row:10.0f} rows/sec  "
+      f"{per_row_queries.count / args.days:6.0f} queries/roster")
+print(f"bulk    POST /attendances/bulk: {bulk:8.3f}s  {rows / bulk:10.0f} rows/sec  "
+      f"{bulk_queries.count / args.days:6.0f} queries/roster")
+print(f"speedup: {per_row / bulk:.1f}x")
@@ -0,0 +1,99 @@
+"""
+Measure attendance write throughput with several worker processes on one SQLite file.
+
+Each process stands in for a gunicorn worker and posts attendance through the
+app. The run is repeated with SQLite's defaults (rollback journal, full sync)
+and with the tuned pragmas from Config. Run from the Server directory:
+
+    python benchmarks/concurrent_writes.py --workers 4 --requests 200
+"""
+import argparse
+import datetime
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from models import db
+
+BASELINE = {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+            'SQLITE_BUSY_TIMEOUT_MS': '', 'SQLITE_MMAP_SIZE': 0}
+
+
+def load_app(db_path, overrides):
+    # Point the app at the shared file database before it is imported
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+    Config.SLOW_QUERY_THRESHOLD_MS = 0
+    Config.RESPONSE_CACHE_ENABLED = False
+    for key, value in overrides.items():
+        setattr(Config, key, value)
+    from app import app
+    return app
+
+
+def worker(db_path, overrides, worker_id, requests, start_event, results):
+    app = load_app(db_path, overrides)
+    client = app.test_client()
+    start_date = datetime.date(2024, 1, 1)
+    errors = 0
+    start_event.wait()
+    for index in range(requests):
+        response = client.post('/attendances', json={
+            'student_id': worker_id * requests + index + 1,
+            'class_id': 1,
+            'date': (start_date + datetime.timedelta(days=index % 365)).isoformat(),
+            'status': 'Present',
+        })
+        if response.status_code != 201:
+            errors += 1
+    results.put(errors)
+
+
+def run(label, overrides, args):
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    engine = create_engine(f'sqlite:///{db_file.name}')
+    db.metadata.create_all(engine)
+    engine.dispose()
+
+    context = multiprocessing.get_context('spawn')
+    start_event = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(db_file.name, overrides, worker_id, args.requests, start_event, results))
+        for worker_id in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    # Give every worker time to import the app before the clock starts
+    time.sleep(args.warmup)
+    start = time.perf_counter()
+    start_event.set()
+    errors = sum(results.get() for _ in processes)
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    writes = args.workers * args.requests - errors
+    print(f"{label:<10} {writes:>6} writes  {errors:>5} errors  {elapsed:6.2f}s  {writes / elapsed:8.0f} writes/s")
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_file.name + suffix):
+            os.unlink(db_file.name + suffix)
+    return writes / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='concurrent writer processes')
+    parser.add_argument('--requests', type=int, default=200, help='attendance posts per worker')
+    parser.add_argument('--warmup', type=float, default=3.0, help='seconds to let workers import the app')
+    args = parser.parse_args()
+
+    before = run('defaults', BASELINE, args)
+    after = run('tuned', {}, args)
+    print(f"speedup    {after / before:.1f}x")
@@ -0,0 +1,101 @@
+"""
+Time cohort GPA ranking over a large synthetic grade table.
+
+Inserts grades for --students students straight into a throwaway SQLite
+database, then times a cold ranking (load the rows and compute GPAs, ranks
+and percentiles), a cached one, and the same computation as a plain Python
+loop for comparison. Run from the Server directory:
+
+    python benchmarks/grade_rankings.py --students 50000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--students', type=int, default=50000, help='students in the cohort')
+parser.add_argument('--classes-per-student', type=int, default=6, help='graded classes per student per term')
+parser.add_argument('--classes', type=int, default=200, help='distinct classes')
+parser.add_argument('--repeat', type=int, default=5, help='timed runs per measurement')
+args = parser.parse_args()
+
+# Point the app at a throwaway file database before it is imported
+db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+db_file.close()
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_file.name}'
+Config.SLOW_QUERY_THRESHOLD_MS = 0
+
+from sqlalchemy import insert
+from app import app
+from models import db, Class, Grade
+from utils.grading import CohortRanking, cohort_ranking, load_cohort, parse_points_scale
+
+GRADES = ('A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D', 'E', '91', '78%')
+TERM = '2024-T1'
+
+
+def timed(function):
+    samples = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def python_ranking(student_ids, grades, credits):
+    letters, minimums, band_points = parse_points_scale(app.config['GRADE_POINTS'], app.config['GRADE_PERCENT_POINTS'])
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for student_id, grade, credit in zip(student_ids, grades, credits):
+        points = letters.get(grade.upper())
+        if points is None:
+            value = float(grade.rstrip('%'))
+            points = max(p for minimum, p in zip(minimums, band_points) if value >= minimum)
+        totals[student_id][0] += points * credit
+        totals[student_id][1] += credit
+    gpas = sorted(((total / weight, student_id) for student_id, (total, weight) in totals.items()), reverse=True)
+    return {student_id: rank for rank, (_, student_id) in enumerate(gpas, 1)}
+
+
+rng = random.Random(7)
+with app.app_context():
+    db.create_all()
+    db.session.execute(insert(Class), [
+        {'name': f'Class {i}', 'teacher_id': 1, 'credits': rng.choice((0.5, 1.0, 1.0, 1.5))}
+        for i in range(args.classes)
+    ])
+    rows = [
+        {'student_id': student_id, 'course_id': 1, 'class_id': class_id, 'grade': rng.choice(GRADES), 'term': TERM}
+        for student_id in range(1, args.students + 1)
+        for class_id in rng.sample(range(1, args.classes + 1), args.classes_per_student)
+    ]
+    for start in range(0, len(rows), 50000):
+        db.session.execute(insert(Grade), rows[start:start + 50000])
+    db.session.commit()
+    print(f"{len(rows)} grades for {args.students} students")
+
+    loaded = load_cohort('course', 1, TERM)
+    load_ms = timed(lambda: load_cohort('course', 1, TERM))
+    compute_ms = timed(lambda: CohortRanking(*loaded))
+    python_ms = timed(lambda: python_ranking(*(array.tolist() for array in loaded)))
+    app.extensions['grade_rankings'].clear()
+    start = time.perf_counter()
+    ranking = cohort_ranking('course', 1, TERM)
+    cold_ms = (time.perf_counter() - start) * 1000
+    cached_ms = timed(lambda: cohort_ranking('course', 1, TERM))
+
+print(f"  load grade rows:          {load_ms:8.1f} ms")
+print(f"  NumPy GPA/rank/percentile:{compute_ms:8.1f} ms   (plain Python loop: {python_ms:.1f} ms)")
+print(f"  cold cohort_ranking:      {cold_ms:8.1f} ms   ({len(ranking)} students ranked)")
+print(f"  cached cohort_ranking:    {cached_ms:8.2f} ms")
+
+os.remove(db_file.name)
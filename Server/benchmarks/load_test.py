@@ -0,0 +1,483 @@
+"""
+Load-test the API against generated datasets and write a JSON report.
+
+For each dataset scale the harness seeds a database with seed.py (cached
+under benchmarks/.data for SQLite), boots app.py under gunicorn, replays each
+traffic mix from concurrent clients and records per-endpoint latency
+percentiles, throughput and the server's peak RSS. Run from the Server
+directory:
+
+    python benchmarks/load_test.py --scales 1k,100k --clients 8 --duration 20 --output report.json
+    python benchmarks/load_test.py --scales 100k --compare report.json
+
+Scales are approximate attendance row counts: 1k, 100k and 1m. RSS is read
+from /proc, so peak memory is only reported on Linux.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from sqlalchemy import create_engine, func, select
+from models import Teacher, Class, Grade, Enrollment
+
+DATA_DIR = os.path.join(SERVER_DIR, 'benchmarks', '.data')
+
+# seed.py arguments per scale; each student-class pair gets 204 school days of attendance
+SCALES = {
+    '1k': {'teachers': 2, 'students': 5, 'courses': 2, 'classes': 4, 'classes-per-student': 1},
+    '100k': {'teachers': 8, 'students': 125, 'courses': 5, 'classes': 20, 'classes-per-student': 4},
+    '1m': {'teachers': 40, 'students': 1225, 'courses': 10, 'classes': 60, 'classes-per-student': 4},
+}
+STATUSES = ('Present', 'Present', 'Present', 'Present', 'Present', 'Present', 'Late', 'Absent')
+GRADES = ('A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'D')
+
+
+# Request builders: each takes (rng, context) and returns (endpoint label, method, path, JSON body)
+def bulk_roster(rng, context):
+    class_id = rng.choice(context['class_ids'])
+    roster = context['rosters'][class_id]
+    date = context['first_new_day'] + datetime.timedelta(days=rng.randrange(365))
+    return 'POST /attendances/bulk', 'POST', '/attendances/bulk', {
+        'class_id': class_id,
+        'date': date.isoformat(),
+        'records': [{'student_id': student_id, 'status': rng.choice(STATUSES)} for student_id, _ in roster],
+    }
+
+
+def post_attendance(rng, context):
+    class_id = rng.choice(context['class_ids'])
+    student_id, course_id = rng.choice(context['rosters'][class_id])
+    date = context['first_new_day'] + datetime.timedelta(days=rng.randrange(365))
+    return 'POST /attendances', 'POST', '/attendances', {
+        'student_id': student_id, 'course_id': course_id, 'class_id': class_id,
+        'date': date.isoformat(), 'status': rng.choice(STATUSES),
+    }
+
+
+def class_attendance(rng, context):
+    class_id = rng.choice(context['class_ids'])
+    return 'GET /attendances', 'GET', f'/attendances?class_id={class_id}&limit=100', None
+
+
+def get_class(rng, context):
+    return 'GET /classes/<id>', 'GET', f"/classes/{rng.choice(context['class_ids'])}", None
+
+
+def post_grade(rng, context):
+    class_id = rng.choice(context['class_ids'])
+    student_id, course_id = rng.choice(context['rosters'][class_id])
+    return 'POST /grades', 'POST', '/grades', {
+        'student_id': student_id, 'course_id': course_id, 'class_id': class_id, 'grade': rng.choice(GRADES),
+        # A fresh term each time, since a student holds one grade per course, class and term
+        'term': f"load-{rng.randrange(10 ** 9)}",
+    }
+
+
+def put_grade(rng, context):
+    grade_id = rng.randint(*context['grade_id_range'])
+    return 'PUT /grades/<id>', 'PUT', f'/grades/{grade_id}', {'grade': rng.choice(GRADES)}
+
+
+def grade_report(rng, context):
+    group_by = rng.choice(('course', 'class', 'teacher'))
+    return 'GET /reports/grades', 'GET', f'/reports/grades?group_by={group_by}', None
+
+
+def student_grades(rng, context):
+    return 'GET /grades', 'GET', f"/grades?student_id={rng.choice(context['student_ids'])}", None
+
+
+def student_dashboard(rng, context):
+    return ('GET /students/<id>/dashboard', 'GET',
+            f"/students/{rng.choice(context['student_ids'])}/dashboard", None)
+
+
+def teacher_roster(rng, context):
+    return 'GET /teachers/<id>/roster', 'GET', f"/teachers/{rng.choice(context['teacher_ids'])}/roster", None
+
+
+def attendance_report(rng, context):
+    group_by = rng.choice(('course', 'class', 'teacher'))
+    return 'GET /reports/attendance', 'GET', f'/reports/attendance?group_by={group_by}', None
+
+
+def list_students(rng, context):
+    return 'GET /students', 'GET', '/students?limit=50', None
+
+
+def attendance_summary(rng, context):
+    return ('GET /attendances/summary', 'GET',
+            f"/attendances/summary?student_id={rng.choice(context['student_ids'])}", None)
+
+
+# Weighted request builders per traffic mix
+MIXES = {
+    # Start of the school day: every class teacher submits a roster at once
+    'attendance_burst': ((6, bulk_roster), (2, post_attendance), (1, class_attendance), (1, get_class)),
+    # End of term: grades entered and corrected while teachers check the reports
+    'grade_entry': ((5, post_grade), (2, put_grade), (2, grade_report), (1, student_grades)),
+    # Students and teachers browsing during the day
+    'dashboards': ((4, student_dashboard), (2, teacher_roster), (2, attendance_report),
+                   (1, list_students), (1, attendance_summary)),
+}
+
+
+def prepare_dataset(scale, args):
+    """
+    Seed a database for ``scale`` and return the URL to load-test against.
+
+    SQLite datasets are generated once per scale and seed, then copied for each
+    mix so every run starts from identical data. Other databases are reseeded.
+    """
+    seed_args = [f'--{key}={value}' for key, value in SCALES[scale].items()] + [f'--seed={args.seed}']
+    if args.database_url:
+        subprocess.run([sys.executable, 'seed.py', *seed_args], cwd=SERVER_DIR, check=True,
+                       env={**os.environ, 'DATABASE_URL': args.database_url})
+        return args.database_url
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    pristine = os.path.join(DATA_DIR, f'{scale}-seed{args.seed}.db')
+    if not os.path.exists(pristine):
+        print(f"Generating {scale} dataset...", flush=True)
+        subprocess.run([sys.executable, 'seed.py', *seed_args], cwd=SERVER_DIR, check=True,
+                       env={**os.environ, 'DATABASE_URL': f'sqlite:///{pristine}.tmp'})
+        os.replace(f'{pristine}.tmp', pristine)
+    working = os.path.join(args.work_dir, f'{scale}.db')
+    # Drop the previous run's WAL so it is not replayed onto the fresh copy
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(working + suffix):
+            os.unlink(working + suffix)
+    shutil.copyfile(pristine, working)
+    return f'sqlite:///{working}'
+
+
+def load_context(database_url):
+    """Ids the request builders draw from, read once from the dataset."""
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        rosters = defaultdict(list)
+        for student_id, course_id, class_id in connection.execute(
+            select(Enrollment.student_id, Enrollment.course_id, Enrollment.class_id).order_by(Enrollment.id)
+        ):
+            rosters[class_id].append((student_id, course_id))
+        teacher_ids = connection.scalars(select(Teacher.id).order_by(Teacher.id)).all()
+        grade_id_range = connection.execute(select(func.min(Grade.id), func.max(Grade.id))).one()
+        class_ids = [class_id for class_id in connection.scalars(select(Class.id).order_by(Class.id))
+                     if class_id in rosters]
+    engine.dispose()
+    return {
+        'rosters': dict(rosters),
+        'class_ids': class_ids,
+        'student_ids': sorted({student_id for roster in rosters.values() for student_id, _ in roster}),
+        'teacher_ids': teacher_ids,
+        'grade_id_range': tuple(grade_id_range),
+        # New attendance is dated after every seeded academic year
+        'first_new_day': datetime.date(2030, 1, 1),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url, port, args):
+    env = {
+        **os.environ,
+        'DATABASE_URL': database_url,
+        'METRICS_DIR': os.path.join(args.work_dir, 'metrics'),
+        'SLOW_QUERY_LOG_FILE': os.path.join(args.work_dir, 'slow_queries.log'),
+    }
+    if args.server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '--workers', str(args.workers), '--threads', str(args.threads),
+                   '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app']
+    else:
+        command = [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(port), '--with-threads']
+    process = subprocess.Popen(command, cwd=SERVER_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/')
+            connection.getresponse().read()
+            connection.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Server did not start within 60s")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def process_tree_rss(root_pid):
+    """Resident memory of a process and all its descendants, in bytes (Linux only)."""
+    children = defaultdict(list)
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as handle:
+                # The command name may contain spaces, so split after its closing parenthesis
+                parent = int(handle.read().rpartition(')')[2].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children[parent].append(int(entry))
+    total = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, ()))
+        try:
+            with open(f'/proc/{pid}/status') as handle:
+                for line in handle:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class RssSampler(threading.Thread):
+    """Record the peak RSS of the server process tree while traffic runs."""
+
+    def __init__(self, pid, interval=0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self.stop_event = threading.Event()
+
+    def run(self):
+        if not os.path.isdir('/proc'):
+            return
+        while not self.stop_event.is_set():
+            self.peak = max(self.peak, process_tree_rss(self.pid))
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+def client(port, mix, context, seed, warmup_until, stop_at, samples):
+    """Send requests from one mix until ``stop_at``, appending (label, status, seconds) samples."""
+    rng = random.Random(seed)
+    weights = [weight for weight, _ in mix]
+    builders = [builder for _, builder in mix]
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    while True:
+        started = time.monotonic()
+        if started >= stop_at:
+            break
+        label, method, path, body = rng.choices(builders, weights)[0](rng, context)
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            status = 0
+        elapsed = time.monotonic() - started
+        if started >= warmup_until:
+            samples.append((label, status, elapsed))
+    connection.close()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarise(samples, elapsed):
+    by_endpoint = defaultdict(list)
+    errors = defaultdict(int)
+    for label, status, seconds in samples:
+        by_endpoint[label].append(seconds)
+        if status == 0 or status >= 500:
+            errors[label] += 1
+    endpoints = {}
+    for label, durations in sorted(by_endpoint.items()):
+        durations.sort()
+        endpoints[label] = {
+            'requests': len(durations),
+            'errors': errors[label],
+            'throughput_rps': round(len(durations) / elapsed, 2),
+            'p50_ms': round(percentile(durations, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(durations, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(durations, 0.99) * 1000, 2),
+            'max_ms': round(durations[-1] * 1000, 2),
+        }
+    return endpoints
+
+
+def run_mix(scale, mix_name, args):
+    database_url = prepare_dataset(scale, args)
+    context = load_context(database_url)
+    port = free_port()
+    server = start_server(database_url, port, args)
+    sampler = RssSampler(server.pid)
+    sampler.start()
+    try:
+        samples = []
+        warmup_until = time.monotonic() + args.warmup
+        stop_at = warmup_until + args.duration
+        clients = [
+            threading.Thread(target=client, args=(port, MIXES[mix_name], context, args.seed * 1000 + index,
+                                                  warmup_until, stop_at, samples))
+            for index in range(args.clients)
+        ]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+    finally:
+        sampler.stop()
+        stop_server(server)
+
+    endpoints = summarise(samples, args.duration)
+    result = {
+        'requests': len(samples),
+        'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+        'throughput_rps': round(len(samples) / args.duration, 2),
+        'peak_rss_mb': round(sampler.peak / 1024 / 1024, 1) if sampler.peak else None,
+        'endpoints': endpoints,
+    }
+    print(f"{scale:>5} {mix_name:<17} {result['throughput_rps']:>8.1f} req/s  {result['errors']:>4} errors  "
+          f"peak RSS {result['peak_rss_mb']} MB", flush=True)
+    for label, endpoint in endpoints.items():
+        print(f"      {label:<34} p50 {endpoint['p50_ms']:>8.1f}ms  p95 {endpoint['p95_ms']:>8.1f}ms  "
+              f"p99 {endpoint['p99_ms']:>8.1f}ms", flush=True)
+    return result
+
+
+def compare(report, baseline, tolerance):
+    """
+    Print endpoints whose p95 latency or throughput regressed beyond ``tolerance``.
+
+    :return: Number of regressions found
+    """
+    regressions = 0
+    for scale, mixes in report['results'].items():
+        for mix_name, result in mixes.items():
+            old = baseline.get('results', {}).get(scale, {}).get(mix_name)
+            if old is None:
+                continue
+            for label, endpoint in result['endpoints'].items():
+                previous = old['endpoints'].get(label)
+                if previous is None:
+                    continue
+                if endpoint['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+                    regressions += 1
+                    print(f"REGRESSION {scale} {mix_name} {label}: p95 {previous['p95_ms']}ms -> {endpoint['p95_ms']}ms")
+                if endpoint['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+                    regressions += 1
+                    print(f"REGRESSION {scale} {mix_name} {label}: "
+                          f"{previous['throughput_rps']} -> {endpoint['throughput_rps']} req/s")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SERVER_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='1k,100k', help=f"comma-separated scales from {', '.join(SCALES)}")
+    parser.add_argument('--mixes', default=','.join(MIXES), help=f"comma-separated mixes from {', '.join(MIXES)}")
+    parser.add_argument('--clients', type=int, default=8, help='concurrent client threads')
+    parser.add_argument('--duration', type=float, default=20.0, help='measured seconds per mix')
+    parser.add_argument('--warmup', type=float, default=3.0, help='unmeasured seconds before each mix')
+    parser.add_argument('--server', choices=('gunicorn', 'werkzeug'), default='gunicorn',
+                        help='server to boot app.py under')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=1, help='threads per gunicorn worker')
+    parser.add_argument('--seed', type=int, default=42, help='seed for the dataset and the traffic')
+    parser.add_argument('--database-url', help='seed and test this database instead of SQLite files')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--compare', help='baseline JSON report to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed regression before failing')
+    parser.add_argument('--verbose', action='store_true', help='show server logs')
+    args = parser.parse_args()
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    mixes = [mix.strip() for mix in args.mixes.split(',') if mix.strip()]
+    for scale in scales:
+        if scale not in SCALES:
+            parser.error(f"unknown scale '{scale}'")
+    for mix in mixes:
+        if mix not in MIXES:
+            parser.error(f"unknown mix '{mix}'")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'started_at': datetime.datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'settings': {key: getattr(args, key) for key in
+                         ('clients', 'duration', 'warmup', 'server', 'workers', 'threads', 'seed')},
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        args.work_dir = work_dir
+        for scale in scales:
+            for mix in mixes:
+                report['results'].setdefault(scale, {})[mix] = run_mix(scale, mix, args)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        print(f"{regressions} regressions against {args.compare}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Run the app against a primary and two read replicas and show where queries go.
+
+Each replica is a snapshot copy of the primary SQLite file, which stands in
+for a streaming replica locally; point DATABASE_URL and DATABASE_REPLICA_URLS
+at real Postgres instances to do the same against a replicated cluster. Run
+from the Server directory:
+
+    python benchmarks/read_replicas.py --students 200 --requests 500
+"""
+import argparse
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from config import Config
+from models import db, Student
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--students', type=int, default=200, help='students in the seeded database')
+parser.add_argument('--requests', type=int, default=500, help='GET requests to route')
+parser.add_argument('--replicas', type=int, default=2, help='number of replica copies')
+args = parser.parse_args()
+
+paths = []
+for _ in range(args.replicas + 1):
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    paths.append(db_file.name)
+primary_path, replica_paths = paths[0], paths[1:]
+
+# Seed the primary, then snapshot it into each replica
+engine = create_engine(f'sqlite:///{primary_path}')
+db.metadata.create_all(engine)
+with engine.begin() as connection:
+    connection.execute(Student.__table__.insert(), [
+        {'user_id': i, 'name': f'Student {i}', 'enrollment_date': datetime.date(2024, 1, 1),
+         'date_of_birth': datetime.date(2010, 1, 1), 'course_id': 1}
+        for i in range(1, args.students + 1)
+    ])
+engine.dispose()
+source = sqlite3.connect(primary_path)
+for path in replica_paths:
+    target = sqlite3.connect(path)
+    source.backup(target)
+    target.close()
+source.close()
+
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary_path}'
+Config.SQLALCHEMY_REPLICA_URIS = [f'sqlite:///{path}' for path in replica_paths]
+Config.RESPONSE_CACHE_ENABLED = False
+Config.SLOW_QUERY_THRESHOLD_MS = 0
+
+from app import app
+
+routed = Counter()
+with app.app_context():
+    for key, engine in db.engines.items():
+        name = key or 'primary'
+        event.listen(engine, 'before_cursor_execute',
+                     lambda *_, name=name: routed.update([name]))
+
+client = app.test_client()
+
+start = time.perf_counter()
+for index in range(args.requests):
+    client.get(f'/students/{index % args.students + 1}')
+elapsed = time.perf_counter() - start
+print(f"GET    {args.requests} requests  {args.requests / elapsed:8.0f} req/s  {dict(routed)}")
+
+routed.clear()
+response = client.post('/attendances', json={'student_id': 1, 'class_id': 1,
+                                              'date': '2024-01-01', 'status': 'Present'})
+print(f"POST   status {response.status_code}  {dict(routed)}")
+
+routed.clear()
+response = client.get('/attendances?student_id=1')
+print(f"GET    new row visible on replica: {response.get_json()['count'] > 0}  {dict(routed)}")
+
+for path in paths:
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
@@ -0,0 +1,78 @@
+"""
+Compare ORM to_dict() + jsonify against the column-projection encoder.
+
+Run from the Server directory:
+
+    python benchmarks/serializers.py --rows 100000
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--rows', type=int, default=100000, help='attendance rows to serialize')
+parser.add_argument('--repeat', type=int, default=3, help='runs per path; the best is reported')
+args = parser.parse_args()
+
+# Point the app at a throwaway file database before it is imported
+db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+db_file.close()
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_file.name}'
+
+from flask import jsonify
+from sqlalchemy import insert, select
+from app import app
+from models import db, Attendance
+from utils.serializers import SERIALIZED_COLUMNS, compile_row_encoder
+
+statuses = ['Present', 'Absent', 'Late']
+start_date = datetime.date(2024, 1, 1)
+
+with app.app_context():
+    db.create_all()
+    db.session.execute(insert(Attendance), [
+        {'student_id': i % 1000 + 1, 'class_id': i % 40 + 1, 'course_id': i % 12 + 1,
+         'date': start_date + datetime.timedelta(days=i // 1000), 'status': statuses[i % 3]}
+        for i in range(args.rows)
+    ])
+    db.session.commit()
+
+
+def orm_path():
+    attendances = Attendance.query.all()
+    return jsonify({"attendances": [attendance.to_dict() for attendance in attendances]}).get_data()
+
+
+def projection_path():
+    columns = SERIALIZED_COLUMNS[Attendance]
+    encode_row = compile_row_encoder(columns)
+    rows = db.session.execute(select(*columns)).all()
+    return ('{"attendances":[' + ','.join(map(encode_row, rows)) + ']}').encode('utf-8')
+
+
+def best_of(func):
+    timings = []
+    for _ in range(args.repeat):
+        with app.test_request_context():
+            start = time.perf_counter()
+            body = func()
+            timings.append(time.perf_counter() - start)
+            db.session.remove()
+    return min(timings), len(body)
+
+
+orm_seconds, orm_bytes = best_of(orm_path)
+fast_seconds, fast_bytes = best_of(projection_path)
+os.unlink(db_file.name)
+
+print(f"{args.rows} attendance rows, best of {args.repeat}")
+print(f"ORM to_dict() + jsonify: {orm_seconds:8.3f}s  {args.rows / orm_seconds:10.0f} rows/sec  {orm_bytes} bytes")
+print(f"column projection:       {fast_seconds:8.3f}s  {args.rows / fast_seconds:10.0f} rows/sec  {fast_bytes} bytes")
+print(f"speedup: {orm_seconds / fast_seconds:.1f}x")
@@ -1,10 +1,21 @@
 import os
+import tempfile
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
 
 class Config:
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///your_database.db'
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///your_database.db')
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your_default_secret_key')
     SECRET_KEY = os.getenv('SECRET_KEY', 'your_secret_key')
@@ -13,4 +24,56 @@ class Config:
     CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY')
     CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
     DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-reply@studysphereapp.com') 
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv('PAGINATION_DEFAULT_LIMIT', 50))
+    PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', 500))
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+    GRADE_IMPORT_BATCH_SIZE = int(os.getenv('GRADE_IMPORT_BATCH_SIZE', 2000))
+    # Letter grades and percentage bands (minimum percentage:points) to GPA points
+    GRADE_POINTS = os.getenv('GRADE_POINTS', 'A+:4.0,A:4.0,A-:3.7,B+:3.3,B:3.0,B-:2.7,C+:2.3,C:2.0,C-:1.7,'
+                                             'D+:1.3,D:1.0,D-:0.7,E:0.0,F:0.0')
+    GRADE_PERCENT_POINTS = os.getenv('GRADE_PERCENT_POINTS', '93:4.0,90:3.7,87:3.3,83:3.0,80:2.7,77:2.3,'
+                                                             '73:2.0,70:1.7,67:1.3,63:1.0,60:0.7,0:0.0')
+    GRADE_RANKING_CACHE_ENTRIES = int(os.getenv('GRADE_RANKING_CACHE_ENTRIES', 256))
+    EMAIL_TRANSPORT = os.getenv('EMAIL_TRANSPORT', 'sendgrid')
+    SMTP_HOST = os.getenv('SMTP_HOST', 'localhost')
+    SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
+    SMTP_USERNAME = os.getenv('SMTP_USERNAME')
+    SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+    EMAIL_FILE_DIR = os.getenv('EMAIL_FILE_DIR', 'sent_emails')
+    EMAIL_OUTBOX_WORKERS = int(os.getenv('EMAIL_OUTBOX_WORKERS', 4))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 8))
+    EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv('EMAIL_OUTBOX_BACKOFF_SECONDS', 30))
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv('EMAIL_OUTBOX_BACKOFF_MAX_SECONDS', 3600))
+    EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', 300))
+    EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', 2))
+    IMAGE_STORAGE = os.getenv('IMAGE_STORAGE', 'cloudinary')  # cloudinary | local
+    IMAGE_FOLDER = os.getenv('IMAGE_FOLDER', 'uploads/students')
+    IMAGE_LOCAL_DIR = os.getenv('IMAGE_LOCAL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media'))
+    IMAGE_LOCAL_BASE_URL = os.getenv('IMAGE_LOCAL_BASE_URL', '/media')
+    IMAGE_SIZES = os.getenv('IMAGE_SIZES', 'thumb:64,small:160,medium:320,large:800')
+    IMAGE_JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY', 85))
+    IMAGE_MAX_UPLOAD_BYTES = int(os.getenv('IMAGE_MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+    IMAGE_BATCH_SIZE = int(os.getenv('IMAGE_BATCH_SIZE', 10))
+    IMAGE_MAX_ATTEMPTS = int(os.getenv('IMAGE_MAX_ATTEMPTS', 5))
+    IMAGE_BACKOFF_SECONDS = int(os.getenv('IMAGE_BACKOFF_SECONDS', 30))
+    IMAGE_BACKOFF_MAX_SECONDS = int(os.getenv('IMAGE_BACKOFF_MAX_SECONDS', 3600))
+    IMAGE_LEASE_SECONDS = int(os.getenv('IMAGE_LEASE_SECONDS', 300))
+    IMAGE_POLL_SECONDS = float(os.getenv('IMAGE_POLL_SECONDS', 2))
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 10))
+    QUERY_REPEAT_RAISE = os.getenv('QUERY_REPEAT_RAISE', 'false').lower() == 'true'
+    METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'studysphere-metrics'))
+    ATTENDANCE_TERM_STARTS = os.getenv('ATTENDANCE_TERM_STARTS', '09-01,01-01,04-01')  # MM-DD, one per term
+    ATTENDANCE_RANGE_MAX_DAYS = int(os.getenv('ATTENDANCE_RANGE_MAX_DAYS', 731))
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+    SLOW_QUERY_BUFFER_SIZE = int(os.getenv('SLOW_QUERY_BUFFER_SIZE', 200))
+    # Shared by all workers and rotated externally (logrotate), never by the app
+    SLOW_QUERY_LOG_FILE = os.getenv('SLOW_QUERY_LOG_FILE', os.path.join(tempfile.gettempdir(), 'studysphere-slow-queries.log'))
     
@@ -0,0 +1,33 @@
+"""add grade natural key index
+
+Revision ID: d281f3848a62
+Revises: 296977f22630
+Create Date: 2026-10-18 19:21:33.527569
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd281f3848a62'
+down_revision = '296977f22630'
+branch_labels = None
+depends_on = None
+
+KEY = "student_id, coalesce(course_id, 0), coalesce(class_id, 0), coalesce(term, '')"
+
+
+def upgrade():
+    # Concurrent imports could write the same key twice; keep only the newest of each
+    op.execute(f"DELETE FROM grades WHERE id NOT IN (SELECT max(id) FROM grades GROUP BY {KEY})")
+    op.create_index('uq_grades_student_course_class_term', 'grades', [
+        sa.text('student_id'),
+        sa.text('coalesce(course_id, 0)'),
+        sa.text('coalesce(class_id, 0)'),
+        sa.text("coalesce(term, '')"),
+    ], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_grades_student_course_class_term', table_name='grades')
@@ -1,7 +1,58 @@
+from flask import has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData
+from flask_sqlalchemy.session import Session
+from sqlalchemy import DDL, MetaData, event, func, literal_column
+from sqlalchemy.sql.selectable import SelectBase
+import datetime
+import random
 
-db = SQLAlchemy()
+REPLICA_BIND_PREFIX = 'replica_'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads made while serving GET requests to a read replica.
+
+    Only SELECTs count as reads; that includes ``text(...).columns(...)``, which
+    marks a textual statement as a query. Everything else goes to the primary:
+    DML, ``text()`` statements, SELECT ... FOR UPDATE, other HTTP methods and
+    work outside a request (CLI commands, workers). Once a request has written
+    or the session has flushed, the rest of it reads from the primary too so
+    it sees its own changes. One replica is picked per session, so a request
+    reads a single consistent source.
+    """
+
+    _replica_key = None
+    _has_written = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        engines = self._db.engines
+        if bind is not None or primary is not engines.get(None):
+            return primary
+
+        if self._flushing or (clause is not None and not is_read(clause)):
+            self._has_written = True
+        if self._has_written or not has_request_context():
+            return primary
+        if request.method not in READ_METHODS:
+            return primary
+
+        if self._replica_key is None:
+            replicas = [key for key in engines if isinstance(key, str) and key.startswith(REPLICA_BIND_PREFIX)]
+            if not replicas:
+                return primary
+            self._replica_key = random.choice(replicas)
+        return engines[self._replica_key]
+
+
+def is_read(clause):
+    """Whether a statement only reads: a SELECT, compound or textual, without FOR UPDATE."""
+    return isinstance(clause, SelectBase) and getattr(clause, '_for_update_arg', None) is None
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -26,6 +77,9 @@ class User(db.Model):
 
 class Student(db.Model):
     __tablename__ = 'students'
+    __table_args__ = (
+        db.Index('ix_students_course_id', 'course_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
     
@@ -101,6 +155,9 @@ class Teacher(db.Model):
 
 class Course(db.Model):
     __tablename__ = 'courses'
+    __table_args__ = (
+        db.Index('ix_courses_teacher_id', 'teacher_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
@@ -126,11 +183,16 @@ class Course(db.Model):
 
 class Class(db.Model):
     __tablename__ = 'classes'
+    __table_args__ = (
+        db.Index('ix_classes_teacher_id', 'teacher_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     schedule = db.Column(db.String(255))
     teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id'), nullable=False)
+    # Weight of the class's grades in a credit-weighted GPA
+    credits = db.Column(db.Float, nullable=False, default=1.0, server_default='1')
     
     students = db.relationship('Enrollment', backref='class', lazy=True)
     grades = db.relationship('Grade', backref='class', lazy=True)
@@ -143,6 +205,7 @@ class Class(db.Model):
             'description': self.description,
             'schedule': self.schedule,
             'teacher_id': self.teacher_id,
+            'credits': self.credits,
         }
 
     def __repr__(self):
@@ -151,6 +214,11 @@ class Class(db.Model):
 
 class Enrollment(db.Model):
     __tablename__ = 'enrollments'
+    __table_args__ = (
+        db.Index('ix_enrollments_student_id', 'student_id'),
+        db.Index('ix_enrollments_course_id', 'course_id'),
+        db.Index('ix_enrollments_class_id', 'class_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
@@ -170,6 +238,11 @@ class Enrollment(db.Model):
 
 class Progress(db.Model):
     __tablename__ = 'progress'
+    __table_args__ = (
+        db.Index('ix_progress_student_id', 'student_id'),
+        db.Index('ix_progress_course_id', 'course_id'),
+        db.Index('ix_progress_class_id', 'class_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
@@ -197,6 +270,11 @@ class Progress(db.Model):
 
 class Attendance(db.Model):
     __tablename__ = 'attendances'
+    __table_args__ = (
+        db.Index('ix_attendances_student_id_date', 'student_id', 'date'),
+        db.Index('ix_attendances_class_id_date', 'class_id', 'date'),
+        db.Index('ix_attendances_course_id_date', 'course_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
@@ -221,12 +299,19 @@ class Attendance(db.Model):
 
 class Grade(db.Model):
     __tablename__ = 'grades'
+    __table_args__ = (
+        db.Index('ix_grades_student_id_course_id', 'student_id', 'course_id'),
+        db.Index('ix_grades_course_id', 'course_id'),
+        db.Index('ix_grades_class_id', 'class_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=True)
     class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), nullable=True)
     grade = db.Column(db.String(5), nullable=False)
+    # Free-form term label such as '2023-T1'; NULL for grades not tied to a term
+    term = db.Column(db.String(16), nullable=True)
 
     def to_dict(self):
         return {
@@ -235,7 +320,223 @@ class Grade(db.Model):
             'course_id': self.course_id,
             'class_id': self.class_id,
             'grade': self.grade,
+            'term': self.term,
         }
 
     def __repr__(self):
         return f"<Grade {self.id}: Student {self.student_id} - Grade {self.grade}>"
+
+
+# A grade's natural key; coalesce makes missing course, class or term compare
+# equal, which a plain unique index would treat as distinct
+GRADE_KEY = (
+    Grade.student_id,
+    func.coalesce(Grade.course_id, literal_column('0')),
+    func.coalesce(Grade.class_id, literal_column('0')),
+    func.coalesce(Grade.term, literal_column("''")),
+)
+db.Index('uq_grades_student_course_class_term', *GRADE_KEY, unique=True)
+
+
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    from_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum('Pending', 'Sent', 'Failed', name='email_status'), nullable=False, default='Pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    claim_token = db.Column(db.String(32))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'to_email': self.to_email,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at,
+            'last_error': self.last_error,
+            'created_at': self.created_at,
+            'sent_at': self.sent_at,
+        }
+
+    def __repr__(self):
+        return f"<EmailOutbox {self.id}: {self.to_email} - {self.status}>"
+
+
+class AttendanceSummary(db.Model):
+    __tablename__ = 'attendance_summaries'
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'course_id', 'class_id', name='uq_attendance_summaries_key'),
+        db.Index('ix_attendance_summaries_course_id', 'course_id'),
+        db.Index('ix_attendance_summaries_class_id', 'class_id'),
+    )
+
+    # course_id/class_id use 0 rather than NULL for "none" so the key can be upserted
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, nullable=False)
+    course_id = db.Column(db.Integer, nullable=False, default=0)
+    class_id = db.Column(db.Integer, nullable=False, default=0)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+    late = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        total = self.present + self.absent + self.late
+        return {
+            'id': self.id,
+            'student_id': self.student_id,
+            'course_id': self.course_id or None,
+            'class_id': self.class_id or None,
+            'present': self.present,
+            'absent': self.absent,
+            'late': self.late,
+            'total': total,
+            'attendance_rate': round((self.present + self.late) / total, 4) if total else None,
+        }
+
+    def __repr__(self):
+        return f"<AttendanceSummary {self.id}: Student {self.student_id} - {self.present}/{self.absent}/{self.late}>"
+
+
+class AttendanceBitmap(db.Model):
+    __tablename__ = 'attendance_bitmaps'
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'class_id', 'term_start', name='uq_attendance_bitmaps_key'),
+        db.Index('ix_attendance_bitmaps_class_id_term_start', 'class_id', 'term_start'),
+    )
+
+    # One term of a student's attendance in one class, 2 bits per calendar day from
+    # term_start: 0 no record, 1 present, 2 absent, 3 late. class_id uses 0 for "none".
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, nullable=False)
+    class_id = db.Column(db.Integer, nullable=False, default=0)
+    term_start = db.Column(db.Date, nullable=False)
+    days = db.Column(db.LargeBinary, nullable=False)
+
+    def __repr__(self):
+        return f"<AttendanceBitmap {self.id}: Student {self.student_id} - Class {self.class_id} from {self.term_start}>"
+
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'table_name': self.table_name,
+            'version': self.version,
+        }
+
+    def __repr__(self):
+        return f"<TableVersion {self.table_name}: {self.version}>"
+
+
+class ImageAsset(db.Model):
+    __tablename__ = 'image_assets'
+    __table_args__ = (
+        db.Index('ix_image_assets_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    # One row per distinct upload; the original bytes are dropped once the sizes are stored
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)
+    content_type = db.Column(db.String(64))
+    data = db.Column(db.LargeBinary)
+    status = db.Column(db.Enum('Pending', 'Done', 'Failed', name='image_status'), nullable=False, default='Pending')
+    urls = db.Column(db.JSON)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    claim_token = db.Column(db.String(32))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'content_hash': self.content_hash,
+            'status': self.status,
+            'urls': self.urls,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at,
+            'completed_at': self.completed_at,
+        }
+
+    def __repr__(self):
+        return f"<ImageAsset {self.id}: {self.content_hash[:12]} - {self.status}>"
+
+
+class SearchDocument(db.Model):
+    __tablename__ = 'search_documents'
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'record_id', name='uq_search_documents_kind_record_id'),
+    )
+
+    # One row per searchable student, teacher or course, rebuilt whenever its sources change
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)
+    record_id = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False, default='')
+
+    def to_dict(self):
+        return {
+            'type': self.kind,
+            'id': self.record_id,
+            'title': self.title,
+            'subtitle': self.body,
+        }
+
+    def __repr__(self):
+        return f"<SearchDocument {self.id}: {self.kind} {self.record_id} - {self.title}>"
+
+
+# The text index itself: an FTS5 trigram table on SQLite, a pg_trgm GIN index on Postgres
+SEARCH_INDEX_DDL = {
+    'sqlite': (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5("
+        "title, body, content='search_documents', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+        "INSERT INTO search_documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+        "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+        "INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body) "
+        "VALUES ('delete', old.id, old.title, old.body); END",
+        "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+        "INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body) "
+        "VALUES ('delete', old.id, old.title, old.body); "
+        "INSERT INTO search_documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+        # Per-trigram document counts, used to pick the selective trigrams for typo matching
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts_vocab USING fts5vocab(search_documents_fts, 'row')",
+    ),
+    'postgresql': (
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_search_documents_trgm ON search_documents "
+        "USING gin ((title || ' ' || body) gin_trgm_ops)",
+    ),
+}
+
+for dialect_name, statements in SEARCH_INDEX_DDL.items():
+    for statement in statements:
+        event.listen(SearchDocument.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect_name))
+for table_name in ('search_documents_fts_vocab', 'search_documents_fts'):
+    event.listen(SearchDocument.__table__, 'before_drop',
+                 DDL(f"DROP TABLE IF EXISTS {table_name}").execute_if(dialect='sqlite'))
+
+# Prefix search walks this index as a range: kind = ? AND lower(title) >= 'jo' AND lower(title) < 'jp'
+db.Index('ix_search_documents_kind_title', SearchDocument.kind, func.lower(SearchDocument.title))
@@ -0,0 +1,131 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database, a test client, and
+query budget assertions built on the per-request query counter.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+import datetime
+import itertools
+import pytest
+from sqlalchemy import insert, select
+
+from config import Config
+
+# Point the app at throwaway files before it is imported
+DATA_DIR = tempfile.mkdtemp(prefix='studysphere-tests-')
+Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(DATA_DIR, 'test.db')}"
+Config.METRICS_DIR = os.path.join(DATA_DIR, 'metrics')
+Config.SLOW_QUERY_LOG_FILE = os.path.join(DATA_DIR, 'slow-queries.log')
+Config.EMAIL_TRANSPORT = 'memory'
+Config.BCRYPT_LOG_ROUNDS = 4
+Config.JWT_SECRET_KEY = 'test-jwt-secret-key-of-at-least-32-bytes'
+# Any N+1 pattern a request runs into fails the test rather than just logging
+Config.QUERY_REPEAT_RAISE = True
+
+from app import app as flask_app
+from models import db, User, Student, Teacher, Course, Class, Enrollment
+from utils.query_counter import count_queries
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def app():
+    """The app with an empty schema, created fresh for each test."""
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        db.create_all()
+        try:
+            yield flask_app
+        finally:
+            db.session.remove()
+            db.drop_all()
+            flask_app.extensions['response_cache'].clear()
+            flask_app.extensions['grade_rankings'].clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@contextmanager
+def assert_query_budget(max_queries, max_repeats=None):
+    """
+    Fail if the block runs more than ``max_queries`` statements, or repeats one
+    statement shape more than ``max_repeats`` times.
+    """
+    with count_queries() as stats:
+        yield stats
+    assert stats.count <= max_queries, (
+        f"Expected at most {max_queries} queries, ran {stats.count}:\n"
+        + "\n".join(f"{count}x {shape}" for shape, count in stats.shapes.most_common())
+    )
+    if max_repeats is not None:
+        repeated = stats.repeated(max_repeats)
+        assert not repeated, f"Statement repeated {repeated[0][1]} times: {repeated[0][0]}"
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fixture returning assert_query_budget, e.g.::
+
+        def test_roster(client, query_budget):
+            with query_budget(7):
+                client.get('/teachers/1/roster')
+    """
+    return assert_query_budget
+
+
+@pytest.fixture
+def make_school(app):
+    """
+    Factory creating a teacher with one course and one class and ``students``
+    students enrolled in both, e.g. ``school = make_school(students=5)``.
+
+    :return: Dict of the created ids: teacher_id, course_id, class_id and
+        student_ids
+    """
+    numbers = itertools.count(1)
+
+    def make(students=0):
+        prefix = f"school{next(numbers)}"
+        users = [{'email': f"{prefix}.teacher@example.edu", 'password': 'x', 'role': 'Teacher'}] + [
+            {'email': f"{prefix}.student{index}@example.edu", 'password': 'x', 'role': 'Student'}
+            for index in range(students)
+        ]
+        db.session.execute(insert(User), users)
+        user_ids = db.session.scalars(
+            select(User.id).where(User.email.like(f"{prefix}.%")).order_by(User.id)
+        ).all()
+        teacher = Teacher(user_id=user_ids[0], name=f"Teacher {prefix}")
+        db.session.add(teacher)
+        db.session.flush()
+        course = Course(name=f"Course {prefix}", teacher_id=teacher.id)
+        class_ = Class(name=f"Class {prefix}", teacher_id=teacher.id)
+        db.session.add_all([course, class_])
+        db.session.flush()
+        student_ids = []
+        if students:
+            db.session.execute(insert(Student), [
+                {'user_id': user_id, 'name': f"Student {index} {prefix}", 'enrollment_date': datetime.date(2024, 9, 1),
+                 'date_of_birth': datetime.date(2010, 1, 1), 'course_id': course.id}
+                for index, user_id in enumerate(user_ids[1:])
+            ])
+            student_ids = db.session.scalars(
+                select(Student.id).where(Student.user_id.in_(user_ids[1:])).order_by(Student.id)
+            ).all()
+            db.session.execute(insert(Enrollment), [
+                {'student_id': student_id, 'course_id': course.id, 'class_id': class_.id}
+                for student_id in student_ids
+            ])
+        db.session.commit()
+        return {'teacher_id': teacher.id, 'course_id': course.id, 'class_id': class_.id,
+                'student_ids': list(student_ids)}
+
+    return make
@@ -0,0 +1,37 @@
+import pytest
+from app import bcrypt
+from models import db, User
+
+
+@pytest.fixture
+def login(client):
+    def login_as(role):
+        email = f"{role.lower()}@example.edu"
+        db.session.add(User(email=email, password=bcrypt.generate_password_hash('secret123').decode('utf-8'),
+                            role=role))
+        db.session.commit()
+        response = client.post('/login', json={'email': email, 'password': 'secret123'})
+        assert response.status_code == 200
+        return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    return login_as
+
+
+def test_admin_can_read_slow_queries(client, login):
+    response = client.get('/admin/slow-queries', headers=login('Admin'))
+    assert response.status_code == 200
+    assert 'slow_queries' in response.get_json()
+
+
+@pytest.mark.parametrize('limit', ['0', '-3'])
+@pytest.mark.parametrize('source', ['buffer', 'log'])
+def test_slow_queries_reject_a_limit_below_one(client, login, limit, source):
+    response = client.get(f"/admin/slow-queries?limit={limit}&source={source}", headers=login('Admin'))
+    assert response.status_code == 400
+
+
+def test_slow_queries_are_forbidden_to_other_roles(client, login):
+    assert client.get('/admin/slow-queries', headers=login('Teacher')).status_code == 403
+
+
+def test_slow_queries_require_a_token(client):
+    assert client.get('/admin/slow-queries').status_code == 401
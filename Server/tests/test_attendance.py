@@ -0,0 +1,77 @@
+from models import db, Attendance
+
+
+def roster(school, date='2024-10-07', status='Present'):
+    return {'class_id': school['class_id'], 'date': date,
+            'records': [{'student_id': student_id, 'status': status} for student_id in school['student_ids']]}
+
+
+def test_bulk_roster_runs_a_fixed_number_of_queries(client, make_school, query_budget):
+    small, large = make_school(students=5), make_school(students=30)
+    with query_budget(20) as small_stats:
+        assert client.post('/attendances/bulk', json=roster(small)).status_code == 201
+    with query_budget(small_stats.count, max_repeats=1):
+        response = client.post('/attendances/bulk', json=roster(large))
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['created'] == 30
+    for result in body['results']:
+        assert db.session.get(Attendance, result['id']).student_id == result['student_id']
+
+
+def test_bulk_roster_posted_again_replaces_the_day(client, make_school):
+    school = make_school(students=3)
+    first = client.post('/attendances/bulk', json=roster(school)).get_json()
+    late = roster(school, status='Late')
+    late['records'][0]['status'] = 'Present'
+    response = client.post('/attendances/bulk', json=late)
+    assert response.status_code == 201
+    second = response.get_json()
+    assert (second['created'], second['updated']) == (0, 3)
+    assert [result['id'] for result in second['results']] == [result['id'] for result in first['results']]
+    assert db.session.query(Attendance).count() == 3
+
+    summaries = client.get(f"/attendances/summary?class_id={school['class_id']}").get_json()['summaries']
+    assert sorted((row['present'], row['absent'], row['late']) for row in summaries) == [
+        (0, 0, 1), (0, 0, 1), (1, 0, 0)]
+    # The bitmaps hold the same day as the summaries
+    daily = client.get(f"/attendances/daily?class_id={school['class_id']}&date_from=2024-10-07"
+                       "&date_to=2024-10-07").get_json()
+    assert daily['days'] == [{'date': '2024-10-07', 'present': 1, 'absent': 0, 'late': 2}]
+
+
+def test_bulk_roster_rejects_an_unknown_class(client, make_school):
+    school = make_school(students=1)
+    response = client.post('/attendances/bulk', json={**roster(school), 'class_id': 999})
+    assert response.status_code == 400
+    assert response.get_json()['details'] == {'class_id': ['Class does not exist.']}
+    assert db.session.query(Attendance).count() == 0
+
+
+def test_post_rejects_an_unknown_status(client, make_school):
+    school = make_school(students=1)
+    response = client.post('/attendances', json={'student_id': school['student_ids'][0],
+                                                 'class_id': school['class_id'], 'date': '2024-10-07',
+                                                 'status': 'Sick'})
+    assert response.status_code == 400
+    assert 'status' in response.get_json()['details']
+    assert db.session.query(Attendance).count() == 0
+
+
+def test_post_rejects_a_malformed_date(client, make_school):
+    school = make_school(students=1)
+    response = client.post('/attendances', json={'student_id': school['student_ids'][0], 'date': '07/10/2024',
+                                                 'status': 'Present'})
+    assert response.status_code == 400
+
+
+def test_put_rejects_an_unknown_status(client, make_school):
+    school = make_school(students=1)
+    created = client.post('/attendances', json={'student_id': school['student_ids'][0],
+                                                'class_id': school['class_id'], 'date': '2024-10-07',
+                                                'status': 'Present'}).get_json()
+    response = client.put(f"/attendances/{created['id']}", json={'status': 'Sick'})
+    assert response.status_code == 400
+    assert db.session.get(Attendance, created['id']).status == 'Present'
+    summary = client.get(f"/attendances/summary?student_id={school['student_ids'][0]}").get_json()
+    assert [(row['present'], row['absent'], row['late']) for row in summary['summaries']] == [(1, 0, 0)]
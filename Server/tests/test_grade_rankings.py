@@ -0,0 +1,119 @@
+import pytest
+from sqlalchemy import insert
+import utils.grading
+from models import db, Class, Grade
+
+
+def add_class(school, credits):
+    class_ = Class(name=f"Class worth {credits}", teacher_id=school['teacher_id'], credits=credits)
+    db.session.add(class_)
+    db.session.commit()
+    return class_.id
+
+
+def add_grades(school, rows):
+    """Insert ``(student index, grade, class_id, term)`` rows for the school's course."""
+    db.session.execute(insert(Grade), [
+        {'student_id': school['student_ids'][index], 'course_id': school['course_id'], 'grade': grade,
+         'class_id': class_id, 'term': term}
+        for index, grade, class_id, term in rows
+    ])
+    db.session.commit()
+
+
+def rankings(client, school, **params):
+    query = '&'.join(f"{name}={value}" for name, value in params.items())
+    response = client.get(f"/grades/rankings?cohort=course&cohort_id={school['course_id']}&{query}")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_ties_share_a_competition_rank_and_a_mid_rank_percentile(client, make_school):
+    school = make_school(students=4)
+    add_grades(school, [(0, 'B', None, None), (1, 'A', None, None), (2, 'C', None, None), (3, 'B', None, None)])
+    body = rankings(client, school)
+    ids = school['student_ids']
+    assert [(entry['student_id'], entry['rank'], entry['gpa'], entry['percentile'])
+            for entry in body['rankings']] == [
+        (ids[1], 1, 4.0, 87.5),
+        (ids[0], 2, 3.0, 50.0),
+        (ids[3], 2, 3.0, 50.0),
+        (ids[2], 4, 2.0, 12.5),
+    ]
+    assert (body['students'], body['median_gpa'], body['quartiles']) == (4, 3.0, [2.75, 3.25])
+
+
+def test_percentages_use_their_band_and_unknown_grades_are_left_out(client, make_school):
+    school = make_school(students=3)
+    add_grades(school, [(0, '91', None, None), (1, '87.5%', None, None), (1, 'b', None, 'T2'),
+                        (2, 'INC', None, None)])
+    body = rankings(client, school)
+    assert [(entry['gpa'], entry['grades']) for entry in body['rankings']] == [(3.7, 1), (3.15, 2)]
+    assert (body['students'], body['ungraded_grades']) == (2, 1)
+    response = client.get(f"/grades/rankings?cohort=course&cohort_id={school['course_id']}"
+                          f"&student_id={school['student_ids'][2]}")
+    assert response.status_code == 404
+
+
+def test_gpa_is_weighted_by_class_credits(client, make_school):
+    school = make_school(students=3)
+    double, none = add_class(school, 2.0), add_class(school, 0.0)
+    add_grades(school, [
+        (0, 'A', double, None), (0, 'C', school['class_id'], None),
+        # Only zero-credit classes: the plain mean
+        (1, 'A', none, None), (1, 'B', none, 'T2'),
+        # A class that no longer exists counts one credit
+        (2, 'A', double, None), (2, 'C', 999, None),
+    ])
+    entries = {entry['student_id']: entry for entry in rankings(client, school)['rankings']}
+    first, second, third = (entries[student_id] for student_id in school['student_ids'])
+    assert (first['gpa'], first['unweighted_gpa'], first['credits']) == (3.333, 3.0, 3.0)
+    assert (second['gpa'], second['unweighted_gpa'], second['credits']) == (3.5, 3.5, 0.0)
+    assert (third['gpa'], third['credits']) == (3.333, 3.0)
+
+
+def test_term_filters_the_grades_ranked(client, make_school):
+    school = make_school(students=2)
+    add_grades(school, [(0, 'A', None, 'T1'), (1, 'C', None, 'T1'), (0, 'C', None, 'T2'), (1, 'A', None, 'T2')])
+    ids = school['student_ids']
+    assert [entry['student_id'] for entry in rankings(client, school, term='T1')['rankings']] == [ids[0], ids[1]]
+    assert [entry['student_id'] for entry in rankings(client, school, term='T2')['rankings']] == [ids[1], ids[0]]
+    assert [entry['gpa'] for entry in rankings(client, school)['rankings']] == [3.0, 3.0]
+
+
+def test_grade_and_class_commits_invalidate_the_cached_ranking(app, client, make_school, monkeypatch):
+    school = make_school(students=2)
+    add_grades(school, [(0, 'A', None, None), (1, 'B', None, None)])
+    loads = []
+    load_cohort = utils.grading.load_cohort
+    monkeypatch.setattr(utils.grading, 'load_cohort', lambda *args: loads.append(args) or load_cohort(*args))
+
+    assert rankings(client, school)['rankings'][0]['student_id'] == school['student_ids'][0]
+    # Skip the response cache so the request reaches the ranking cache
+    app.extensions['response_cache'].clear()
+    rankings(client, school)
+    assert len(loads) == 1
+
+    grade = Grade.query.filter_by(student_id=school['student_ids'][1]).one()
+    assert client.put(f"/grades/{grade.id}", json={'grade': 'A+'}).status_code == 200
+    app.extensions['response_cache'].clear()
+    body = rankings(client, school)
+    assert len(loads) == 2
+    assert [entry['rank'] for entry in body['rankings']] == [1, 1]
+
+    # Credits live on classes, so a class commit invalidates it too
+    db.session.get(Class, school['class_id']).credits = 2.0
+    db.session.commit()
+    app.extensions['response_cache'].clear()
+    rankings(client, school)
+    assert len(loads) == 3
+
+
+@pytest.mark.parametrize('query, message', [
+    ('cohort=school', "cohort must be one of: all, course, class"),
+    ('cohort=class', "cohort_id is required for a class cohort"),
+])
+def test_invalid_cohorts_are_rejected(client, query, message):
+    response = client.get(f"/grades/rankings?{query}")
+    assert response.status_code == 400
+    assert response.get_json()['message'] == message
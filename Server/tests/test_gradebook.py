@@ -0,0 +1,57 @@
+import io
+from models import db, Grade
+
+
+def upload(client, text, encoding='utf-8'):
+    return client.post('/grades/import', data={'file': (io.BytesIO(text.encode(encoding)), 'grades.csv')},
+                       content_type='multipart/form-data')
+
+
+def test_import_inserts_then_updates(client, make_school):
+    school = make_school(students=2)
+    sheet = "student_id,course_id,grade,term\n" + "".join(
+        f"{student_id},{school['course_id']},B,2024-T1\n" for student_id in school['student_ids'])
+    assert upload(client, sheet).get_json() == {'rows': 2, 'inserted': 2, 'updated': 0}
+    assert upload(client, sheet.replace(',B,', ',A,')).get_json() == {'rows': 2, 'inserted': 0, 'updated': 2}
+    assert {grade.grade for grade in Grade.query} == {'A'}
+
+
+def test_import_rejects_a_file_that_is_not_utf8(client, make_school):
+    school = make_school(students=1)
+    sheet = f"student_id,course_id,grade,term\n{school['student_ids'][0]},{school['course_id']},A,Été\n"
+    response = upload(client, sheet, encoding='latin-1')
+    assert response.status_code == 400
+    assert response.get_json()['details'][0]['errors'] == {'file': ['The file is not UTF-8 encoded text.']}
+
+
+def test_import_reports_unknown_students_courses_and_classes(client, make_school):
+    school = make_school(students=1)
+    student_id, course_id = school['student_ids'][0], school['course_id']
+    sheet = ("student_id,course_id,class_id,grade\n"
+             f"{student_id},{course_id},,A\n"
+             f"999,{course_id},,A\n"
+             f"{student_id},999,998,A\n")
+    response = upload(client, sheet)
+    assert response.status_code == 400
+    assert response.get_json()['details'] == [
+        {'line': 3, 'errors': {'student_id': ['Student does not exist.']}},
+        {'line': 4, 'errors': {'course_id': ['Course does not exist.'], 'class_id': ['Class does not exist.']}},
+    ]
+    assert db.session.query(Grade).count() == 0
+
+
+def test_import_upserts_grades_without_a_class_or_term(client, make_school):
+    school = make_school(students=1)
+    sheet = f"student_id,course_id,grade\n{school['student_ids'][0]},{school['course_id']},B\n"
+    assert upload(client, sheet).get_json() == {'rows': 1, 'inserted': 1, 'updated': 0}
+    assert upload(client, sheet.replace(',B', ',A')).get_json() == {'rows': 1, 'inserted': 0, 'updated': 1}
+    assert [grade.grade for grade in Grade.query] == ['A']
+
+
+def test_a_second_grade_for_the_same_key_is_rejected(client, make_school):
+    school = make_school(students=1)
+    grade = {'student_id': school['student_ids'][0], 'course_id': school['course_id'], 'grade': 'B'}
+    assert client.post('/grades', json=grade).status_code == 201
+    assert client.post('/grades', json={**grade, 'grade': 'C'}).status_code == 400
+    assert client.post('/grades', json={**grade, 'term': '2024-T1'}).status_code == 201
+    assert db.session.query(Grade).count() == 2
@@ -0,0 +1,103 @@
+import datetime
+import io
+import pytest
+from PIL import Image
+from models import db, ImageAsset
+from utils.image_pipeline import process_images, queue_image
+from utils.outbox import claim_batch
+from utils.storage import LocalStorage
+
+
+def png(color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def upload(client, data):
+    return client.post('/upload', data={'file': (io.BytesIO(data), 'photo.png', 'image/png')},
+                       content_type='multipart/form-data')
+
+
+class BrokenStorage:
+    def save(self, key, data, extension):
+        raise OSError("storage is down")
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path), '/media')
+
+
+def test_upload_reuses_the_asset_of_identical_bytes(client):
+    first = upload(client, png())
+    again = upload(client, png())
+    assert (first.status_code, again.status_code) == (202, 202)
+    assert first.get_json()['message'] == "Image accepted for processing"
+    assert again.get_json()['message'] == "Image is already being processed"
+    assert again.get_json()['image']['id'] == first.get_json()['image']['id']
+    assert db.session.query(ImageAsset).count() == 1
+
+
+def test_upload_of_a_processed_image_returns_it(app, client, storage):
+    upload(client, png())
+    assert process_images(storage, app.config) == 1
+    response = upload(client, png())
+    assert response.status_code == 200
+    assert set(response.get_json()['image']['urls']) == {'thumb', 'small', 'medium', 'large'}
+
+
+def test_upload_queues_a_failed_image_again(app, client, storage):
+    asset_id = upload(client, png()).get_json()['image']['id']
+    asset = db.session.get(ImageAsset, asset_id)
+    asset.status, asset.attempts, asset.last_error, asset.data = 'Failed', 5, "storage is down", None
+    db.session.commit()
+
+    response = upload(client, png())
+    assert response.status_code == 202
+    assert response.get_json()['message'] == "Image accepted for processing"
+    db.session.refresh(asset)
+    assert (asset.status, asset.attempts, asset.last_error, asset.data) == ('Pending', 0, None, png())
+    assert process_images(storage, app.config) == 1
+    assert db.session.get(ImageAsset, asset_id).status == 'Done'
+
+
+def test_unreadable_image_fails_without_retrying(app, storage):
+    asset, queued = queue_image(b'not an image')
+    assert queued
+    assert process_images(storage, app.config) == 0
+    assert (asset.status, asset.attempts, asset.data) == ('Failed', 1, None)
+    assert asset.last_error.startswith("Unreadable image")
+
+
+def test_claimed_images_are_leased_to_one_worker(app):
+    queue_image(png('red'))
+    queue_image(png('blue'))
+    claimed = claim_batch(10, 60, model=ImageAsset)
+    assert len(claimed) == 2
+    assert len({asset.claim_token for asset in claimed}) == 1
+    assert claim_batch(10, 60, model=ImageAsset) == []
+
+    # A worker that died leaves its lease behind; it becomes claimable once expired
+    claimed[0].locked_until = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+    db.session.commit()
+    assert [asset.id for asset in claim_batch(10, 60, model=ImageAsset)] == [claimed[0].id]
+
+
+def test_storage_errors_back_off_then_fail(app):
+    asset, _ = queue_image(png())
+    before = datetime.datetime.utcnow()
+    assert process_images(BrokenStorage(), app.config) == 0
+    assert (asset.status, asset.attempts, asset.last_error) == ('Pending', 1, "storage is down")
+    assert asset.claim_token is None and asset.locked_until is None
+    delay = (asset.next_attempt_at - before).total_seconds()
+    assert app.config['IMAGE_BACKOFF_SECONDS'] <= delay < app.config['IMAGE_BACKOFF_SECONDS'] + 5
+    # Not due yet, so nothing is claimed
+    assert process_images(BrokenStorage(), app.config) == 0
+    assert asset.attempts == 1
+
+    asset.attempts = app.config['IMAGE_MAX_ATTEMPTS'] - 1
+    asset.next_attempt_at = before
+    db.session.commit()
+    process_images(BrokenStorage(), app.config)
+    assert (asset.status, asset.attempts) == ('Failed', app.config['IMAGE_MAX_ATTEMPTS'])
@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from utils.metrics import MetricsStore, MmapedValues, render_metrics
+
+REQUESTS = json.dumps(['http_requests_total', '', {'endpoint': 'students', 'method': 'GET', 'status': '200'}],
+                      sort_keys=True)
+
+
+@pytest.fixture
+def processes():
+    """Start a process that stays alive, or one that has already exited, and return its pid."""
+    started = []
+
+    def start(alive=True):
+        process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)' if alive else ''])
+        started.append(process)
+        if not alive:
+            process.wait()
+        return process.pid
+
+    yield start
+    for process in started:
+        process.kill()
+        process.wait()
+
+
+def write(store, master, pid, requests):
+    values = MmapedValues(store._path(master, pid))
+    values.inc(REQUESTS, requests)
+    values.close()
+
+
+def requests_total(store):
+    return sum(value for _, _, value in store.collect()['http_requests_total'])
+
+
+def files(store):
+    return sorted(name for name in os.listdir(store.directory) if name.endswith('.db'))
+
+
+def test_values_of_every_worker_are_summed(tmp_path, processes):
+    store = MetricsStore(str(tmp_path))
+    master = os.getpid()
+    write(store, master, processes(), 2)
+    write(store, master, processes(), 3)
+    store.inc('http_requests_total', {'endpoint': 'students', 'method': 'GET', 'status': '200'})
+    assert requests_total(store) == 6
+    assert 'http_requests_total{endpoint="students",method="GET",status="200"} 6' in render_metrics(store)
+
+
+def test_exited_workers_are_folded_into_the_archive(tmp_path, processes):
+    store = MetricsStore(str(tmp_path))
+    master, live, dead = os.getpid(), processes(), processes(alive=False)
+    write(store, master, live, 2)
+    write(store, master, dead, 3)
+    write(store, master, 'archive', 4)
+    store.cleanup()
+    assert files(store) == sorted([f'metrics_{master}_{live}.db', f'metrics_{master}_archive.db'])
+    assert requests_total(store) == 9
+
+
+def test_files_of_a_stopped_server_are_removed(tmp_path, processes):
+    store = MetricsStore(str(tmp_path))
+    old_master = processes(alive=False)
+    write(store, old_master, processes(), 5)
+    write(store, old_master, 'archive', 7)
+    store.inc('http_requests_total', {'endpoint': 'students', 'method': 'GET', 'status': '200'})
+    assert files(store) == [f'metrics_{os.getppid()}_{os.getpid()}.db']
+    assert requests_total(store) == 1
+
+
+def test_a_worker_archives_its_own_file_at_exit(tmp_path):
+    store = MetricsStore(str(tmp_path))
+    store.inc('http_requests_total', {'endpoint': 'students', 'method': 'GET', 'status': '200'}, 3)
+    store.close()
+    assert files(store) == [f'metrics_{os.getppid()}_archive.db']
+    assert requests_total(store) == 3
@@ -0,0 +1,109 @@
+import datetime
+import time
+from models import db, EmailOutbox
+from utils.email import MemoryTransport, queue_email
+from utils.outbox import OutboxWorkerPool, claim_batch, process_outbox
+
+
+class FlakyTransport(MemoryTransport):
+    """Fail the first ``failures`` sends, then deliver."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def send(self, message):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("relay unavailable")
+        super().send(message)
+
+
+def queue(count=1):
+    messages = [queue_email(f"user{index}@example.edu", "Welcome", "<p>Hello</p>") for index in range(count)]
+    db.session.commit()
+    return messages
+
+
+def test_signup_email_is_delivered_by_the_worker(app, client):
+    response = client.post('/users', json={'email': 'new@example.edu', 'password': 'secret123', 'role': 'Student'})
+    assert response.status_code == 201
+    transport = MemoryTransport()
+    assert process_outbox(transport, app.config) == 1
+    assert [message['to_email'] for message in transport.outbox] == ['new@example.edu']
+    message = EmailOutbox.query.one()
+    assert (message.status, message.attempts, message.claim_token) == ('Sent', 1, None)
+    assert message.from_email == app.config['DEFAULT_FROM_EMAIL']
+    # Nothing is sent twice
+    assert process_outbox(transport, app.config) == 0
+
+
+def test_rolled_back_email_is_never_sent(app):
+    queue_email('gone@example.edu', "Welcome", "<p>Hello</p>")
+    db.session.rollback()
+    assert process_outbox(MemoryTransport(), app.config) == 0
+
+
+def test_claims_do_not_overlap_until_the_lease_expires(app):
+    queue(3)
+    first = claim_batch(2, 60)
+    second = claim_batch(2, 60)
+    assert len(first) == 2 and len(second) == 1
+    assert first[0].claim_token != second[0].claim_token
+    assert claim_batch(2, 60) == []
+
+    # The worker holding the first batch died; its lease runs out
+    for message in first:
+        message.locked_until = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+    db.session.commit()
+    assert sorted(message.id for message in claim_batch(5, 60)) == sorted(message.id for message in first)
+
+
+def test_failed_sends_back_off_exponentially(app):
+    message, = queue()
+    transport = FlakyTransport(failures=2)
+    base = app.config['EMAIL_OUTBOX_BACKOFF_SECONDS']
+    for attempt in (1, 2):
+        before = datetime.datetime.utcnow()
+        assert process_outbox(transport, app.config) == 0
+        assert (message.status, message.attempts, message.last_error) == ('Pending', attempt, "relay unavailable")
+        assert message.claim_token is None and message.locked_until is None
+        delay = (message.next_attempt_at - before).total_seconds()
+        assert base * 2 ** (attempt - 1) <= delay < base * 2 ** (attempt - 1) + 5
+        # Not due yet
+        assert claim_batch(10, 60) == []
+        message.next_attempt_at = before
+        db.session.commit()
+
+    assert process_outbox(transport, app.config) == 1
+    assert (message.status, message.attempts) == ('Sent', 3)
+    assert len(transport.outbox) == 1
+
+
+def test_sending_stops_after_the_last_attempt(app):
+    message, = queue()
+    message.attempts = app.config['EMAIL_OUTBOX_MAX_ATTEMPTS'] - 1
+    db.session.commit()
+    assert process_outbox(FlakyTransport(failures=1), app.config) == 0
+    assert (message.status, message.attempts) == ('Failed', app.config['EMAIL_OUTBOX_MAX_ATTEMPTS'])
+    # A Failed message is never claimed again
+    message.next_attempt_at = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    db.session.commit()
+    assert claim_batch(10, 60) == []
+
+
+def test_worker_pool_delivers_in_the_background(app):
+    queue(5)
+    transport = MemoryTransport()
+    pool = OutboxWorkerPool(app, lambda: transport, threads=2)
+    pool.start()
+    try:
+        deadline = time.monotonic() + 10
+        while len(transport.outbox) < 5 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool.stop(timeout=10)
+    assert sorted(message['to_email'] for message in transport.outbox) == [
+        f"user{index}@example.edu" for index in range(5)]
+    db.session.expire_all()
+    assert {message.status for message in EmailOutbox.query} == {'Sent'}
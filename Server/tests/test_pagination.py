@@ -0,0 +1,19 @@
+def test_list_endpoints_page_with_a_next_link(client, make_school):
+    school = make_school(students=5)
+    first = client.get('/students?limit=3').get_json()
+    assert first['count'] == 3
+    second = client.get(first['next']).get_json()
+    assert [row['id'] for row in first['students'] + second['students']] == school['student_ids']
+    assert second['next'] is None
+
+
+def test_profiles_stays_a_list_with_the_cursor_in_a_link_header(client, make_school):
+    school = make_school(students=5)
+    response = client.get('/profiles?limit=3')
+    assert [row['id'] for row in response.get_json()] == school['student_ids'][:3]
+    link, rel = response.headers['Link'].split('; ')
+    assert rel == 'rel="next"'
+
+    last = client.get(link.strip('<>'))
+    assert [row['id'] for row in last.get_json()] == school['student_ids'][3:]
+    assert 'Link' not in last.headers
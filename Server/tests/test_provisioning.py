@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import select
+import utils.provisioning
+from models import db, SearchDocument, Student, Teacher, User
+from utils.provisioning import ProvisioningError, provision_users
+from utils.search import search
+
+
+def records(course_id, count, prefix='user'):
+    return [
+        {'email': f"{prefix}{index}@example.edu", 'password': 'secret123', 'role': 'Student',
+         'name': f"Pupil {index}", 'enrollment_date': '2024-09-01', 'date_of_birth': '2010-01-01',
+         'course_id': course_id}
+        if index % 5 else
+        {'email': f"{prefix}{index}@example.edu", 'password': 'secret123', 'role': 'Teacher', 'name': f"Tutor {index}"}
+        for index in range(count)
+    ]
+
+
+def test_provisioning_links_students_and_teachers_to_their_users(app, make_school):
+    school = make_school()
+    summary = provision_users(records(school['course_id'], 10), app.config, processes=1)
+    assert summary['created'] == 10
+    for user in User.query.filter(User.email.like('user%')):
+        profile = user.student if user.role == 'Student' else user.teacher
+        assert profile.name.split()[1] == user.email[len('user'):].split('@')[0]
+
+
+def test_provisioning_batch_does_not_insert_row_by_row(app, make_school, query_budget):
+    school = make_school()
+    small, large = records(school['course_id'], 5, 'small'), records(school['course_id'], 50, 'large')
+    with query_budget(30) as small_stats:
+        provision_users(small, app.config, processes=1, batch_size=100)
+    with query_budget(small_stats.count, max_repeats=2):
+        summary = provision_users(large, app.config, processes=1, batch_size=100)
+    assert summary['created'] == 50
+    assert Student.query.count() == 4 + 40 and Teacher.query.count() == 1 + 1 + 10
+
+
+def test_provisioning_indexes_only_the_new_people(app, make_school):
+    school = make_school(students=2)
+    provision_users(records(school['course_id'], 1, 'first'), app.config, processes=1)
+    before = dict(db.session.execute(select(SearchDocument.record_id, SearchDocument.id)
+                                     .where(SearchDocument.kind == 'teacher')).all())
+    provision_users(records(school['course_id'], 6, 'second'), app.config, processes=1)
+    after = dict(db.session.execute(select(SearchDocument.record_id, SearchDocument.id)
+                                    .where(SearchDocument.kind == 'teacher')).all())
+    # Documents of existing teachers were left alone rather than rebuilt
+    assert {record_id: after[record_id] for record_id in before} == before
+    assert len(after) == len(before) + 2
+    assert 'Pupil 4' in [result['title'] for result in search('Pupil 4', ['student'], 10)]
+
+
+def test_unknown_courses_are_reported_before_anything_is_inserted(app, make_school):
+    school = make_school()
+    rows = records(school['course_id'], 3)
+    rows[1]['course_id'] = 999
+    summary = provision_users(rows, app.config, processes=1)
+    assert summary['created'] == 2
+    assert summary['errors'] == [
+        {'index': 1, 'email': 'user1@example.edu', 'errors': {'course_id': ['Course does not exist.']}}]
+    assert User.query.filter_by(email='user1@example.edu').first() is None
+
+
+def test_a_failed_run_reports_its_progress_and_can_be_resumed(app, make_school, monkeypatch):
+    school = make_school()
+    rows = records(school['course_id'], 6)
+    insert_batch = utils.provisioning._insert_batch
+    calls = []
+
+    def fail_second_batch(batch):
+        calls.append(batch)
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        insert_batch(batch)
+
+    monkeypatch.setattr(utils.provisioning, '_insert_batch', fail_second_batch)
+    with pytest.raises(ProvisioningError) as error:
+        provision_users(rows, app.config, processes=1, batch_size=2)
+    assert error.value.created == 2
+    assert User.query.filter(User.email.like('user%')).count() == 2
+
+    monkeypatch.setattr(utils.provisioning, '_insert_batch', insert_batch)
+    summary = provision_users(rows, app.config, processes=1, batch_size=2)
+    assert (summary['created'], summary['failed']) == (4, 2)
+    assert {error['errors']['email'][0] for error in summary['errors']} == {'User already exists.'}
+    assert User.query.filter(User.email.like('user%')).count() == 6
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import select
+from models import db, Student
+from utils.query_counter import RepeatedQueryError, count_queries, statement_shape
+
+
+def test_in_lists_of_any_length_share_a_shape():
+    two, three = "SELECT * FROM t WHERE id IN (?, ?)", "SELECT * FROM t WHERE id IN (?, ?, ?)"
+    assert statement_shape(two) == statement_shape(three)
+
+
+def test_count_queries_records_statements(app, make_school):
+    school = make_school(students=3)
+    with count_queries() as stats:
+        for student_id in school['student_ids']:
+            db.session.get(Student, student_id)
+    assert stats.count == 3
+    assert stats.repeated(2)
+
+
+def test_query_budget_passes_within_budget(client, make_school, query_budget):
+    school = make_school(students=3)
+    with query_budget(10, max_repeats=1) as stats:
+        response = client.get(f"/students/{school['student_ids'][0]}/dashboard")
+    assert response.status_code == 200
+    assert f'"{stats.count} queries"' in response.headers['Server-Timing']
+
+
+def test_query_budget_fails_over_budget(app, make_school, query_budget):
+    school = make_school(students=3)
+    with pytest.raises(AssertionError, match="Expected at most 1 queries"):
+        with query_budget(1):
+            for student_id in school['student_ids']:
+                db.session.get(Student, student_id)
+
+
+def test_repeated_statements_in_a_request_raise(app, make_school):
+    school = make_school(students=app.config['QUERY_REPEAT_THRESHOLD'] + 1)
+    with app.test_request_context('/students'):
+        app.preprocess_request()
+        for student_id in school['student_ids']:
+            db.session.scalar(select(Student.name).where(Student.id == student_id))
+        with pytest.raises(RepeatedQueryError):
+            app.process_response(app.response_class())
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import insert
+from models import db, Grade
+from utils.query_counter import count_queries
+
+
+def grade_every_student(school):
+    db.session.execute(insert(Grade), [
+        {'student_id': student_id, 'course_id': school['course_id'], 'class_id': school['class_id'], 'grade': 'B',
+         'term': f"T{index}"}
+        for index, student_id in enumerate(school['student_ids'])
+    ])
+    db.session.commit()
+
+
+def teacher_roster(school):
+    return f"/teachers/{school['teacher_id']}/roster"
+
+
+def first_student_dashboard(school):
+    # Every grade of the school goes to the first student, so the dashboard grows with N too
+    db.session.query(Grade).filter(Grade.student_id.in_(school['student_ids'])).update(
+        {'student_id': school['student_ids'][0]})
+    db.session.commit()
+    return f"/students/{school['student_ids'][0]}/dashboard"
+
+
+def listing(path):
+    return lambda school: f"{path}?limit=100"
+
+
+@pytest.mark.parametrize('url_for_school', [
+    teacher_roster, first_student_dashboard,
+    listing('/students'), listing('/enrollments'), listing('/grades'),
+], ids=['roster', 'dashboard', 'students', 'enrollments', 'grades'])
+def test_query_count_does_not_grow_with_rows(app, make_school, url_for_school):
+    query_counts = []
+    for size in (5, 50):
+        school = make_school(students=size)
+        grade_every_student(school)
+        url = url_for_school(school)
+        app.extensions['response_cache'].clear()
+        with count_queries() as stats:
+            response = app.test_client().get(url)
+        assert response.status_code == 200
+        query_counts.append(stats.count)
+    assert query_counts[0] == query_counts[1], f"{query_counts[0]} queries at N=5, {query_counts[1]} at N=50"
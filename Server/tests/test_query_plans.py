@@ -0,0 +1,18 @@
+import pytest
+from models import db
+from utils.query_plans import HOT_QUERIES, explain, find_table_scans, uses_index
+
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_hot_query_uses_its_index(app, name):
+    indexes, build = HOT_QUERIES[name]
+    connection = db.session.connection()
+    plan = explain(build(), connection)
+    assert uses_index(plan, indexes), f"{name} is not planned through {' or '.join(indexes)}: {plan}"
+    assert not find_table_scans(plan, connection.dialect.name)
+
+
+def test_uses_index_does_not_match_a_longer_index_name():
+    plan = ['SEARCH grades USING INDEX ix_grades_student_id_course_id (student_id=?)']
+    assert uses_index(plan, ('ix_grades_student_id_course_id',))
+    assert not uses_index(plan, ('ix_grades_student_id',))
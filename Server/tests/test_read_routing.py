@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine, event, insert, select, text, update
+from models import db, Student, User, REPLICA_BIND_PREFIX
+
+REPLICA = f'{REPLICA_BIND_PREFIX}0'
+
+
+@pytest.fixture
+def replica(app, tmp_path):
+    """A replica bind on its own SQLite file, recording the statements it runs."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    db.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    db.engines[REPLICA] = engine
+    db.session.remove()
+    try:
+        yield statements
+    finally:
+        db.session.remove()
+        del db.engines[REPLICA]
+        db.metadata.drop_all(engine)
+        engine.dispose()
+
+
+def routed(app, statement, method='GET'):
+    with app.test_request_context('/students', method=method):
+        try:
+            return db.session.get_bind(clause=statement) is db.engines[REPLICA]
+        finally:
+            db.session.remove()
+
+
+@pytest.mark.parametrize('statement', [
+    select(Student),
+    select(Student.id).union(select(User.id)),
+    text("SELECT id FROM students").columns(),
+], ids=['select', 'union', 'textual select'])
+def test_reads_during_get_go_to_the_replica(app, replica, statement):
+    assert routed(app, statement)
+
+
+@pytest.mark.parametrize('statement', [
+    insert(User),
+    update(User).values(role='Admin'),
+    select(Student).with_for_update(),
+    text("SELECT id FROM students"),
+    text("UPDATE users SET role = 'Admin'"),
+], ids=['insert', 'update', 'for update', 'text select', 'text update'])
+def test_writes_and_text_statements_go_to_the_primary(app, replica, statement):
+    assert not routed(app, statement)
+
+
+def test_other_methods_and_work_outside_requests_use_the_primary(app, replica):
+    assert not routed(app, select(Student), method='POST')
+    assert db.session.get_bind(clause=select(Student)) is db.engines[None]
+
+
+def test_a_text_write_during_get_keeps_the_request_on_the_primary(app, replica):
+    with app.test_request_context('/students'):
+        assert db.session.execute(select(Student.id)).all() == []
+        assert len(replica) == 1
+        db.session.execute(text("INSERT INTO users (email, password, role) VALUES ('a@example.edu', 'x', 'Student')"))
+        # The replica has not seen the write; reading from it would lose the row
+        assert db.session.scalar(select(User.email)) == 'a@example.edu'
+        assert len(replica) == 1
+        db.session.rollback()
+
+
+def test_reads_after_a_flush_go_to_the_primary(app, replica):
+    with app.test_request_context('/students'):
+        db.session.add(User(email='b@example.edu', password='x', role='Student'))
+        db.session.flush()
+        assert db.session.get_bind(clause=select(User)) is db.engines[None]
+        assert db.session.scalar(select(User.email)) == 'b@example.edu'
+        assert replica == []
+        db.session.rollback()
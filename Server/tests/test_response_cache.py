@@ -0,0 +1,43 @@
+from sqlalchemy import event
+from models import db, Teacher
+from utils.response_cache import table_versions
+
+
+def test_commit_bumps_versions_outside_the_write_transaction(client, make_school):
+    school = make_school()
+    first = client.get('/teachers')
+    assert client.get('/teachers', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    statements = []
+    engine = db.engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append('BUMP' if 'table_versions' in statement and 'INSERT' in statement else statement)
+
+    def record_commit(conn):
+        statements.append('COMMIT')
+
+    event.listen(engine, 'before_cursor_execute', record)
+    event.listen(engine, 'commit', record_commit)
+    try:
+        before = table_versions(('teachers',))
+        assert client.put(f"/teachers/{school['teacher_id']}", json={'name': 'Renamed'}).status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+        event.remove(engine, 'commit', record_commit)
+
+    assert table_versions(('teachers',)) == (before[0] + 1,)
+    # The UPDATE of the teacher commits before the table_versions upsert begins
+    assert statements.index('COMMIT') < statements.index('BUMP')
+    second = client.get('/teachers', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200 and second.get_json()['teachers'][0]['name'] == 'Renamed'
+
+
+def test_rolled_back_writes_do_not_bump_versions(app, make_school):
+    school = make_school()
+    before = table_versions(('teachers',))
+    db.session.get(Teacher, school['teacher_id']).name = 'Discarded'
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+    assert table_versions(('teachers',)) == before
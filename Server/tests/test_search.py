@@ -0,0 +1,28 @@
+import pytest
+from models import db, Course
+from utils.search import _prefix_upper_bound
+
+
+@pytest.mark.parametrize('prefix, upper', [
+    ('jo', 'jp'),
+    ('a\U0010ffff', 'b'),
+    ('\U0010ffff\U0010ffff', None),
+    ('x\ud7ff', 'x\ue000'),
+])
+def test_prefix_upper_bound(prefix, upper):
+    assert _prefix_upper_bound(prefix) == upper
+
+
+def test_prefix_search_matches_titles_starting_with_the_query(client, make_school):
+    make_school()
+    db.session.add_all([Course(name=name, teacher_id=1) for name in ('Algebra', 'Algorithms', 'Biology')])
+    db.session.commit()
+    response = client.get('/search?q=alg&types=course')
+    assert [result['title'] for result in response.get_json()['results']] == ['Algebra', 'Algorithms']
+    assert {result['match'] for result in response.get_json()['results']} == {'prefix'}
+
+
+@pytest.mark.parametrize('query', ['a\U0010ffff', '\U0010ffff\U0010ffff', 'x\ud7ff'])
+def test_search_handles_the_last_code_points(client, make_school, query):
+    make_school()
+    assert client.get('/search', query_string={'q': query}).status_code == 200
@@ -0,0 +1,69 @@
+import os
+from logging.handlers import WatchedFileHandler
+from types import SimpleNamespace
+from sqlalchemy import text
+from models import db
+from utils.slow_queries import SlowQueryRecorder, logger, read_log
+
+
+class FakeCursor:
+    """DBAPI cursor stand-in that fails EXPLAIN the way Postgres does."""
+
+    def __init__(self, executed):
+        self.executed = executed
+        self.connection = self
+
+    def cursor(self):
+        return self
+
+    def execute(self, statement, parameters=None):
+        self.executed.append(statement)
+        if statement.startswith('EXPLAIN'):
+            raise RuntimeError('syntax error')
+
+    def close(self):
+        pass
+
+
+def test_failed_explain_is_rolled_back_to_a_savepoint():
+    executed = []
+    conn = SimpleNamespace(dialect=SimpleNamespace(name='postgresql'))
+    plan, scans = SlowQueryRecorder(1, 10)._plan(conn, FakeCursor(executed), 'SELECT 1', {})
+    assert plan == ['EXPLAIN failed: syntax error'] and scans is None
+    assert executed == ['SAVEPOINT slow_query_explain', 'EXPLAIN SELECT 1',
+                        'ROLLBACK TO SAVEPOINT slow_query_explain', 'RELEASE SAVEPOINT slow_query_explain']
+
+
+def test_slow_sqlite_statement_is_recorded_with_its_plan(app, make_school):
+    make_school(students=1)
+    recorder = SlowQueryRecorder(0, 10)
+    connection = db.session.connection()
+    cursor = connection.connection.cursor()
+    statement = 'SELECT * FROM students WHERE course_id = ?'
+    with app.test_request_context('/students'):
+        recorder.record(connection, cursor, statement, (1,), False, 0.5)
+    entry = recorder.recent(1)[0]
+    assert entry['parameters'] == ['int']
+    assert any('ix_students_course_id' in line for line in entry['plan'])
+    # The caller's transaction is still usable
+    assert db.session.execute(text('SELECT count(*) FROM students')).scalar() == 1
+
+
+def test_shared_log_is_reopened_after_external_rotation(app):
+    path = app.config['SLOW_QUERY_LOG_FILE']
+    recorder = SlowQueryRecorder(0, 10, explain=False)
+    recorder.record(None, None, 'SELECT 1', (), False, 0.5)
+    os.replace(path, path + '.1')
+    recorder.record(None, None, 'SELECT 2', (), False, 0.5)
+    assert [entry['statement'] for entry in read_log(path, 10)] == ['SELECT 2']
+    assert isinstance(logger.handlers[0], WatchedFileHandler)
+
+
+def test_non_positive_limits_return_nothing(app):
+    path = app.config['SLOW_QUERY_LOG_FILE']
+    recorder = SlowQueryRecorder(0, 10, explain=False)
+    for statement in ('SELECT 1', 'SELECT 2'):
+        recorder.record(None, None, statement, (), False, 0.5)
+    for limit in (0, -1):
+        assert recorder.recent(limit) == [] and read_log(path, limit) == []
+    assert [entry['statement'] for entry in recorder.recent(1)] == ['SELECT 2']
@@ -0,0 +1,319 @@
+import datetime
+from bisect import bisect_right
+from collections import defaultdict
+from functools import lru_cache
+import numpy as np
+from flask import current_app
+from sqlalchemy import String, delete, func, insert, select, type_coerce
+from models import db, Attendance, AttendanceBitmap
+from utils.sql import dialect_insert
+
+STATUS_CODES = {'Present': 1, 'Absent': 2, 'Late': 3}
+STATUS_COLUMNS = {1: 'present', 2: 'absent', 3: 'late'}
+ABSENT = STATUS_CODES['Absent']
+# Bit offsets of the four days packed into each byte
+SHIFTS = np.array([0, 2, 4, 6], dtype=np.uint8)
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=None)
+def parse_term_starts(value):
+    """
+    Parse ``'09-01,01-01,04-01'`` into sorted ``(month, day)`` pairs.
+
+    Each pair is the first day of a term; a term runs until the next start,
+    so the terms tile the calendar with no gaps.
+    """
+    starts = set()
+    for item in value.split(','):
+        if item.strip():
+            month, day = (int(part) for part in item.strip().split('-'))
+            datetime.date(2001, month, day)
+            starts.add((month, day))
+    if not starts:
+        raise ValueError("At least one term start is required")
+    return tuple(sorted(starts))
+
+
+def _term_starts():
+    return parse_term_starts(current_app.config['ATTENDANCE_TERM_STARTS'])
+
+
+def _boundaries(first_year, last_year, starts):
+    return [datetime.date(year, month, day) for year in range(first_year, last_year + 1) for month, day in starts]
+
+
+def term_bounds(day, starts=None):
+    """First day of the term containing ``day`` and first day of the next term."""
+    bounds = _boundaries(day.year - 1, day.year + 1, starts or _term_starts())
+    index = bisect_right(bounds, day) - 1
+    return bounds[index], bounds[index + 1]
+
+
+def terms_between(date_from, date_to, starts=None):
+    """Start dates of the terms overlapping ``date_from``..``date_to``, inclusive."""
+    bounds = _boundaries(date_from.year - 1, date_to.year + 1, starts or _term_starts())
+    return [start for start, end in zip(bounds, bounds[1:]) if start <= date_to and end > date_from]
+
+
+def pack(codes):
+    """Pack 2-bit day codes (one uint8 per day, last axis) four to a byte."""
+    codes = np.asarray(codes, dtype=np.uint8)
+    padding = -codes.shape[-1] % 4
+    if padding:
+        codes = np.concatenate([codes, np.zeros(codes.shape[:-1] + (padding,), np.uint8)], axis=-1)
+    quads = codes.reshape(codes.shape[:-1] + (-1, 4)) << SHIFTS
+    return np.bitwise_or.reduce(quads, axis=-1)
+
+
+def unpack(packed):
+    """Inverse of pack: one uint8 code per day along the last axis."""
+    packed = np.asarray(packed, dtype=np.uint8)
+    return ((packed[..., None] >> SHIFTS) & 3).reshape(packed.shape[:-1] + (-1,))
+
+
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    return value
+
+
+def _day_key(record):
+    get = record.get if isinstance(record, dict) else lambda name: getattr(record, name)
+    return (get('student_id'), get('class_id') or 0, _as_date(get('date'))), get('status')
+
+
+def _upsert():
+    stmt = dialect_insert(AttendanceBitmap)
+    table = AttendanceBitmap.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.student_id, table.c.class_id, table.c.term_start],
+        set_={'days': stmt.excluded.days},
+    )
+
+
+def apply_bitmap_changes(added=(), removed=()):
+    """
+    Write attendance changes into the packed per-term bitmaps.
+
+    Takes the same arguments as apply_attendance_changes and must run in the
+    same transaction as the write. A day holds one status, so when a removed
+    record leaves a day uncovered, any other record still on file for that day
+    (the newest wins, as in a rebuild) is written back instead of clearing it.
+
+    :raises ValueError: If an added record's status is not one of STATUS_CODES
+    """
+    codes = {}
+    for record in removed:
+        key, _ = _day_key(record)
+        codes[key] = 0
+    for record in added:
+        key, status = _day_key(record)
+        if status not in STATUS_CODES:
+            raise ValueError(f"Unknown attendance status {status!r}; validate with AttendanceSchema first")
+        codes[key] = STATUS_CODES[status]
+    if not codes:
+        return
+
+    cleared = {key for key, code in codes.items() if code == 0}
+    if cleared:
+        remaining = db.session.execute(
+            select(Attendance.student_id, Attendance.class_id, Attendance.date, Attendance.status)
+            .where(Attendance.student_id.in_({key[0] for key in cleared}),
+                   Attendance.date.in_({key[2] for key in cleared}))
+            .order_by(Attendance.id)
+        )
+        for student_id, class_id, date, status in remaining:
+            key = (student_id, class_id or 0, date)
+            if key in cleared:
+                # A stored status outside STATUS_CODES leaves the day blank, as in a rebuild
+                codes[key] = STATUS_CODES.get(status, 0)
+
+    starts = _term_starts()
+    changes = defaultdict(dict)
+    lengths = {}
+    for (student_id, class_id, day), code in codes.items():
+        start, end = term_bounds(day, starts)
+        changes[(student_id, class_id, start)][(day - start).days] = code
+        lengths[start] = (end - start).days
+
+    # Lock the bitmaps being rewritten so concurrent writers to the same term serialize
+    existing = {
+        (row.student_id, row.class_id, row.term_start): row.days
+        for row in db.session.execute(
+            select(AttendanceBitmap.student_id, AttendanceBitmap.class_id,
+                   AttendanceBitmap.term_start, AttendanceBitmap.days)
+            .where(AttendanceBitmap.student_id.in_({key[0] for key in changes}),
+                   AttendanceBitmap.term_start.in_(lengths))
+            .with_for_update()
+        )
+    }
+    rows = []
+    for key, days in changes.items():
+        term = np.zeros(lengths[key[2]], np.uint8)
+        if key in existing:
+            stored = unpack(np.frombuffer(existing[key], np.uint8))[:len(term)]
+            term[:len(stored)] = stored
+        term[list(days)] = list(days.values())
+        rows.append({'student_id': key[0], 'class_id': key[1], 'term_start': key[2],
+                     'days': pack(term).tobytes()})
+    db.session.execute(_upsert(), rows)
+
+
+def rebuild_attendance_bitmaps(batch_size=2000):
+    """
+    Recompute every bitmap from ``attendances``, ``batch_size`` students at a time.
+
+    Each batch is bucketed into (student, class, term) rows and packed with
+    NumPy rather than row by row.
+
+    :return: Number of bitmap rows written
+    """
+    starts = _term_starts()
+    db.session.execute(delete(AttendanceBitmap))
+    student_ids = db.session.scalars(
+        select(Attendance.student_id).distinct().order_by(Attendance.student_id)
+    ).all()
+    if not student_ids:
+        return 0
+    first, last = db.session.execute(select(func.min(Attendance.date), func.max(Attendance.date))).one()
+    bounds = _boundaries(_as_date(first).year - 1, _as_date(last).year + 1, starts)
+    ordinals = np.array([bound.toordinal() for bound in bounds])
+    width = int(np.diff(ordinals).max())
+    width += -width % 4
+
+    total = 0
+    for index in range(0, len(student_ids), batch_size):
+        batch = student_ids[index:index + batch_size]
+        # Ordered by id so that, like the write path, the newest record of a day wins
+        records = db.session.connection().execute(
+            # Raw column values: NumPy parses the dates faster than per-row result processing
+            select(Attendance.student_id, func.coalesce(Attendance.class_id, 0),
+                   type_coerce(Attendance.date, String), type_coerce(Attendance.status, String))
+            .where(Attendance.student_id.between(batch[0], batch[-1]))
+            .order_by(Attendance.id)
+        ).all()
+        students, classes, dates, statuses = zip(*records)
+        students = np.array(students, np.int64)
+        classes = np.array(classes, np.int64)
+        days = np.array(dates, 'datetime64[D]').astype(np.int64) + EPOCH_ORDINAL
+        labels, labelled = np.unique(np.array(statuses), return_inverse=True)
+        codes = np.array([STATUS_CODES.get(label, 0) for label in labels], np.uint8)[labelled.ravel()]
+
+        # One integer per (student, class, term) so the bucketing is a flat np.unique
+        terms = np.searchsorted(ordinals, days, side='right') - 1
+        class_span, term_span = int(classes.max()) + 1, len(ordinals)
+        keys, slots = np.unique((students * class_span + classes) * term_span + terms, return_inverse=True)
+        cells = slots.ravel() * width + (days - ordinals[terms])
+        # Keep the last record of each cell
+        _, last_seen = np.unique(cells[::-1], return_index=True)
+        latest = len(cells) - 1 - last_seen
+        grid = np.zeros(len(keys) * width, np.uint8)
+        grid[cells[latest]] = codes[latest]
+        packed = pack(grid.reshape(len(keys), width))
+
+        term_bytes = (np.diff(ordinals) + 3) // 4
+        key_students, key_rest = np.divmod(keys, class_span * term_span)
+        key_classes, key_terms = np.divmod(key_rest, term_span)
+        rows = [
+            {'student_id': student_id, 'class_id': class_id, 'term_start': bounds[term],
+             'days': packed[slot, :term_bytes[term]].tobytes()}
+            for slot, (student_id, class_id, term)
+            in enumerate(zip(key_students.tolist(), key_classes.tolist(), key_terms.tolist()))
+        ]
+        db.session.execute(insert(AttendanceBitmap), rows)
+        total += len(rows)
+    return total
+
+
+def load_days(date_from, date_to, student_id=None, class_id=None):
+    """
+    Load attendance as a (student, class) x day matrix of status codes.
+
+    :return: ``(keys, matrix)`` where ``keys`` lists the (student_id, class_id)
+        of each row and ``matrix[row, n]`` is the code for ``date_from + n`` days
+    """
+    stmt = select(AttendanceBitmap.student_id, AttendanceBitmap.class_id,
+                  AttendanceBitmap.term_start, AttendanceBitmap.days)
+    if student_id is not None:
+        stmt = stmt.where(AttendanceBitmap.student_id == student_id)
+    if class_id is not None:
+        stmt = stmt.where(AttendanceBitmap.class_id == class_id)
+    stmt = stmt.where(AttendanceBitmap.term_start.in_(terms_between(date_from, date_to)))
+
+    by_term = defaultdict(list)
+    for row in db.session.execute(stmt):
+        by_term[row.term_start].append(row)
+    keys = sorted({(row.student_id, row.class_id) for rows in by_term.values() for row in rows})
+    positions = {key: position for position, key in enumerate(keys)}
+    width = (date_to - date_from).days + 1
+    matrix = np.zeros((len(keys), width), np.uint8)
+    for term_start, rows in by_term.items():
+        # Unpack a whole term at once; every bitmap of a term has the same length
+        size = max(len(row.days) for row in rows)
+        packed = np.frombuffer(b''.join(row.days.ljust(size, b'\0') for row in rows), np.uint8)
+        codes = unpack(packed.reshape(len(rows), size))
+        offset = (term_start - date_from).days
+        low, high = max(0, -offset), min(codes.shape[1], width - offset)
+        if low < high:
+            targets = [positions[(row.student_id, row.class_id)] for row in rows]
+            matrix[targets, offset + low:offset + high] = codes[:, low:high]
+    return keys, matrix
+
+
+def _status_counts(groups, codes, size):
+    """Per group present/absent/late counts from parallel group and code arrays."""
+    return np.bincount(groups * 4 + codes, minlength=size * 4).reshape(size, 4)[:, 1:]
+
+
+def attendance_counts(date_from, date_to, student_id=None, class_id=None):
+    """Present/absent/late counts per student and class between two dates."""
+    keys, matrix = load_days(date_from, date_to, student_id, class_id)
+    rows = np.repeat(np.arange(len(keys)), matrix.shape[1])
+    counts = _status_counts(rows, matrix.ravel().astype(np.int64), len(keys))
+    return [
+        {'student_id': student, 'class_id': class_ or None,
+         **{STATUS_COLUMNS[code]: int(count) for code, count in zip(STATUS_COLUMNS, row)}}
+        for (student, class_), row, recorded in zip(keys, counts, counts.any(axis=1)) if recorded
+    ]
+
+
+def daily_counts(class_id, date_from, date_to):
+    """Present/absent/late counts for a whole class on each day that has records."""
+    _, matrix = load_days(date_from, date_to, class_id=class_id)
+    columns = np.tile(np.arange(matrix.shape[1]), matrix.shape[0])
+    counts = _status_counts(columns, matrix.ravel().astype(np.int64), matrix.shape[1])
+    return [
+        {'date': (date_from + datetime.timedelta(days=int(day))).isoformat(),
+         **{STATUS_COLUMNS[code]: int(count) for code, count in zip(STATUS_COLUMNS, counts[day])}}
+        for day in np.flatnonzero(counts.any(axis=1))
+    ]
+
+
+def absence_streaks(date_from, date_to, min_length=2, student_id=None, class_id=None):
+    """
+    Runs of consecutive absences of at least ``min_length`` recorded days.
+
+    Only days with a record count, so weekends and holidays neither break a
+    streak nor lengthen it. Longest streaks come first.
+    """
+    keys, matrix = load_days(date_from, date_to, student_id, class_id)
+    # Recorded days in row-major order: a run is consecutive absences within one row
+    rows, columns = np.nonzero(matrix)
+    absent = matrix[rows, columns] == ABSENT
+    row_starts = np.r_[True, rows[1:] != rows[:-1]]
+    row_ends = np.r_[rows[1:] != rows[:-1], True]
+    starts = np.flatnonzero(absent & (row_starts | ~np.r_[False, absent[:-1]]))
+    ends = np.flatnonzero(absent & (row_ends | ~np.r_[absent[1:], False]))
+    lengths = ends - starts + 1
+    keep = np.flatnonzero(lengths >= min_length)
+    keep = keep[np.argsort(-lengths[keep], kind='stable')]
+    return [
+        {'student_id': keys[rows[starts[run]]][0], 'class_id': keys[rows[starts[run]]][1] or None,
+         'start': (date_from + datetime.timedelta(days=int(columns[starts[run]]))).isoformat(),
+         'end': (date_from + datetime.timedelta(days=int(columns[ends[run]]))).isoformat(),
+         'days': int(lengths[run])}
+        for run in keep
+    ]
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from sqlalchemy import case, delete, func, insert, select
+from models import db, Attendance, AttendanceSummary
+from utils.attendance_bitmap import apply_bitmap_changes
+from utils.sql import dialect_insert
+
+STATUS_COLUMNS = {'Present': 'present', 'Absent': 'absent', 'Late': 'late'}
+
+
+def summary_key(student_id, course_id, class_id):
+    return (student_id, course_id or 0, class_id or 0)
+
+
+def attendance_key(attendance):
+    """Summary key and status of an Attendance row or a dict of its columns."""
+    get = attendance.get if isinstance(attendance, dict) else lambda name: getattr(attendance, name)
+    return summary_key(get('student_id'), get('course_id'), get('class_id')), get('status')
+
+
+def _upsert():
+    stmt = dialect_insert(AttendanceSummary)
+    table = AttendanceSummary.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.student_id, table.c.course_id, table.c.class_id],
+        set_={column: table.c[column] + stmt.excluded[column] for column in STATUS_COLUMNS.values()},
+    )
+
+
+def apply_attendance_changes(added=(), removed=()):
+    """
+    Fold attendance writes into the per-(student, course, class) counters and
+    the per-term attendance bitmaps.
+
+    Call in the same transaction as the write so the summary commits or rolls
+    back with it. Deltas for the same key are combined and applied with one
+    executemany upsert.
+
+    :param added: Attendance rows (or dicts) that now exist
+    :param removed: Attendance rows (or dicts) that no longer exist, or the
+        previous state of rows whose status changed
+    :raises ValueError: If a record's status is not one of STATUS_COLUMNS
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(STATUS_COLUMNS.values(), 0))
+    for records, sign in ((added, 1), (removed, -1)):
+        for record in records:
+            key, status = attendance_key(record)
+            if status not in STATUS_COLUMNS:
+                raise ValueError(f"Unknown attendance status {status!r}; validate with AttendanceSchema first")
+            deltas[key][STATUS_COLUMNS[status]] += sign
+
+    rows = [
+        dict(student_id=key[0], course_id=key[1], class_id=key[2], **counts)
+        for key, counts in deltas.items() if any(counts.values())
+    ]
+    if rows:
+        db.session.execute(_upsert(), rows)
+    apply_bitmap_changes(added, removed)
+
+
+def rebuild_attendance_summaries():
+    """
+    Recompute every summary row from ``attendances`` in one INSERT ... SELECT.
+
+    :return: Number of summary rows written
+    """
+    counts = {
+        column: func.sum(case((Attendance.status == status, 1), else_=0))
+        for status, column in STATUS_COLUMNS.items()
+    }
+    course_id = func.coalesce(Attendance.course_id, 0)
+    class_id = func.coalesce(Attendance.class_id, 0)
+    source = (
+        select(Attendance.student_id, course_id, class_id, *counts.values())
+        .group_by(Attendance.student_id, course_id, class_id)
+    )
+    db.session.execute(delete(AttendanceSummary))
+    db.session.execute(
+        insert(AttendanceSummary).from_select(['student_id', 'course_id', 'class_id', *counts], source)
+    )
+    return db.session.scalar(select(func.count()).select_from(AttendanceSummary))
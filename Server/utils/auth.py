@@ -23,7 +23,7 @@ def init_jwt(app):
 
 def generate_jwt(user_id):
     """Generate a new JWT token."""
-    access_token = create_access_token(identity=user_id, expires_delta=datetime.timedelta(hours=1))
+    access_token = create_access_token(identity=str(user_id), expires_delta=datetime.timedelta(hours=1))
     return access_token
 
 def verify_jwt(token):
@@ -0,0 +1,120 @@
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+from models import db, Student, Teacher, Course, Class, Grade, Enrollment, AttendanceSummary
+
+
+def _name(obj):
+    return obj.name if obj is not None else None
+
+
+def student_dashboard(student_id):
+    """
+    Everything the student area shows, loaded in a fixed number of queries.
+
+    Relationships are eager-loaded with one SELECT ... IN per relationship
+    (teachers are joined onto their course/class), so the query count does not
+    grow with the number of grades, enrollments or courses.
+
+    :return: Dashboard dict, or None if the student does not exist
+    """
+    enrollments = selectinload(Student.enrollments)
+    student = db.session.scalars(
+        select(Student)
+        .where(Student.id == student_id)
+        .options(
+            selectinload(Student.profile),
+            selectinload(Student.grades).selectinload(Grade.course),
+            selectinload(Student.grades).selectinload(getattr(Grade, 'class')),
+            selectinload(Student.progress_records),
+            enrollments.selectinload(Enrollment.course).joinedload(Course.teacher),
+            enrollments.selectinload(getattr(Enrollment, 'class')).joinedload(Class.teacher),
+        )
+    ).one_or_none()
+    if student is None:
+        return None
+
+    home_course = None
+    if student.course_id is not None:
+        home_course = db.session.scalars(
+            select(Course).where(Course.id == student.course_id).options(joinedload(Course.teacher))
+        ).one_or_none()
+    summaries = db.session.scalars(
+        select(AttendanceSummary).where(AttendanceSummary.student_id == student_id)
+    ).all()
+
+    teachers = {}
+    def assign(teacher, subject, kind):
+        if teacher is None:
+            return
+        entry = teachers.setdefault(teacher.id, dict(teacher.to_dict(), courses=[], classes=[]))
+        if subject not in entry[kind]:
+            entry[kind].append(subject)
+
+    if home_course is not None:
+        assign(home_course.teacher, home_course.name, 'courses')
+    for enrollment in student.enrollments:
+        if enrollment.course is not None:
+            assign(enrollment.course.teacher, enrollment.course.name, 'courses')
+        class_ = getattr(enrollment, 'class')
+        if class_ is not None:
+            assign(class_.teacher, class_.name, 'classes')
+
+    present = sum(summary.present for summary in summaries)
+    absent = sum(summary.absent for summary in summaries)
+    late = sum(summary.late for summary in summaries)
+    total = present + absent + late
+
+    return {
+        'student': student.to_dict(),
+        'profile': student.profile.to_dict() if student.profile is not None else None,
+        'grades': [
+            dict(grade.to_dict(), course_name=_name(grade.course), class_name=_name(getattr(grade, 'class')))
+            for grade in student.grades
+        ],
+        'attendance': {
+            'present': present,
+            'absent': absent,
+            'late': late,
+            'total': total,
+            'attendance_rate': round((present + late) / total, 4) if total else None,
+            'by_course_and_class': [summary.to_dict() for summary in summaries],
+        },
+        'progress': [progress.to_dict() for progress in student.progress_records],
+        'enrollments': [enrollment.to_dict() for enrollment in student.enrollments],
+        'teachers': list(teachers.values()),
+    }
+
+
+def teacher_roster(teacher_id):
+    """
+    A teacher's classes and courses, each with its enrolled students.
+
+    Classes and courses, their enrollments and the enrolled students are each
+    loaded with one SELECT ... IN, so the query count stays the same however
+    many classes or students the teacher has.
+
+    :return: Roster dict, or None if the teacher does not exist
+    """
+    teacher = db.session.scalars(
+        select(Teacher)
+        .where(Teacher.id == teacher_id)
+        .options(
+            selectinload(Teacher.classes).selectinload(Class.students).selectinload(Enrollment.student),
+            selectinload(Teacher.courses).selectinload(Course.enrollments).selectinload(Enrollment.student),
+        )
+    ).one_or_none()
+    if teacher is None:
+        return None
+
+    def with_students(group, enrollments):
+        students = {}
+        for enrollment in enrollments:
+            if enrollment.student is not None:
+                students.setdefault(enrollment.student.id, enrollment.student.to_dict())
+        return dict(group.to_dict(), student_count=len(students), students=list(students.values()))
+
+    return {
+        'teacher': teacher.to_dict(),
+        'classes': [with_students(class_, class_.students) for class_ in teacher.classes],
+        'courses': [with_students(course, course.enrollments) for course in teacher.courses],
+    }
@@ -0,0 +1,90 @@
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from models import REPLICA_BIND_PREFIX
+
+
+def database_uri(uri):
+    """
+    Normalise a database URL from the environment.
+
+    Heroku-style ``postgres://`` URLs are rewritten to the ``postgresql://``
+    scheme SQLAlchemy expects.
+    """
+    if uri.startswith('postgres://'):
+        return 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri, config):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    Server databases get an explicit QueuePool sized per worker process;
+    ``pool_pre_ping`` replaces connections the server dropped while idle and
+    ``pool_recycle`` retires them before proxies or the server time them out.
+    SQLite keeps SQLAlchemy's default pool, which suits a file database.
+
+    :param uri: Database URL the engine connects to
+    :param config: Flask config mapping
+    :return: Dict of keyword arguments for create_engine
+    """
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+
+def sqlite_pragmas(config):
+    """PRAGMA statements run on every new SQLite connection, skipping unset ones."""
+    pragmas = [
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT_MS']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+    ]
+    return [f"PRAGMA {name}={value}" for name, value in pragmas if value not in (None, '')]
+
+
+def init_database(app):
+    """
+    Configure the primary and replica engines from the app config. Must run
+    before ``db.init_app``.
+
+    WAL lets readers proceed while a writer commits, ``synchronous=NORMAL``
+    drops the fsync per commit (still durable against application crashes in
+    WAL mode), the busy timeout makes concurrent writers wait for the lock
+    instead of failing with "database is locked", and mmap serves reads from
+    the page cache without a copy.
+    """
+    uri = database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    options = engine_options(uri, app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    # Read replicas become binds that RoutingSession picks for GET requests
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, replica_uri in enumerate(app.config['SQLALCHEMY_REPLICA_URIS']):
+        replica_uri = database_uri(replica_uri)
+        binds[f'{REPLICA_BIND_PREFIX}{index}'] = {'url': replica_uri, **engine_options(replica_uri, app.config)}
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(Engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
@@ -1,21 +1,143 @@
+import os
+import smtplib
+import uuid
 import sendgrid
+from email.message import EmailMessage
 from sendgrid.helpers.mail import Mail
 from flask import current_app
+from models import db, EmailOutbox
 
-def send_email(to_email, subject, content, from_email=None):
+
+class EmailDeliveryError(Exception):
+    """Raised by a transport when a message could not be handed off."""
+
+
+class SendGridTransport:
+    """Deliver messages through the SendGrid web API."""
+
+    def __init__(self, api_key):
+        self.client = sendgrid.SendGridAPIClient(api_key=api_key)
+
+    def send(self, message):
+        response = self.client.send(Mail(
+            from_email=message.from_email,
+            to_emails=message.to_email,
+            subject=message.subject,
+            html_content=message.content
+        ))
+        if response.status_code >= 400:
+            raise EmailDeliveryError(f"SendGrid returned {response.status_code}")
+        return response
+
+
+class SMTPTransport:
+    """Deliver messages through an SMTP relay, one connection per batch."""
+
+    def __init__(self, host, port=587, username=None, password=None, use_tls=True, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.connection = None
+
+    def open(self):
+        self.connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            self.connection.starttls()
+        if self.username:
+            self.connection.login(self.username, self.password)
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.quit()
+            except smtplib.SMTPException:
+                pass
+            self.connection = None
+
+    def send(self, message):
+        if self.connection is None:
+            self.open()
+        self.connection.send_message(build_message(message))
+
+
+class FileTransport:
+    """Write each message as an .eml file; a stand-in for local development."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, message):
+        path = os.path.join(self.directory, f"{message.id or uuid.uuid4().hex}.eml")
+        with open(path, 'wb') as handle:
+            handle.write(build_message(message).as_bytes())
+
+
+class MemoryTransport:
+    """Keep delivered messages in a list; a stand-in for tests."""
+
+    def __init__(self):
+        self.outbox = []
+
+    def send(self, message):
+        self.outbox.append({
+            'to_email': message.to_email,
+            'from_email': message.from_email,
+            'subject': message.subject,
+            'content': message.content,
+        })
+
+
+def build_message(message):
+    """Build a MIME message from an outbox row."""
+    mime = EmailMessage()
+    mime['From'] = message.from_email
+    mime['To'] = message.to_email
+    mime['Subject'] = message.subject
+    mime.set_content(message.content, subtype='html')
+    return mime
+
+
+def get_transport(config):
+    """
+    Build the transport selected by ``EMAIL_TRANSPORT`` in the app config.
+
+    :param config: Flask config mapping
+    :return: Transport instance exposing ``send(message)``
+    """
+    name = config['EMAIL_TRANSPORT']
+    if name == 'sendgrid':
+        return SendGridTransport(config['SENDGRID_API_KEY'])
+    if name == 'smtp':
+        return SMTPTransport(
+            config['SMTP_HOST'],
+            port=config['SMTP_PORT'],
+            username=config['SMTP_USERNAME'],
+            password=config['SMTP_PASSWORD'],
+            use_tls=config['SMTP_USE_TLS']
+        )
+    if name == 'file':
+        return FileTransport(config['EMAIL_FILE_DIR'])
+    if name == 'memory':
+        return MemoryTransport()
+    raise ValueError(f"Unknown EMAIL_TRANSPORT '{name}'")
+
+
+def queue_email(to_email, subject, content, from_email=None):
+    """
+    Add an email to the outbox in the current session.
+
+    Nothing is sent here: the message is delivered by the outbox workers once
+    the caller's transaction commits, so it is never lost if the request fails
+    and never sent for a change that was rolled back.
+
+    :return: The pending EmailOutbox row
+    """
     if not from_email:
         from_email = current_app.config['DEFAULT_FROM_EMAIL']
-    
-    sg = sendgrid.SendGridAPIClient(api_key=current_app.config['SENDGRID_API_KEY'])
-    message = Mail(
-        from_email=from_email,
-        to_emails=to_email,
-        subject=subject,
-        html_content=content
-    )
-    try:
-        response = sg.send(message)
-        return response
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
-        return None
+    message = EmailOutbox(to_email=to_email, from_email=from_email, subject=subject, content=content)
+    db.session.add(message)
+    return message
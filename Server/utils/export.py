@@ -0,0 +1,52 @@
+import csv
+import datetime
+import io
+from sqlalchemy import select
+from models import db
+from utils.serializers import compile_row_encoder
+
+
+def iter_partitions(table, batch_size):
+    """
+    Iterate over every row of a table in primary key order, one batch at a time.
+
+    ``yield_per`` makes the driver use a server-side cursor where it supports
+    one (Postgres) and bounds how many rows are buffered on the Python side,
+    so memory stays flat whatever the size of the table.
+
+    :param table: SQLAlchemy Table to read
+    :param batch_size: Number of rows fetched per round trip
+    :return: Generator of lists of Row objects
+    """
+    stmt = select(table).order_by(table.c.id).execution_options(yield_per=batch_size)
+    result = db.session.execute(stmt)
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def generate_ndjson(table, batch_size):
+    """Yield a table as newline-delimited JSON, one chunk per batch of rows."""
+    encode_row = compile_row_encoder(tuple(table.c))
+    for partition in iter_partitions(table, batch_size):
+        yield '\n'.join(map(encode_row, partition)) + '\n'
+
+
+def generate_csv(table, batch_size):
+    """Yield a table as CSV with a header line, one chunk per batch of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(table.c.keys())
+    for partition in iter_partitions(table, batch_size):
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime.date) else value for value in row]
+            for row in partition
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Emit the header even when the table is empty
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,95 @@
+from datetime import datetime
+from flask import abort, request
+from sqlalchemy import Date, DateTime, Enum, Integer
+from models import User, Student, Teacher, Course, Class, Grade, Enrollment, Attendance, Progress
+from utils.error_handling import handle_bad_request
+from utils.serializers import SERIALIZED_COLUMNS
+
+# Columns each list endpoint can be filtered on with ?<column>=value[,value...]
+FILTERABLE_COLUMNS = {
+    User: (User.role,),
+    Student: (Student.user_id, Student.course_id, Student.gender),
+    Teacher: (Teacher.user_id,),
+    Course: (Course.teacher_id,),
+    Class: (Class.teacher_id,),
+    Grade: (Grade.student_id, Grade.course_id, Grade.class_id, Grade.grade, Grade.term),
+    Enrollment: (Enrollment.student_id, Enrollment.course_id, Enrollment.class_id),
+    Attendance: (Attendance.student_id, Attendance.course_id, Attendance.class_id, Attendance.status),
+    Progress: (Progress.student_id, Progress.course_id, Progress.class_id),
+}
+
+# Column each list endpoint's ?date_from=&date_to= range applies to
+DATE_RANGE_COLUMNS = {
+    Student: Student.enrollment_date,
+    Attendance: Attendance.date,
+}
+
+
+def _parse_value(column, value, param=None):
+    param = param or column.key
+    column_type = column.type
+    try:
+        if isinstance(column_type, Integer):
+            return int(value)
+        if isinstance(column_type, (Date, DateTime)):
+            return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        kind = 'an integer' if isinstance(column_type, Integer) else 'a date in YYYY-MM-DD format'
+        abort(handle_bad_request(f"{param} must be {kind}"))
+    if isinstance(column_type, Enum) and value not in column_type.enums:
+        abort(handle_bad_request(f"{param} must be one of: " + ", ".join(column_type.enums)))
+    return value
+
+
+def requested_columns(model):
+    """
+    Columns selected by the ``fields`` query parameter.
+
+    ``id`` is always included because pages are keyed on it.
+
+    :return: Tuple of columns, all serialized columns if ``fields`` is absent
+    """
+    columns = SERIALIZED_COLUMNS[model]
+    fields = request.args.get('fields')
+    if not fields:
+        return columns
+    by_name = {column.key: column for column in columns}
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        abort(handle_bad_request(
+            f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(by_name)}"
+        ))
+    names = ['id'] + [name for name in dict.fromkeys(names) if name != 'id']
+    return tuple(by_name[name] for name in names)
+
+
+def apply_filters(model, stmt):
+    """
+    Translate the filter query parameters for ``model`` into WHERE clauses.
+
+    ``?column=value`` filters by equality and ``?column=a,b`` by membership;
+    ``date_from``/``date_to`` bound the model's date column inclusively.
+    Values are parsed according to the column type, and rejected with a 400
+    when they cannot be, so every clause can be served by the column's index.
+
+    :param model: Model whose list endpoint is being served
+    :param stmt: ``select()`` to filter
+    :return: The filtered statement
+    """
+    for column in FILTERABLE_COLUMNS.get(model, ()):
+        raw = request.args.get(column.key)
+        if raw is None or raw == '':
+            continue
+        values = [_parse_value(column, value.strip()) for value in raw.split(',')]
+        stmt = stmt.where(column == values[0] if len(values) == 1 else column.in_(values))
+
+    date_column = DATE_RANGE_COLUMNS.get(model)
+    if date_column is not None:
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        if date_from:
+            stmt = stmt.where(date_column >= _parse_value(date_column, date_from, 'date_from'))
+        if date_to:
+            stmt = stmt.where(date_column <= _parse_value(date_column, date_to, 'date_to'))
+    return stmt
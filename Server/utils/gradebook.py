@@ -0,0 +1,127 @@
+import csv
+import io
+from marshmallow import ValidationError
+from sqlalchemy import func, select, tuple_
+from models import db, Class, Course, Grade, Student, GRADE_KEY
+from utils.sql import dialect_insert
+from utils.validators import GradeSchema
+
+REQUIRED_COLUMNS = ('student_id', 'course_id', 'grade')
+REFERENCES = (('student_id', Student), ('course_id', Course), ('class_id', Class))
+
+
+def _key(row):
+    return (row['student_id'], row['course_id'], row.get('class_id'), row.get('term'))
+
+
+def _unknown_references(batch):
+    """
+    Find rows of a batch that point at a student, course or class that does not exist.
+
+    Each referenced table is checked with one SELECT ... IN, so bad ids are
+    reported per row instead of failing the whole import with an IntegrityError.
+
+    :param batch: Dict mapping grade key to validated row
+    :return: Dict mapping grade key to its field errors
+    """
+    errors = {}
+    for column, model in REFERENCES:
+        ids = {row[column] for row in batch.values() if row.get(column) is not None}
+        if not ids:
+            continue
+        known = set(db.session.scalars(select(model.id).where(model.id.in_(ids))))
+        for key, row in batch.items():
+            if row.get(column) is not None and row[column] not in known:
+                errors.setdefault(key, {})[column] = [f"{model.__name__} does not exist."]
+    return errors
+
+
+def _apply_batch(batch):
+    """
+    Upsert one batch of validated grades keyed on (student_id, course_id, class_id, term).
+
+    The whole batch is one executemany INSERT ... ON CONFLICT DO UPDATE against
+    the unique index on that key, so concurrent imports cannot write the same
+    grade twice. The only read beforehand counts how many keys already exist,
+    for the summary.
+
+    :param batch: Dict mapping grade key to validated row
+    :return: Tuple of (inserted, updated) counts
+    """
+    updated = db.session.scalar(
+        select(func.count()).select_from(Grade).where(tuple_(*GRADE_KEY).in_([
+            (key[0], key[1] or 0, key[2] or 0, key[3] or '') for key in batch
+        ]))
+    )
+    stmt = dialect_insert(Grade)
+    db.session.execute(
+        stmt.on_conflict_do_update(index_elements=list(GRADE_KEY), set_={'grade': stmt.excluded.grade}),
+        [{'student_id': key[0], 'course_id': key[1], 'class_id': key[2], 'term': key[3], 'grade': row['grade']}
+         for key, row in batch.items()],
+    )
+    return len(batch) - updated, updated
+
+
+def import_gradebook(stream, batch_size, max_errors=100):
+    """
+    Import a CSV grade sheet as a set-based upsert into ``grades``.
+
+    The sheet is read incrementally and applied in batches inside the current
+    transaction; the caller commits on success or rolls back if any row failed
+    validation, so an import either lands completely or not at all. Re-importing
+    the same sheet updates the existing grades in place. A file that is not
+    UTF-8, or rows naming a student, course or class that does not exist, are
+    reported as row errors rather than raised.
+
+    :param stream: Binary file-like object containing the CSV
+    :param batch_size: Number of rows upserted per round of statements
+    :param max_errors: Stop collecting row errors after this many
+    :return: Tuple of (summary dict, list of row errors)
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    schema = GradeSchema()
+    summary = {'rows': 0, 'inserted': 0, 'updated': 0}
+    errors = []
+    batch = {}
+    lines = {}
+
+    def write_batch():
+        for key, messages in _unknown_references(batch).items():
+            if len(errors) < max_errors:
+                errors.append({'line': lines[key], 'errors': messages})
+        if errors:
+            # The import will be rolled back; keep validating but stop writing
+            return
+        inserted, updated = _apply_batch(batch)
+        summary['inserted'] += inserted
+        summary['updated'] += updated
+
+    try:
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            return None, [{'line': 1, 'errors': {column: ['Missing column.'] for column in missing}}]
+
+        for record in reader:
+            summary['rows'] += 1
+            data = {column: record.get(column) or None
+                    for column in ('student_id', 'course_id', 'class_id', 'grade', 'term')}
+            try:
+                row = schema.load(data)
+            except ValidationError as err:
+                if len(errors) < max_errors:
+                    errors.append({'line': reader.line_num, 'errors': err.messages})
+                continue
+            # A later row for the same key within the sheet wins
+            batch[_key(row)] = row
+            lines[_key(row)] = reader.line_num
+            if len(batch) >= batch_size:
+                write_batch()
+                batch, lines = {}, {}
+    except UnicodeDecodeError:
+        # Decoding happens a chunk at a time, so there is no reliable line number
+        return None, [{'line': None, 'errors': {'file': ['The file is not UTF-8 encoded text.']}}]
+
+    if batch:
+        write_batch()
+    errors.sort(key=lambda error: error['line'])
+    return summary, errors
@@ -0,0 +1,236 @@
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+from flask import current_app
+from sqlalchemy import String, func, select, type_coerce
+from models import db, Class, Grade
+from utils.response_cache import table_versions
+
+COHORTS = ('all', 'course', 'class')
+# Tables a ranking is computed from; a commit to either invalidates it
+RANKING_TABLES = ('grades', 'classes')
+GRADE_ROW = np.dtype([('student_id', np.int64), ('grade', 'U5'), ('class_id', np.int64)])
+
+
+@lru_cache(maxsize=None)
+def parse_points_scale(letters, percentages):
+    """
+    Parse the grade-to-points settings.
+
+    :param letters: ``'A:4.0,A-:3.7,...'``, matched case-insensitively
+    :param percentages: ``'90:3.7,80:2.7,...'``, minimum percentage for each
+        number of points; numeric grades such as ``'87'`` or ``'87.5%'`` get
+        the points of the highest band they reach
+    :return: Tuple of (letter dict, ascending band minimums, band points)
+    """
+    def pairs(value):
+        for item in value.split(','):
+            if item.strip():
+                label, points = item.rsplit(':', 1)
+                yield label.strip(), float(points)
+
+    letter_points = {label.upper(): points for label, points in pairs(letters)}
+    bands = sorted((float(minimum), points) for minimum, points in pairs(percentages))
+    minimums = np.array([minimum for minimum, _ in bands])
+    band_points = np.array([points for _, points in bands])
+    return letter_points, minimums, band_points
+
+
+def _scale():
+    config = current_app.config
+    return parse_points_scale(config['GRADE_POINTS'], config['GRADE_PERCENT_POINTS'])
+
+
+def _percentage(label):
+    try:
+        value = float(label.strip().rstrip('%'))
+    except ValueError:
+        return math.nan
+    return value if math.isfinite(value) else math.nan
+
+
+def grade_points(grades, scale=None):
+    """
+    Points for each grade string, NaN where the scale does not cover it.
+
+    Only the distinct grades are parsed in Python (a cohort has a handful);
+    every row then picks up its points with one array lookup.
+    """
+    letter_points, minimums, band_points = scale or _scale()
+    labels, positions = np.unique(np.asarray(grades, dtype=str), return_inverse=True)
+    percentages = np.array([_percentage(label) for label in labels])
+    bands = np.searchsorted(minimums, percentages, side='right') - 1
+    label_points = np.where(
+        ~np.isnan(percentages) & (bands >= 0), band_points[np.clip(bands, 0, None)], math.nan
+    ) if len(minimums) else np.full(len(labels), math.nan)
+    for index, label in enumerate(labels):
+        points = letter_points.get(label.strip().upper())
+        if points is not None:
+            label_points[index] = points
+    return label_points[positions.ravel()]
+
+
+class CohortRanking:
+    """
+    GPAs, ranks and percentiles of every graded student in a cohort.
+
+    Built in one vectorized pass over the cohort's grade rows. Arrays are in
+    rank order: best GPA first, ties broken by student id.
+    """
+
+    def __init__(self, student_ids, grades, credits, scale=None):
+        points = grade_points(grades, scale)
+        graded = ~np.isnan(points)
+        self.ungraded = int(np.count_nonzero(~graded))
+        student_ids = np.asarray(student_ids, np.int64)[graded]
+        credits = np.asarray(credits, np.float64)[graded]
+        points = points[graded]
+
+        students, slots = np.unique(student_ids, return_inverse=True)
+        slots = slots.ravel()
+        size = len(students)
+        grade_counts = np.bincount(slots, minlength=size)
+        credit_totals = np.bincount(slots, weights=credits, minlength=size)
+        unweighted = np.bincount(slots, weights=points, minlength=size) / np.maximum(grade_counts, 1)
+        weighted_points = np.bincount(slots, weights=points * credits, minlength=size)
+        # A student whose classes all carry zero credits falls back to the plain mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            gpa = np.where(credit_totals > 0, weighted_points / credit_totals, unweighted)
+        gpa = np.round(gpa, 6)
+
+        ascending = np.sort(gpa)
+        below = np.searchsorted(ascending, gpa, side='left')
+        at_or_below = np.searchsorted(ascending, gpa, side='right')
+        order = np.lexsort((students, -gpa))
+
+        self.student_ids = students[order]
+        self.gpa = gpa[order]
+        self.unweighted_gpa = unweighted[order]
+        self.credits = credit_totals[order]
+        self.grades = grade_counts[order]
+        # Standard competition ranking (1, 2, 2, 4) and mid-rank percentile
+        self.rank = (size - at_or_below + 1)[order]
+        self.percentile = (100.0 * (below + 0.5 * (at_or_below - below)) / max(size, 1))[order]
+        # np.unique returned the ids sorted, so a student is found by binary search
+        self.sorted_ids = students
+        self.positions = np.empty(size, np.int64)
+        self.positions[order] = np.arange(size)
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def summary(self):
+        if not len(self):
+            return {'students': 0, 'ungraded_grades': self.ungraded, 'mean_gpa': None, 'median_gpa': None,
+                    'quartiles': None}
+        lower, median, upper = np.percentile(self.gpa, [25, 50, 75])
+        return {
+            'students': len(self),
+            'ungraded_grades': self.ungraded,
+            'mean_gpa': round(float(self.gpa.mean()), 3),
+            'median_gpa': round(float(median), 3),
+            'quartiles': [round(float(lower), 3), round(float(upper), 3)],
+        }
+
+    def entry(self, position):
+        return {
+            'student_id': int(self.student_ids[position]),
+            'rank': int(self.rank[position]),
+            'gpa': round(float(self.gpa[position]), 3),
+            'unweighted_gpa': round(float(self.unweighted_gpa[position]), 3),
+            'credits': float(self.credits[position]),
+            'grades': int(self.grades[position]),
+            'percentile': round(float(self.percentile[position]), 1),
+        }
+
+    def find(self, student_id):
+        index = int(np.searchsorted(self.sorted_ids, student_id))
+        if index == len(self.sorted_ids) or self.sorted_ids[index] != student_id:
+            return None
+        return self.entry(int(self.positions[index]))
+
+
+class RankingCache:
+    """
+    A thread-safe LRU of CohortRankings keyed by (cohort, cohort_id, term).
+
+    Each entry remembers the versions of RANKING_TABLES it was computed at and
+    is only served while they are unchanged, so any commit to ``grades`` or
+    ``classes``, from any process, invalidates it.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, versions):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != versions:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, versions, ranking):
+        with self.lock:
+            self.entries[key] = (versions, ranking)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def init_grading(app):
+    """Attach the per-process cohort ranking cache."""
+    app.extensions['grade_rankings'] = RankingCache(app.config['GRADE_RANKING_CACHE_ENTRIES'])
+
+
+def load_cohort(cohort, cohort_id=None, term=None):
+    """
+    Student ids, grade strings and class credits of a cohort's grade rows.
+
+    Credits are looked up from a small per-class array rather than joined in
+    SQL, and rows go straight into a structured array without Row unpacking.
+
+    :param cohort: 'all', or 'course'/'class' to take the grades recorded
+        against ``cohort_id``
+    :param term: Only grades of this term, or every term when None
+    """
+    stmt = select(Grade.student_id, type_coerce(Grade.grade, String), func.coalesce(Grade.class_id, 0))
+    if cohort == 'course':
+        stmt = stmt.where(Grade.course_id == cohort_id)
+    elif cohort == 'class':
+        stmt = stmt.where(Grade.class_id == cohort_id)
+    if term is not None:
+        stmt = stmt.where(Grade.term == term)
+    connection = db.session.connection()
+    rows = np.fromiter(map(tuple, connection.execute(stmt)), GRADE_ROW)
+
+    class_ids, class_credits = zip(*connection.execute(select(Class.id, Class.credits)).all() or [(0, 1.0)])
+    credit_table = np.ones(max(class_ids) + 1)
+    credit_table[list(class_ids)] = class_credits
+    class_ids = rows['class_id']
+    # Grades without a class, or of a since-deleted class, count one credit
+    known = class_ids < len(credit_table)
+    credits = np.where(known, credit_table[np.where(known, class_ids, 0)], 1.0)
+    credits[class_ids == 0] = 1.0
+    return rows['student_id'], rows['grade'], credits
+
+
+def cohort_ranking(cohort, cohort_id=None, term=None):
+    """The cohort's CohortRanking, from the cache while its grades are unchanged."""
+    cache = current_app.extensions['grade_rankings']
+    key = (cohort, cohort_id, term)
+    # Read the versions first: a write racing the load only makes the entry look older than it is
+    versions = table_versions(RANKING_TABLES)
+    ranking = cache.get(key, versions)
+    if ranking is None:
+        ranking = CohortRanking(*load_cohort(cohort, cohort_id, term))
+        cache.set(key, versions, ranking)
+    return ranking
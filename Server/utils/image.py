@@ -1,6 +1,7 @@
 import cloudinary.uploader
-from PIL import Image
+from PIL import Image, ImageOps
 import io
+import math
 
 def resize_image(image_data, width, height):
     """
@@ -12,11 +13,75 @@ def resize_image(image_data, width, height):
     :return: Resized binary image data
     """
     image = Image.open(io.BytesIO(image_data))
-    image = image.resize((width, height), Image.ANTIALIAS)
+    image_format = image.format
+    # Let JPEG decode straight at a reduced scale instead of at full size
+    image.draft(image.mode, (width, height))
+    image = image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
     byte_array = io.BytesIO()
-    image.save(byte_array, format=image.format)
+    image.save(byte_array, format=image_format)
     return byte_array.getvalue()
 
+
+def image_format(image_data):
+    """
+    Identify an image from its header without decoding the pixels.
+
+    :return: Pillow format name such as ``'JPEG'``, or None if it is not an image
+    """
+    try:
+        with Image.open(io.BytesIO(image_data)) as image:
+            return image.format
+    except Exception:
+        return None
+
+
+def encode_image(image, quality=85):
+    """
+    Encode an image for the web: JPEG, or PNG when it has transparency.
+
+    :return: Tuple of (binary image data, file extension)
+    """
+    byte_array = io.BytesIO()
+    if image.mode in ('RGBA', 'LA'):
+        image.save(byte_array, format='PNG', optimize=True)
+        return byte_array.getvalue(), 'png'
+    image.convert('RGB').save(byte_array, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return byte_array.getvalue(), 'jpg'
+
+
+def generate_thumbnails(image_data, sizes, quality=85):
+    """
+    Render an image at several sizes, each fitting a square bounding box.
+
+    The source is decoded only once and never at more than the largest size
+    needs: ``draft()`` has the JPEG decoder scale by 1/2, 1/4 or 1/8 while
+    decoding, and ``thumbnail()`` with a reducing gap does the remaining
+    integer downscale with ``reduce()`` before the final LANCZOS pass. Each
+    smaller size is then made from the previous one rather than the original.
+
+    :param image_data: Binary image data
+    :param sizes: Dict mapping size names to the bounding box edge in pixels
+    :param quality: JPEG quality for the encoded results
+    :return: Dict mapping size names to (binary image data, file extension)
+    """
+    image = Image.open(io.BytesIO(image_data))
+    largest = max(sizes.values())
+    scale = min(largest / image.width, largest / image.height, 1.0)
+    image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+    # Apply the EXIF orientation so phone photos are not stored sideways
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+    results = {}
+    source = image
+    for name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+        thumbnail = source.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS, reducing_gap=2.0)
+        results[name] = encode_image(thumbnail, quality)
+        source = thumbnail
+    return results
+
 def upload_image(image_data, cloud_name, api_key, api_secret, folder="uploads", public_id=None):
     """
     Upload the image to Cloudinary.
@@ -0,0 +1,143 @@
+import datetime
+import hashlib
+import logging
+from PIL import Image, UnidentifiedImageError
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models import db, ImageAsset
+from utils.image import generate_thumbnails
+from utils.outbox import OutboxWorkerPool, backoff_delay, claim_batch
+
+logger = logging.getLogger(__name__)
+
+# Errors that retrying cannot fix
+UNREADABLE_IMAGE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError)
+
+
+def parse_sizes(value):
+    """Parse ``"thumb:64,small:160"`` into ``{'thumb': 64, 'small': 160}``."""
+    sizes = {}
+    for item in value.split(','):
+        name, _, edge = item.strip().partition(':')
+        sizes[name] = int(edge)
+    return sizes
+
+
+def queue_image(image_data, content_type=None):
+    """
+    Queue an upload for processing, reusing the existing asset for identical bytes.
+
+    An asset whose processing Failed is queued again from the new upload, with
+    its attempts reset, so the same content can still be processed later.
+
+    :param image_data: Binary image data as uploaded
+    :param content_type: MIME type reported by the client
+    :return: Tuple of (ImageAsset, whether it was queued by this call)
+    """
+    content_hash = hashlib.sha256(image_data).hexdigest()
+    asset = ImageAsset.query.filter_by(content_hash=content_hash).first()
+    if asset is not None:
+        if asset.status != 'Failed':
+            return asset, False
+        # Only one of several concurrent re-uploads resets the asset
+        requeued = db.session.execute(
+            update(ImageAsset)
+            .where(ImageAsset.id == asset.id, ImageAsset.status == 'Failed')
+            .values(status='Pending', data=image_data, content_type=content_type, attempts=0,
+                    next_attempt_at=datetime.datetime.utcnow(), claim_token=None, locked_until=None,
+                    last_error=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        db.session.refresh(asset)
+        return asset, bool(requeued)
+
+    asset = ImageAsset(content_hash=content_hash, content_type=content_type, data=image_data)
+    db.session.add(asset)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # The same image was queued concurrently by another request
+        db.session.rollback()
+        return ImageAsset.query.filter_by(content_hash=content_hash).one(), False
+    return asset, True
+
+
+def process_batch(storage, assets, config):
+    """
+    Render and store every size of the claimed assets, recording each outcome in one commit.
+
+    Images that cannot be decoded fail immediately; storage errors are retried
+    with exponential backoff until ``IMAGE_MAX_ATTEMPTS`` is reached.
+
+    :return: Number of assets completed
+    """
+    sizes = parse_sizes(config['IMAGE_SIZES'])
+    completed = 0
+    try:
+        for asset in assets:
+            now = datetime.datetime.utcnow()
+            asset.attempts += 1
+            try:
+                rendered = generate_thumbnails(asset.data, sizes, config['IMAGE_JPEG_QUALITY'])
+            except UNREADABLE_IMAGE_ERRORS as e:
+                asset.status = 'Failed'
+                asset.last_error = f"Unreadable image: {e}"[:1000]
+                asset.data = None
+                logger.error("Image %s could not be decoded: %s", asset.id, e)
+            else:
+                try:
+                    asset.urls = {
+                        name: storage.save(f"{asset.content_hash}/{name}", data, extension)
+                        for name, (data, extension) in rendered.items()
+                    }
+                except Exception as e:
+                    asset.last_error = str(e)[:1000]
+                    if asset.attempts >= config['IMAGE_MAX_ATTEMPTS']:
+                        asset.status = 'Failed'
+                        logger.error("Giving up on storing image %s: %s", asset.id, e)
+                    else:
+                        delay = backoff_delay(asset.attempts, config['IMAGE_BACKOFF_SECONDS'],
+                                              config['IMAGE_BACKOFF_MAX_SECONDS'])
+                        asset.next_attempt_at = now + datetime.timedelta(seconds=delay)
+                else:
+                    asset.status = 'Done'
+                    asset.completed_at = now
+                    asset.last_error = None
+                    asset.data = None
+                    completed += 1
+            asset.claim_token = None
+            asset.locked_until = None
+    finally:
+        db.session.commit()
+    return completed
+
+
+def process_images(storage, config):
+    """
+    Claim and process batches until no due uploads remain.
+
+    :return: Number of assets completed
+    """
+    completed = 0
+    while True:
+        assets = claim_batch(config['IMAGE_BATCH_SIZE'], config['IMAGE_LEASE_SECONDS'], model=ImageAsset)
+        if not assets:
+            return completed
+        completed += process_batch(storage, assets, config)
+
+
+class ImageWorkerPool(OutboxWorkerPool):
+    """
+    Threads that render and store queued uploads in the background.
+
+    Pillow releases the GIL while decoding, resizing and encoding, so threads
+    use several cores for this work.
+    """
+
+    name = 'image-worker'
+    threads_setting = 'IMAGE_WORKERS'
+    poll_setting = 'IMAGE_POLL_SECONDS'
+
+    def process(self, storage):
+        return process_images(storage, self.app.config)
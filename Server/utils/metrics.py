@@ -0,0 +1,285 @@
+import atexit
+import fcntl
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from flask import g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000, math.inf)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, math.inf)
+
+# name: (type, help, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by endpoint, method and status.', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency in seconds.', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Response body size in bytes.', SIZE_BUCKETS),
+    'db_duration_seconds': ('histogram', 'Time spent in SQL per request, in seconds.', LATENCY_BUCKETS),
+    'db_queries_per_request': ('histogram', 'SQL statements run per request.', QUERY_COUNT_BUCKETS),
+}
+
+
+class MmapedValues:
+    """
+    A per-process file of named float values, updated in place through mmap.
+
+    Each gunicorn worker writes only its own file, so updates need no
+    cross-process locking and cost a memory write rather than a syscall; the
+    /metrics endpoint sums the files of all workers. Layout: an 8-byte header
+    holding the number of bytes used, then entries of
+    ``[key length: int32][key: utf-8, space padded][value: float64]`` with each
+    value 8-byte aligned.
+    """
+
+    INITIAL_SIZE = 1 << 16
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.file = open(path, 'a+b')
+        if os.fstat(self.file.fileno()).st_size == 0:
+            self.file.truncate(self.INITIAL_SIZE)
+        self.capacity = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), self.capacity)
+        self.used = struct.unpack_from('q', self.map, 0)[0] or 8
+        struct.pack_into('q', self.map, 0, self.used)
+        self.positions = {key: position for key, _, position in self._entries(self.map, self.used)}
+
+    @staticmethod
+    def _entries(buffer, used):
+        offset = 8
+        while offset < used:
+            length = struct.unpack_from('i', buffer, offset)[0]
+            key_end = offset + 4 + length
+            position = key_end + (-(4 + length) % 8)
+            key = bytes(buffer[offset + 4:key_end]).decode('utf-8')
+            yield key, struct.unpack_from('d', buffer, position)[0], position
+            offset = position + 8
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def _add_key(self, key):
+        encoded = key.encode('utf-8')
+        padded = encoded + b' ' * (-(4 + len(encoded)) % 8)
+        entry = struct.pack(f'i{len(padded)}sd', len(encoded), padded, 0.0)
+        while self.used + len(entry) > self.capacity:
+            self.capacity *= 2
+            self.map.close()
+            self.file.truncate(self.capacity)
+            self.map = mmap.mmap(self.file.fileno(), self.capacity)
+        self.map[self.used:self.used + len(entry)] = entry
+        position = self.used + len(entry) - 8
+        self.used += len(entry)
+        # Publish the entry only once it is fully written
+        struct.pack_into('q', self.map, 0, self.used)
+        self.positions[key] = position
+        return position
+
+    def inc(self, key, amount=1.0):
+        with self.lock:
+            position = self.positions.get(key)
+            if position is None:
+                position = self._add_key(key)
+            value = struct.unpack_from('d', self.map, position)[0]
+            struct.pack_into('d', self.map, position, value + amount)
+
+    @classmethod
+    def read(cls, path):
+        """Yield ``(key, value)`` for every entry in a metrics file."""
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        if len(data) < 8:
+            return
+        used = struct.unpack_from('q', data, 0)[0]
+        for key, value, _ in cls._entries(data, used):
+            yield key, value
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsStore:
+    """
+    Counters and histograms backed by one MmapedValues file per process.
+
+    Files are named ``metrics_<master pid>_<pid>.db`` after the gunicorn
+    master and the worker. When a worker exits, its values are folded into
+    ``metrics_<master pid>_archive.db``, so the totals of a running server
+    never go down. Files left by a master that is no longer running belong to
+    an earlier run of the server and are deleted. Either happens at exit, or
+    when the next process starts writing if the worker was killed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.values = None
+        self.pid = None
+        self.master = None
+
+    def _path(self, master, pid):
+        return os.path.join(self.directory, f'metrics_{master}_{pid}.db')
+
+    def _locked(self, operation):
+        """Hold an flock on the directory's lock file; merges take it exclusively, reads shared."""
+        handle = open(os.path.join(self.directory, '.lock'), 'a')
+        fcntl.flock(handle, operation)
+        return handle
+
+    def _file(self):
+        # Re-open after a fork so each worker process writes its own file
+        if self.pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            self.cleanup()
+            self.pid = os.getpid()
+            self.master = os.getppid()
+            self.values = MmapedValues(self._path(self.master, self.pid))
+            atexit.register(self.close)
+        return self.values
+
+    def _archive(self, path, master):
+        archive = MmapedValues(self._path(master, 'archive'))
+        try:
+            for key, value in MmapedValues.read(path):
+                archive.inc(key, value)
+        finally:
+            archive.close()
+        os.remove(path)
+
+    def cleanup(self):
+        """Archive the files of workers that exited and delete those of masters that did."""
+        with self._locked(fcntl.LOCK_EX):
+            for path in glob.glob(os.path.join(self.directory, 'metrics_*_*.db')):
+                master, pid = os.path.basename(path)[len('metrics_'):-len('.db')].split('_', 1)
+                if not _pid_alive(int(master)):
+                    os.remove(path)
+                elif pid != 'archive' and not _pid_alive(int(pid)):
+                    self._archive(path, master)
+
+    def close(self):
+        """Fold this process's values into its master's archive; called at exit."""
+        if self.pid != os.getpid() or self.values is None:
+            return
+        self.values.close()
+        self.values = None
+        path = self._path(self.master, self.pid)
+        if not os.path.exists(path):
+            return
+        with self._locked(fcntl.LOCK_EX):
+            self._archive(path, self.master)
+
+    def inc(self, name, labels, amount=1.0):
+        self._file().inc(json.dumps([name, '', labels], sort_keys=True), amount)
+
+    def observe(self, name, labels, value):
+        values = self._file()
+        buckets = METRICS[name][2]
+        bucket = next(bound for bound in buckets if value <= bound)
+        values.inc(json.dumps([name, f'bucket:{bucket}', labels], sort_keys=True))
+        values.inc(json.dumps([name, 'sum', labels], sort_keys=True), value)
+        values.inc(json.dumps([name, 'count', labels], sort_keys=True))
+
+    def collect(self):
+        """Sum the values written by every process, keyed by metric name."""
+        totals = defaultdict(float)
+        os.makedirs(self.directory, exist_ok=True)
+        # Shared lock: never read a file mid-merge, which would count it twice
+        with self._locked(fcntl.LOCK_SH):
+            for path in glob.glob(os.path.join(self.directory, 'metrics_*_*.db')):
+                for key, value in MmapedValues.read(path):
+                    totals[key] += value
+        metrics = defaultdict(list)
+        for key, value in totals.items():
+            name, suffix, labels = json.loads(key)
+            metrics[name].append((suffix, labels, value))
+        return metrics
+
+
+def _format_labels(labels, extra=None):
+    items = sorted(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+
+def render_metrics(store):
+    """Render every metric in the Prometheus text exposition format."""
+    collected = store.collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        samples = collected.get(name, [])
+        if kind == 'counter':
+            for _, labels, value in sorted(samples, key=lambda sample: sorted(sample[1].items())):
+                lines.append(f'{name}{_format_labels(labels)} {value:g}')
+            continue
+
+        series = defaultdict(dict)
+        for suffix, labels, value in samples:
+            series[json.dumps(labels, sort_keys=True)][suffix] = value
+        for labels_key in sorted(series):
+            labels = json.loads(labels_key)
+            values = series[labels_key]
+            cumulative = 0.0
+            for bound in buckets:
+                cumulative += values.get(f'bucket:{bound}', 0.0)
+                lines.append(f'{name}_bucket{_format_labels(labels, {"le": _format_bound(bound)})} {cumulative:g}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {values.get("sum", 0.0)!r}')
+            lines.append(f'{name}_count{_format_labels(labels)} {values.get("count", 0.0):g}')
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """
+    Record request count, latency, response size and DB time per endpoint.
+
+    Requests are labelled with the Flask endpoint (the resource), never the raw
+    URL, so ids in paths do not create new series. Values are kept in a
+    per-process mmap file under ``METRICS_DIR`` so /metrics can aggregate all
+    gunicorn workers.
+    """
+    store = MetricsStore(app.config['METRICS_DIR'])
+    app.extensions['metrics'] = store
+
+    @app.before_request
+    def start_metrics_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_metrics(response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        method = request.method
+        store.inc('http_requests_total', {'endpoint': endpoint, 'method': method,
+                                          'status': str(response.status_code)})
+        store.observe('http_request_duration_seconds', {'endpoint': endpoint, 'method': method},
+                      time.perf_counter() - started)
+        if not response.is_streamed:
+            store.observe('http_response_size_bytes', {'endpoint': endpoint, 'method': method},
+                          response.calculate_content_length() or 0)
+        stats = g.get('query_stats')
+        if stats is not None:
+            store.observe('db_duration_seconds', {'endpoint': endpoint, 'method': method}, stats.duration)
+            store.observe('db_queries_per_request', {'endpoint': endpoint, 'method': method}, stats.count)
+        return response
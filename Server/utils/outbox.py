@@ -0,0 +1,162 @@
+import datetime
+import logging
+import threading
+import uuid
+from sqlalchemy import or_, select, update
+from models import db, EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def _claimable(model, now):
+    return (
+        model.status == 'Pending',
+        model.next_attempt_at <= now,
+        or_(model.locked_until.is_(None), model.locked_until < now),
+    )
+
+
+def claim_batch(batch_size, lease_seconds, model=EmailOutbox):
+    """
+    Claim up to ``batch_size`` due messages for this worker.
+
+    Messages are stamped with a fresh claim token and a lease, so concurrent
+    workers (threads or processes) never deliver the same message twice, and a
+    message held by a worker that died becomes claimable again once the lease
+    expires.
+
+    :param model: Queue table to claim from; any model with the EmailOutbox
+        status, next_attempt_at, claim_token and locked_until columns
+    :return: List of claimed rows
+    """
+    now = datetime.datetime.utcnow()
+    ids = db.session.scalars(
+        select(model.id)
+        .where(*_claimable(model, now))
+        .order_by(model.next_attempt_at, model.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        db.session.rollback()
+        return []
+
+    token = uuid.uuid4().hex
+    db.session.execute(
+        update(model)
+        .where(model.id.in_(ids), *_claimable(model, now))
+        .values(claim_token=token, locked_until=now + datetime.timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return model.query.filter_by(claim_token=token).order_by(model.id).all()
+
+
+def backoff_delay(attempts, base_seconds, max_seconds):
+    """Exponential backoff: base, 2 * base, 4 * base, ... capped at max_seconds."""
+    return min(base_seconds * 2 ** (attempts - 1), max_seconds)
+
+
+def deliver_batch(transport, messages, config):
+    """
+    Send claimed messages and record the outcome of each in one commit.
+
+    Failed messages are rescheduled with exponential backoff until
+    ``EMAIL_OUTBOX_MAX_ATTEMPTS`` is reached, after which they are marked Failed.
+
+    :return: Number of messages delivered
+    """
+    delivered = 0
+    try:
+        for message in messages:
+            now = datetime.datetime.utcnow()
+            try:
+                transport.send(message)
+            except Exception as e:
+                message.attempts += 1
+                message.last_error = str(e)[:1000]
+                if message.attempts >= config['EMAIL_OUTBOX_MAX_ATTEMPTS']:
+                    message.status = 'Failed'
+                    logger.error("Giving up on email %s to %s: %s", message.id, message.to_email, e)
+                else:
+                    delay = backoff_delay(message.attempts, config['EMAIL_OUTBOX_BACKOFF_SECONDS'],
+                                          config['EMAIL_OUTBOX_BACKOFF_MAX_SECONDS'])
+                    message.next_attempt_at = now + datetime.timedelta(seconds=delay)
+            else:
+                message.attempts += 1
+                message.status = 'Sent'
+                message.sent_at = now
+                delivered += 1
+            message.claim_token = None
+            message.locked_until = None
+    finally:
+        close = getattr(transport, 'close', None)
+        if close is not None:
+            close()
+        db.session.commit()
+    return delivered
+
+
+def process_outbox(transport, config):
+    """
+    Claim and deliver batches until no due messages remain.
+
+    :return: Number of messages delivered
+    """
+    delivered = 0
+    while True:
+        messages = claim_batch(config['EMAIL_OUTBOX_BATCH_SIZE'], config['EMAIL_OUTBOX_LEASE_SECONDS'])
+        if not messages:
+            return delivered
+        delivered += deliver_batch(transport, messages, config)
+
+
+class OutboxWorkerPool:
+    """
+    A pool of threads that drain the email outbox in the background.
+
+    Each thread owns its own transport (SMTP connections are not thread-safe)
+    and its own app context, and sleeps for ``EMAIL_OUTBOX_POLL_SECONDS``
+    whenever the outbox is empty.
+    """
+
+    name = 'outbox-worker'
+    threads_setting = 'EMAIL_OUTBOX_WORKERS'
+    poll_setting = 'EMAIL_OUTBOX_POLL_SECONDS'
+
+    def __init__(self, app, transport_factory, threads=None):
+        self.app = app
+        self.transport_factory = transport_factory
+        self.threads = threads or app.config[self.threads_setting]
+        self.stop_event = threading.Event()
+        self.workers = []
+
+    def _run(self):
+        transport = self.transport_factory()
+        poll_seconds = self.app.config[self.poll_setting]
+        while not self.stop_event.is_set():
+            with self.app.app_context():
+                try:
+                    delivered = self.process(transport)
+                except Exception:
+                    logger.exception("%s failed", self.name)
+                    db.session.rollback()
+                    delivered = 0
+            if not delivered:
+                self.stop_event.wait(poll_seconds)
+
+    def process(self, transport):
+        """Drain everything currently due; returns the number of items handled."""
+        return process_outbox(transport, self.app.config)
+
+    def start(self):
+        for index in range(self.threads):
+            worker = threading.Thread(target=self._run, name=f"{self.name}-{index}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        for worker in self.workers:
+            worker.join(timeout)
+        self.workers = []
@@ -1,24 +1,139 @@
-from flask import request
-from flask_restful import Resource, Api
-from app import api, db
-from models import Model
-
-class ItemListResource(Resource):
-    def get(self):
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 10))
-        
-        items_query = Model.query.paginate(page, per_page, error_out=False)
-        items = items_query.items
-        
-        result = {
-            'items': [item.to_dict() for item in items],
-            'total': items_query.total,
-            'pages': items_query.pages,
-            'current_page': page,
-            'per_page': per_page
-        }
-        
-        return result
-
-api.add_resource(ItemListResource, '/items')
+import base64
+import binascii
+import json
+from flask import abort, current_app, request, url_for
+from sqlalchemy import Select, select
+from models import db
+from utils.error_handling import handle_bad_request
+from utils.filters import apply_filters, requested_columns
+from utils.serializers import compile_row_encoder, json_response
+
+
+def encode_cursor(last_id):
+    """
+    Encode the id of the last row on a page as an opaque cursor.
+
+    :param last_id: Primary key of the last row returned
+    :return: URL-safe cursor string
+    """
+    payload = json.dumps({'id': last_id}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor back into a primary key.
+
+    :param cursor: Cursor string from the ``after`` query parameter
+    :return: Primary key to resume after, or None if no cursor was given
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['id']
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError):
+        abort(handle_bad_request("Invalid pagination cursor"))
+    if not isinstance(last_id, int):
+        abort(handle_bad_request("Invalid pagination cursor"))
+    return last_id
+
+
+def get_limit():
+    """Read the ``limit`` query parameter, clamped to the configured maximum."""
+    default = current_app.config['PAGINATION_DEFAULT_LIMIT']
+    maximum = current_app.config['PAGINATION_MAX_LIMIT']
+    try:
+        limit = int(request.args.get('limit', default))
+    except ValueError:
+        abort(handle_bad_request("limit must be an integer"))
+    if limit < 1:
+        abort(handle_bad_request("limit must be a positive integer"))
+    return min(limit, maximum)
+
+
+def _page(query, key_column):
+    """
+    Fetch one keyset page of a query.
+
+    Pages are addressed by the last key seen rather than by offset, so every
+    page is a single index range scan regardless of its depth.
+
+    :param query: ORM query or Core/ORM ``select()``
+    :param key_column: Unique, indexed column to page on (usually the primary key)
+    :return: Tuple of (rows, next page URL or None)
+    """
+    limit = get_limit()
+    after = decode_cursor(request.args.get('after'))
+    if after is not None:
+        query = query.filter(key_column > after)
+
+    # Fetch one extra row to learn whether another page exists without a COUNT(*)
+    query = query.order_by(key_column).limit(limit + 1)
+    rows = db.session.execute(query).all() if isinstance(query, Select) else query.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_url = None
+    if has_more:
+        args = request.args.to_dict()
+        args.update(after=encode_cursor(getattr(rows[-1], key_column.key)), limit=limit)
+        next_url = url_for(request.endpoint, _external=True, **(request.view_args or {}), **args)
+    return rows, next_url
+
+
+def paginate(query, key_column, collection):
+    """
+    Apply keyset pagination to an ORM query and build the list response body.
+
+    :param query: SQLAlchemy query for the collection
+    :param key_column: Unique, indexed column to page on (usually the primary key)
+    :param collection: Key under which the items are returned
+    :return: Dict with ``count``, the items and a ``next`` link (None on the last page)
+    """
+    rows, next_url = _page(query, key_column)
+    items = [row.to_dict() for row in rows]
+    return {"count": len(items), collection: items, "next": next_url}
+
+
+def _column_page(model):
+    """One page of a model as a JSON array of projected rows, with its length and next link."""
+    columns = requested_columns(model)
+    stmt = apply_filters(model, select(*columns))
+    rows, next_url = _page(stmt, model.id)
+    encode_row = compile_row_encoder(columns)
+    return '[%s]' % ','.join(map(encode_row, rows)), len(rows), next_url
+
+
+def paginate_columns(model, collection):
+    """
+    Keyset-paginate a model as projected row tuples and encode the page as JSON.
+
+    Only the requested columns (``?fields=``) are selected, the filter query
+    parameters become WHERE clauses, rows are never hydrated into ORM
+    instances, and each row is rendered by the compiled encoder for the column
+    set, skipping to_dict() and jsonify entirely.
+
+    :param model: Model whose list endpoint is being served
+    :param collection: Key under which the items are returned
+    :return: JSON string with ``count``, the items and a ``next`` link
+    """
+    items, count, next_url = _column_page(model)
+    return '{"count":%d,%s:%s,"next":%s}' % (count, json.dumps(collection), items, json.dumps(next_url))
+
+
+def paginate_columns_list(model):
+    """
+    Like paginate_columns, for endpoints whose clients expect a bare JSON array.
+
+    The page is the array itself; the next page is advertised in an RFC 8288
+    ``Link: <url>; rel="next"`` header instead of the body.
+
+    :param model: Model whose list endpoint is being served
+    :return: Response with the JSON array of items
+    """
+    items, _, next_url = _column_page(model)
+    response = json_response(items)
+    if next_url is not None:
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
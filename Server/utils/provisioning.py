@@ -0,0 +1,180 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from marshmallow import ValidationError
+from sqlalchemy import insert, select
+from models import db, Course, User, Student, Teacher
+from utils.search import reindex
+from utils.validators import UserProvisionSchema
+
+
+class ProvisioningError(Exception):
+    """Raised when a batch fails; the batches before it stay committed."""
+
+    def __init__(self, created, error):
+        super().__init__(f"Stopped after creating {created} users: {error}")
+        self.created = created
+
+
+def hash_password(password, rounds, prefix, handle_long_passwords):
+    """
+    Hash a password exactly as Flask-Bcrypt's generate_password_hash does.
+
+    Kept at module level so it can be pickled into worker processes.
+    """
+    password = password.encode('utf-8')
+    if handle_long_passwords:
+        password = hashlib.sha256(password).hexdigest().encode('utf-8')
+    salt = bcrypt.gensalt(rounds=rounds, prefix=prefix.encode('utf-8'))
+    return bcrypt.hashpw(password, salt).decode('utf-8')
+
+
+def _hash_chunk(passwords, rounds, prefix, handle_long_passwords):
+    return [hash_password(password, rounds, prefix, handle_long_passwords) for password in passwords]
+
+
+def iter_password_hashes(passwords, config, processes=None, chunk_size=16):
+    """
+    Hash passwords across a process pool, yielding hashes in input order.
+
+    bcrypt is CPU-bound, so hashing is fanned out over one process per core;
+    hashes are yielded as soon as each chunk finishes so the caller can insert
+    earlier batches while later ones are still being hashed.
+
+    :param passwords: List of plain-text passwords
+    :param config: Flask config mapping (for the BCRYPT_* settings)
+    :param processes: Pool size, defaults to the number of CPUs
+    :param chunk_size: Passwords sent to a worker process per task
+    """
+    rounds = config.get('BCRYPT_LOG_ROUNDS', 12)
+    prefix = config.get('BCRYPT_HASH_PREFIX', '2b')
+    handle_long_passwords = config.get('BCRYPT_HANDLE_LONG_PASSWORDS', False)
+    chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(_hash_chunk, chunk, rounds, prefix, handle_long_passwords)
+            for chunk in chunks
+        ]
+        for future in futures:
+            yield from future.result()
+
+
+def _insert_batch(batch):
+    """Insert one batch of users and their student/teacher rows."""
+    # A plain executemany: with RETURNING, SQLite falls back to one INSERT per row.
+    # Emails are unique, so the new ids are read back by email in one query.
+    db.session.execute(
+        insert(User),
+        [{'email': row['email'], 'password': row['password'], 'role': row['role']} for row in batch],
+    )
+    user_ids = dict(db.session.execute(
+        select(User.email, User.id).where(User.email.in_([row['email'] for row in batch]))
+    ).all())
+
+    students = []
+    teachers = []
+    for row in batch:
+        user_id = user_ids[row['email']]
+        if row['role'] == 'Student':
+            students.append({
+                'user_id': user_id,
+                'name': row['name'],
+                'enrollment_date': row['enrollment_date'],
+                'date_of_birth': row['date_of_birth'],
+                'gender': row.get('gender'),
+                'phone_number': row.get('phone_number'),
+                'course_id': row['course_id'],
+            })
+        elif row['role'] == 'Teacher':
+            teachers.append({'user_id': user_id, 'name': row['name']})
+    # Core inserts bypass the ORM search sync, so index just the new people
+    for kind, model, rows in (('student', Student, students), ('teacher', Teacher, teachers)):
+        if rows:
+            db.session.execute(insert(model), rows)
+            reindex(db.session, kind, db.session.scalars(
+                select(model.id).where(model.user_id.in_([row['user_id'] for row in rows]))
+            ).all())
+    db.session.commit()
+
+
+def provision_users(records, config, processes=None, batch_size=500):
+    """
+    Create users (and their student/teacher rows) in bulk.
+
+    Records are validated with UserProvisionSchema; invalid records, unknown
+    course ids and emails that already exist are reported and skipped, all
+    before the first insert. Passwords are hashed in parallel and users are
+    inserted in batches of ``batch_size``, one commit per batch.
+
+    A run is resumable rather than all-or-nothing: if a batch fails, the
+    batches before it stay committed and ProvisioningError reports how many
+    users were created. Running the same input again creates the rest, since
+    existing emails are skipped.
+
+    :param records: Iterable of dicts with email, password, role and profile fields
+    :param config: Flask config mapping
+    :param processes: Hashing pool size, defaults to the number of CPUs
+    :param batch_size: Users inserted per transaction
+    :return: Summary dict with counts, elapsed seconds, throughput and row errors
+    :raises ProvisioningError: If a batch could not be inserted
+    """
+    start = time.perf_counter()
+    schema = UserProvisionSchema()
+    errors = []
+    valid = []
+    seen = set()
+    for index, record in enumerate(records):
+        try:
+            row = schema.load(record)
+        except ValidationError as err:
+            errors.append({'index': index, 'email': record.get('email'), 'errors': err.messages})
+            continue
+        if row['email'] in seen:
+            errors.append({'index': index, 'email': row['email'], 'errors': {'email': ['Duplicate email in input.']}})
+            continue
+        seen.add(row['email'])
+        valid.append((index, row))
+
+    course_ids = {row['course_id'] for _, row in valid if row.get('course_id') is not None}
+    known_courses = set(db.session.scalars(select(Course.id).where(Course.id.in_(course_ids))))
+
+    existing = set()
+    emails = list(seen)
+    for i in range(0, len(emails), batch_size):
+        existing.update(db.session.scalars(select(User.email).where(User.email.in_(emails[i:i + batch_size]))))
+    rows = []
+    for index, row in valid:
+        if row['email'] in existing:
+            errors.append({'index': index, 'email': row['email'], 'errors': {'email': ['User already exists.']}})
+        elif row.get('course_id') is not None and row['course_id'] not in known_courses:
+            errors.append({'index': index, 'email': row['email'], 'errors': {'course_id': ['Course does not exist.']}})
+        else:
+            rows.append(row)
+
+    created = 0
+    batch = []
+    try:
+        hashes = iter_password_hashes([row['password'] for row in rows], config, processes)
+        for row, password_hash in zip(rows, hashes):
+            batch.append(dict(row, password=password_hash))
+            if len(batch) >= batch_size:
+                _insert_batch(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            _insert_batch(batch)
+            created += len(batch)
+    except Exception as e:
+        db.session.rollback()
+        raise ProvisioningError(created, e) from e
+
+    elapsed = time.perf_counter() - start
+    return {
+        'created': created,
+        'failed': len(errors),
+        'seconds': round(elapsed, 3),
+        'users_per_second': round(created / elapsed, 1) if elapsed else None,
+        'errors': sorted(errors, key=lambda error: error['index']),
+    }
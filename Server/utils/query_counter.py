@@ -0,0 +1,119 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_collectors = ContextVar('query_collectors', default=())
+_IN_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class RepeatedQueryError(Exception):
+    """Raised when a request repeats the same statement more often than allowed."""
+
+
+def statement_shape(statement):
+    """Normalise a statement so repeats differing only in IN-list length compare equal."""
+    return _IN_LIST.sub('(?...)', _WHITESPACE.sub(' ', statement).strip())
+
+
+class QueryStats:
+    """Number, total duration and shapes of the SQL statements run in a scope."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statement shapes run more than ``threshold`` times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_start_time'].pop()
+    for stats in _collectors.get():
+        stats.record(statement, duration)
+
+
+def _listen():
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+@contextmanager
+def count_queries():
+    """
+    Collect QueryStats for every statement run inside the block, on any engine.
+
+    Blocks nest: each active block (and the current request) records the
+    statement.
+    """
+    _listen()
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+def init_query_counter(app):
+    """
+    Count the queries and SQL time of every request.
+
+    Totals are reported in a ``Server-Timing`` header. When one statement shape
+    runs more than ``QUERY_REPEAT_THRESHOLD`` times in a request (the usual
+    sign of an N+1 lazy load) a warning is logged, or RepeatedQueryError is
+    raised if ``QUERY_REPEAT_RAISE`` is set, as it should be under test.
+    """
+    _listen()
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+        g.request_started = time.perf_counter()
+        g.query_stats_token = _collectors.set(_collectors.get() + (g.query_stats,))
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        if app.config['SERVER_TIMING_ENABLED']:
+            total = (time.perf_counter() - g.request_started) * 1000
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", total;dur={total:.2f}'
+            )
+        repeated = stats.repeated(app.config['QUERY_REPEAT_THRESHOLD'])
+        if repeated:
+            shape, count = repeated[0]
+            message = f"{count} repeats of one statement in {request.endpoint}: {shape}"
+            if app.config['QUERY_REPEAT_RAISE']:
+                raise RepeatedQueryError(message)
+            logger.warning("Possible N+1 query: %s", message)
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(exc):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            _collectors.reset(token)
@@ -0,0 +1,110 @@
+import datetime
+import re
+from sqlalchemy import select
+from models import db, Student, Course, Class, Enrollment, Progress, Attendance, Grade, EmailOutbox, AttendanceSummary
+
+# The lookups the API and dashboards issue most often, with the index each
+# must be served by. A unique constraint's index has a different name on
+# SQLite (sqlite_autoindex_<table>_<n>), as does the primary key, so every
+# accepted name is listed; check_query_plans fails if a query is planned
+# without one of them.
+PRIMARY_KEY = 'INTEGER PRIMARY KEY'  # How SQLite plans a rowid range
+HOT_QUERIES = {
+    'attendance by student and date range': (('ix_attendances_student_id_date',), lambda: select(Attendance).where(
+        Attendance.student_id == 1, Attendance.date.between(datetime.date(2024, 1, 1), datetime.date(2024, 3, 31)))),
+    'attendance by class and date': (('ix_attendances_class_id_date',), lambda: select(Attendance).where(
+        Attendance.class_id == 1, Attendance.date == datetime.date(2024, 1, 1))),
+    'attendance by course and date': (('ix_attendances_course_id_date',), lambda: select(Attendance).where(
+        Attendance.course_id == 1, Attendance.date == datetime.date(2024, 1, 1))),
+    'attendance keyset page': ((PRIMARY_KEY, 'attendances_pkey'), lambda: select(Attendance).where(
+        Attendance.id > 1000).order_by(Attendance.id).limit(51)),
+    'grades by student and course': (('ix_grades_student_id_course_id',), lambda: select(Grade).where(
+        Grade.student_id == 1, Grade.course_id == 1)),
+    'grades by student': (('ix_grades_student_id_course_id',), lambda: select(Grade).where(Grade.student_id == 1)),
+    'grades by course': (('ix_grades_course_id',), lambda: select(Grade).where(Grade.course_id == 1)),
+    'grades by class': (('ix_grades_class_id',), lambda: select(Grade).where(Grade.class_id == 1)),
+    'enrollments by student': (('ix_enrollments_student_id',), lambda: select(Enrollment).where(
+        Enrollment.student_id == 1)),
+    'enrollments by class': (('ix_enrollments_class_id',), lambda: select(Enrollment).where(Enrollment.class_id == 1)),
+    'enrollments by course': (('ix_enrollments_course_id',), lambda: select(Enrollment).where(
+        Enrollment.course_id == 1)),
+    'progress by student': (('ix_progress_student_id',), lambda: select(Progress).where(Progress.student_id == 1)),
+    'students by course': (('ix_students_course_id',), lambda: select(Student).where(Student.course_id == 1)),
+    'courses by teacher': (('ix_courses_teacher_id',), lambda: select(Course).where(Course.teacher_id == 1)),
+    'classes by teacher': (('ix_classes_teacher_id',), lambda: select(Class).where(Class.teacher_id == 1)),
+    'attendance summary by student': (
+        ('uq_attendance_summaries_key', 'sqlite_autoindex_attendance_summaries_1'),
+        lambda: select(AttendanceSummary).where(AttendanceSummary.student_id == 1)),
+    'attendance summary by class': (('ix_attendance_summaries_class_id',), lambda: select(AttendanceSummary).where(
+        AttendanceSummary.class_id == 1)),
+    'due outbox emails': (('ix_email_outbox_status_next_attempt_at',), lambda: select(EmailOutbox.id).where(
+        EmailOutbox.status == 'Pending', EmailOutbox.next_attempt_at <= datetime.datetime(2024, 1, 1))),
+}
+
+
+def explain(stmt, connection=None):
+    """
+    Return the query plan for a statement as a list of lines.
+
+    Uses ``EXPLAIN QUERY PLAN`` on SQLite and ``EXPLAIN`` elsewhere. On Postgres
+    sequential scans are disabled for the transaction, so a plan only contains
+    a Seq Scan when no usable index exists (small tables would otherwise always
+    be scanned).
+
+    :param stmt: SQLAlchemy statement or SQL string
+    :param connection: Connection to run on, defaults to the session's
+    """
+    connection = connection or db.session.connection()
+    dialect = connection.dialect
+    if isinstance(stmt, str):
+        sql = stmt
+    else:
+        sql = str(stmt.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+    if dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql).all()
+        return [row[-1] for row in rows]
+
+    # Roll the savepoint back so the planner setting does not leak into the caller's transaction
+    savepoint = connection.begin_nested()
+    try:
+        if dialect.name == 'postgresql':
+            connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        rows = connection.exec_driver_sql('EXPLAIN ' + sql).all()
+    finally:
+        savepoint.rollback()
+    return [' '.join(str(value) for value in row) for row in rows]
+
+
+def find_table_scans(plan, dialect_name):
+    """Return the plan lines that read a whole table without an index."""
+    if dialect_name == 'sqlite':
+        return [line for line in plan if line.startswith('SCAN ') and ' USING ' not in line]
+    if dialect_name == 'postgresql':
+        return [line for line in plan if 'Seq Scan' in line]
+    return [line for line in plan if 'ALL' in line.split()]
+
+
+def uses_index(plan, indexes):
+    """Return whether any plan line reads through one of ``indexes``."""
+    return any(re.search(rf'\b{re.escape(index)}\b', line) for line in plan for index in indexes)
+
+
+def check_query_plans(connection=None):
+    """
+    Explain every hot query and report table scans and missing indexes.
+
+    :return: Dict mapping query name to ``{'plan': [...], 'scans': [...],
+        'indexes': (...), 'uses_index': bool}``
+    """
+    connection = connection or db.session.connection()
+    report = {}
+    for name, (indexes, build) in HOT_QUERIES.items():
+        plan = explain(build(), connection)
+        report[name] = {
+            'plan': plan,
+            'scans': find_table_scans(plan, connection.dialect.name),
+            'indexes': indexes,
+            'uses_index': uses_index(plan, indexes),
+        }
+    return report
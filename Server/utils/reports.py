@@ -0,0 +1,105 @@
+from sqlalchemy import case, func, select
+from models import db, Course, Class, Teacher, Grade, Enrollment, Attendance, AttendanceSummary
+
+GROUP_BY_CHOICES = ('course', 'class', 'teacher')
+
+
+def _grouped(columns, source, course_id, class_id, group_by):
+    """
+    Build a SELECT of ``columns`` over ``source`` grouped by course, class or teacher.
+
+    Teacher grouping attributes a row to its class's teacher, falling back to
+    the course's teacher for rows that have no class.
+
+    :return: Tuple of (statement, group id column, group name column)
+    """
+    if group_by == 'course':
+        key, name = Course.id, Course.name
+        stmt = select(key, name, *columns).select_from(source).join(Course, Course.id == course_id)
+    elif group_by == 'class':
+        key, name = Class.id, Class.name
+        stmt = select(key, name, *columns).select_from(source).join(Class, Class.id == class_id)
+    else:
+        key, name = Teacher.id, Teacher.name
+        stmt = (
+            select(key, name, *columns)
+            .select_from(source)
+            .outerjoin(Class, Class.id == class_id)
+            .outerjoin(Course, Course.id == course_id)
+            .join(Teacher, Teacher.id == func.coalesce(Class.teacher_id, Course.teacher_id))
+        )
+    return stmt.group_by(key, name).order_by(key), key, name
+
+
+def grade_distribution(group_by):
+    """
+    Count grades by letter for every course, class or teacher.
+
+    :return: List of dicts with the group id, name, total and per-grade counts
+    """
+    stmt, key, name = _grouped([Grade.grade, func.count()], Grade, Grade.course_id, Grade.class_id, group_by)
+    stmt = stmt.group_by(Grade.grade)
+
+    groups = {}
+    for group_id, group_name, grade, count in db.session.execute(stmt):
+        group = groups.setdefault(group_id, {'id': group_id, 'name': group_name, 'total': 0, 'distribution': {}})
+        group['distribution'][grade] = count
+        group['total'] += count
+    return list(groups.values())
+
+
+def attendance_rates(group_by, date_from=None, date_to=None):
+    """
+    Present/absent/late totals and attendance rate per course, class or teacher.
+
+    Without a date range this reads the pre-aggregated attendance summaries;
+    with one it aggregates the matching attendance rows directly.
+
+    :return: List of dicts with the group id, name, counts and attendance rate
+    """
+    if date_from is None and date_to is None:
+        columns = [
+            func.sum(AttendanceSummary.present),
+            func.sum(AttendanceSummary.absent),
+            func.sum(AttendanceSummary.late),
+        ]
+        stmt, _, _ = _grouped(columns, AttendanceSummary, AttendanceSummary.course_id,
+                              AttendanceSummary.class_id, group_by)
+    else:
+        columns = [
+            func.sum(case((Attendance.status == status, 1), else_=0))
+            for status in ('Present', 'Absent', 'Late')
+        ]
+        stmt, _, _ = _grouped(columns, Attendance, Attendance.course_id, Attendance.class_id, group_by)
+        if date_from is not None:
+            stmt = stmt.where(Attendance.date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Attendance.date <= date_to)
+
+    groups = []
+    for group_id, group_name, present, absent, late in db.session.execute(stmt):
+        total = present + absent + late
+        groups.append({
+            'id': group_id,
+            'name': group_name,
+            'present': present,
+            'absent': absent,
+            'late': late,
+            'total': total,
+            'attendance_rate': round((present + late) / total, 4) if total else None,
+        })
+    return groups
+
+
+def enrollment_counts(group_by):
+    """
+    Number of distinct enrolled students per course, class or teacher.
+
+    :return: List of dicts with the group id, name and student count
+    """
+    stmt, _, _ = _grouped([func.count(func.distinct(Enrollment.student_id))], Enrollment,
+                          Enrollment.course_id, Enrollment.class_id, group_by)
+    return [
+        {'id': group_id, 'name': group_name, 'students': students}
+        for group_id, group_name, students in db.session.execute(stmt)
+    ]
@@ -0,0 +1,173 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, current_app, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, select
+from models import db, TableVersion
+from utils.sql import dialect_insert
+
+
+class ResponseCache:
+    """
+    A thread-safe LRU of serialized response bodies, bounded by total bytes.
+
+    Entries are keyed by ETag, which already encodes the table versions the
+    response was built from, so stale entries are never served; they simply
+    stop being requested and age out.
+    """
+
+    def __init__(self, max_bytes, max_entries):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, body, mimetype):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[0])
+            self.entries[key] = (body, mimetype)
+            self.size += len(body)
+            while self.size > self.max_bytes or len(self.entries) > self.max_entries:
+                _, (evicted, _) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+def _written_tables(session):
+    return session.info.setdefault('written_tables', set())
+
+
+def _track_flush(session, flush_context):
+    tables = _written_tables(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tables.add(obj.__table__.name)
+
+
+def _track_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = orm_execute_state.statement.table
+        if table.name != TableVersion.__tablename__:
+            _written_tables(orm_execute_state.session).add(table.name)
+
+
+def _collect_written_tables(session):
+    """Flush, then set aside the tables this transaction wrote for _bump_versions."""
+    session.flush()
+    tables = session.info.pop('written_tables', set())
+    tables.discard(TableVersion.__tablename__)
+    if tables:
+        session.info['committing_tables'] = tables
+
+
+def _bump_versions(session):
+    """
+    Increment the version of every table the committed transaction wrote.
+
+    Runs after the commit in its own short transaction, so writers hold the
+    hot ``table_versions`` rows for one statement rather than for their whole
+    transaction and do not serialize on them.
+    """
+    tables = session.info.pop('committing_tables', None)
+    if not tables:
+        return
+    stmt = dialect_insert(TableVersion)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TableVersion.table_name],
+        set_={'version': TableVersion.version + 1},
+    )
+    with db.engine.begin() as connection:
+        connection.execute(stmt, [{'table_name': table, 'version': 1} for table in sorted(tables)])
+
+
+def _discard_tracking(session):
+    session.info.pop('written_tables', None)
+    session.info.pop('committing_tables', None)
+
+
+def init_response_cache(app):
+    """
+    Set up the in-process response cache and table version tracking.
+
+    Every commit that wrote to a table bumps that table's row in
+    ``table_versions`` right after it commits, so all gunicorn workers see the
+    new version (and stop serving cached responses built from the old one)
+    moments after the write is visible. A response computed in between is
+    cached under the old version and simply rebuilt once the bump lands.
+    """
+    app.extensions['response_cache'] = ResponseCache(
+        app.config['RESPONSE_CACHE_MAX_BYTES'],
+        app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+    )
+    if not event.contains(Session, 'after_commit', _bump_versions):
+        event.listen(Session, 'after_flush', _track_flush)
+        event.listen(Session, 'do_orm_execute', _track_execute)
+        event.listen(Session, 'before_commit', _collect_written_tables)
+        event.listen(Session, 'after_commit', _bump_versions)
+        event.listen(Session, 'after_rollback', _discard_tracking)
+
+
+def table_versions(tables):
+    """Current version of each table, 0 for tables never written."""
+    rows = dict(db.session.execute(
+        select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+    ).all())
+    return tuple(rows.get(table, 0) for table in tables)
+
+
+def cached(*tables):
+    """
+    Serve a GET handler through the response cache.
+
+    The ETag is derived from the request URL and the versions of ``tables``:
+    a matching If-None-Match gets a 304, a cached body for the same ETag is
+    returned without calling the handler, and otherwise the handler runs and
+    its 200 response is cached. Any commit that writes one of ``tables``
+    changes the ETag, which invalidates all cached responses built from it.
+
+    :param tables: Names of the tables the response is built from
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            if not current_app.config['RESPONSE_CACHE_ENABLED']:
+                return method(*args, **kwargs)
+
+            versions = table_versions(tables)
+            key = f"{request.host}{request.full_path}|{versions}"
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                cache = current_app.extensions['response_cache']
+                entry = cache.get(etag)
+                if entry is not None:
+                    response = Response(entry[0], status=200, mimetype=entry[1])
+                else:
+                    response = current_app.make_response(method(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    cache.set(etag, response.get_data(), response.mimetype)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
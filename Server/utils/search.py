@@ -0,0 +1,271 @@
+import re
+import sys
+from flask_sqlalchemy.session import Session
+from sqlalchemy import bindparam, delete, event, func, insert, literal, select, text
+from models import db, User, Student, Teacher, Course, StudentProfile, SearchDocument
+
+SEARCH_KINDS = ('student', 'teacher', 'course')
+SOURCE_MODELS = {'student': Student, 'teacher': Teacher, 'course': Course}
+MIN_QUERY_LENGTH = 2
+BATCH_SIZE = 500
+# Typo matching only uses trigrams found in at most this many documents
+FUZZY_MAX_DOCUMENTS = 2000
+FUZZY_MAX_TRIGRAMS = 8
+
+
+def _document_select(kind):
+    """SELECT producing the (kind, record_id, title, body) search rows for one kind."""
+    if kind == 'student':
+        body = func.coalesce(User.email, '') + ' ' + func.coalesce(StudentProfile.enrollment_number, '')
+        return (
+            select(literal('student'), Student.id, Student.name, body)
+            .select_from(Student)
+            .outerjoin(User, User.id == Student.user_id)
+            .outerjoin(StudentProfile, StudentProfile.student_id == Student.id)
+        )
+    if kind == 'teacher':
+        return (
+            select(literal('teacher'), Teacher.id, Teacher.name, func.coalesce(User.email, ''))
+            .select_from(Teacher)
+            .outerjoin(User, User.id == Teacher.user_id)
+        )
+    return select(literal('course'), Course.id, Course.name, func.coalesce(Course.description, ''))
+
+
+def reindex(session, kind, record_ids=None):
+    """
+    Rebuild the search documents of ``kind``, for ``record_ids`` or for every record.
+
+    Documents are deleted and re-inserted with one INSERT ... SELECT per batch,
+    so records that no longer exist simply drop out of the index.
+    """
+    columns = ['kind', 'record_id', 'title', 'body']
+    if record_ids is None:
+        session.execute(delete(SearchDocument).where(SearchDocument.kind == kind))
+        session.execute(insert(SearchDocument).from_select(columns, _document_select(kind)))
+        return
+    record_ids = sorted(record_ids)
+    model = SOURCE_MODELS[kind]
+    for start in range(0, len(record_ids), BATCH_SIZE):
+        batch = record_ids[start:start + BATCH_SIZE]
+        session.execute(
+            delete(SearchDocument).where(SearchDocument.kind == kind, SearchDocument.record_id.in_(batch))
+        )
+        session.execute(
+            insert(SearchDocument).from_select(columns, _document_select(kind).where(model.id.in_(batch)))
+        )
+
+
+def rebuild_search_index():
+    """Rebuild every search document; for bulk loads that bypass the ORM."""
+    for kind in SEARCH_KINDS:
+        reindex(db.session, kind)
+    return db.session.scalar(select(func.count()).select_from(SearchDocument))
+
+
+def _pending(session):
+    return session.info.setdefault('search_pending', {})
+
+
+def _track_flush(session, flush_context):
+    pending = _pending(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Student):
+            pending.setdefault('student', set()).add(obj.id)
+        elif isinstance(obj, Teacher):
+            pending.setdefault('teacher', set()).add(obj.id)
+        elif isinstance(obj, Course):
+            pending.setdefault('course', set()).add(obj.id)
+        elif isinstance(obj, StudentProfile):
+            pending.setdefault('student', set()).add(obj.student_id)
+        elif isinstance(obj, User):
+            pending.setdefault('user', set()).add(obj.id)
+
+
+def _sync_documents(session):
+    """Reindex the records written in this transaction, as part of it."""
+    session.flush()
+    pending = session.info.pop('search_pending', None)
+    if not pending:
+        return
+    user_ids = pending.pop('user', None)
+    if user_ids:
+        # An email change shows up in the owning student's or teacher's document
+        for kind, model in (('student', Student), ('teacher', Teacher)):
+            ids = session.scalars(select(model.id).where(model.user_id.in_(user_ids))).all()
+            pending.setdefault(kind, set()).update(ids)
+    for kind, record_ids in pending.items():
+        record_ids.discard(None)
+        if record_ids:
+            reindex(session, kind, record_ids)
+
+
+def _discard_pending(session):
+    session.info.pop('search_pending', None)
+
+
+def init_search(app):
+    """
+    Keep the search index in step with ORM writes to its source tables.
+
+    Affected records are collected on flush and their documents rebuilt just
+    before commit, inside the same transaction. This listener goes first so
+    the response cache sees the search_documents write. Core bulk inserts
+    bypass the ORM and call rebuild_search_index() instead.
+    """
+    if not event.contains(Session, 'before_commit', _sync_documents):
+        event.listen(Session, 'after_flush', _track_flush)
+        event.listen(Session, 'before_commit', _sync_documents, insert=True)
+        event.listen(Session, 'after_rollback', _discard_pending)
+
+
+def _words(query):
+    return [word for word in re.split(r'[^\w@.+-]+', query.lower()) if word]
+
+
+def _trigrams(words):
+    return sorted({word[i:i + 3] for word in words for i in range(len(word) - 2)})
+
+
+def _fts_phrase(value):
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _columns(match):
+    return (SearchDocument.kind, SearchDocument.record_id, SearchDocument.title, SearchDocument.body,
+            literal(match))
+
+
+def _prefix_upper_bound(prefix):
+    """
+    The smallest string after every string starting with ``prefix``.
+
+    Trailing U+10FFFF characters cannot be incremented, so they are dropped
+    first; a prefix made only of them has no bound (every greater string
+    starts with it) and gives None.
+    """
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    code = ord(stripped[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # Surrogates cannot be encoded, so U+D7FF is followed by U+E000
+        code = 0xE000
+    return stripped[:-1] + chr(code)
+
+
+def _prefix_matches(query, kinds, limit):
+    """
+    Documents whose title starts with the query, in title order.
+
+    Each kind is a range scan of the (kind, lower(title)) index that stops
+    after ``limit`` rows; the per-kind lists are then merged.
+    """
+    prefix = query.lower()
+    upper = _prefix_upper_bound(prefix)
+    title = func.lower(SearchDocument.title)
+    in_range = [title >= prefix] if upper is None else [title >= prefix, title < upper]
+    rows = []
+    for kind in kinds:
+        rows += db.session.execute(
+            select(*_columns('prefix'))
+            .where(SearchDocument.kind == kind, *in_range)
+            .order_by(title, SearchDocument.id)
+            .limit(limit)
+        ).all()
+    return sorted(rows, key=lambda row: row[2].lower())[:limit]
+
+
+def _fts_matches(match, kinds, limit, label):
+    # Names are weighted ten times higher than emails, numbers and descriptions;
+    # .columns() marks the text as a query, so GET requests can run it on a replica
+    stmt = text(
+        "SELECT d.kind, d.record_id, d.title, d.body, :label "
+        "FROM search_documents_fts JOIN search_documents AS d ON d.id = search_documents_fts.rowid "
+        "WHERE search_documents_fts MATCH :match AND d.kind IN :kinds "
+        "ORDER BY bm25(search_documents_fts, 10.0, 1.0) LIMIT :limit"
+    ).bindparams(bindparam('kinds', expanding=True)).columns()
+    return db.session.execute(stmt, {'match': match, 'kinds': list(kinds), 'limit': limit, 'label': label}).all()
+
+
+def _rare_trigrams(trigrams):
+    """
+    The most selective of ``trigrams``, using the FTS vocabulary's document counts.
+
+    Trigrams shared by a large share of documents add little to the ranking but
+    make every OR query score most of the index, so they are left out.
+    """
+    stmt = text(
+        "SELECT term, doc FROM search_documents_fts_vocab WHERE term IN :terms"
+    ).bindparams(bindparam('terms', expanding=True)).columns()
+    counts = sorted((doc, term) for term, doc in db.session.execute(stmt, {'terms': trigrams}))
+    rare = [term for doc, term in counts if doc <= FUZZY_MAX_DOCUMENTS]
+    return (rare or [term for _, term in counts])[:FUZZY_MAX_TRIGRAMS]
+
+
+def _search_sqlite(words, kinds, limit):
+    long_words = [word for word in words if len(word) >= 3]
+    if not long_words:
+        return []
+    # Every word as a substring: covers the middle of names, emails and enrollment numbers
+    rows = _fts_matches(' AND '.join(_fts_phrase(word) for word in long_words), kinds, limit, 'substring')
+    if rows:
+        return rows
+    # Nothing contains the words, so look for the documents sharing most trigrams with them
+    trigrams = _rare_trigrams(_trigrams(long_words))
+    if not trigrams:
+        return []
+    return _fts_matches(' OR '.join(_fts_phrase(trigram) for trigram in trigrams), kinds, limit, 'fuzzy')
+
+
+def _search_postgresql(query, kinds, limit):
+    document = SearchDocument.title + ' ' + SearchDocument.body
+    pattern = '%' + query.replace('\\', '\\\\').replace('%', r'\%').replace('_', r'\_') + '%'
+    rows = db.session.execute(
+        select(*_columns('substring'))
+        .where(document.ilike(pattern), SearchDocument.kind.in_(kinds))
+        .order_by(func.word_similarity(query, document).desc())
+        .limit(limit)
+    ).all()
+    if rows:
+        return rows
+    # %> is pg_trgm word similarity above pg_trgm.word_similarity_threshold
+    return db.session.execute(
+        select(*_columns('fuzzy'))
+        .where(document.op('%>')(query), SearchDocument.kind.in_(kinds))
+        .order_by(func.word_similarity(query, document).desc())
+        .limit(limit)
+    ).all()
+
+
+def search(query, kinds=SEARCH_KINDS, limit=20):
+    """
+    Ranked search over students, teachers and courses.
+
+    Results come in three tiers, each only filling what the previous one left:
+    titles starting with the query (so names complete as the user types), then
+    documents containing every word anywhere (names, emails, enrollment
+    numbers, course descriptions), and only when nothing contains the words,
+    documents sharing the most trigrams with them, which tolerates typos.
+
+    :param query: Search text, at least MIN_QUERY_LENGTH characters
+    :param kinds: Document types to include
+    :param limit: Maximum number of results
+    :return: List of result dicts with type, id, title, subtitle and match tier
+    """
+    query = query.strip()
+    rows = _prefix_matches(query, kinds, limit)
+    if len(rows) < limit:
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            more = _search_sqlite(_words(query), kinds, limit)
+        elif dialect == 'postgresql':
+            more = _search_postgresql(query, kinds, limit)
+        else:
+            more = []
+        seen = {(row[0], row[1]) for row in rows}
+        rows += [row for row in more if (row[0], row[1]) not in seen][:limit - len(rows)]
+    return [
+        {'type': kind, 'id': record_id, 'title': title, 'subtitle': body, 'match': match}
+        for kind, record_id, title, body, match in rows
+    ]
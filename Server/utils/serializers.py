@@ -0,0 +1,81 @@
+import datetime
+import json
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime, Float, Integer, Numeric
+from models import User, Student, Teacher, Course, Class, Grade, Enrollment, Attendance, Progress
+
+# Columns exposed by each model's list endpoint, in the same shape as to_dict()
+SERIALIZED_COLUMNS = {
+    User: (User.id, User.email, User.role),
+    Student: (Student.id, Student.user_id, Student.name, Student.enrollment_date, Student.date_of_birth,
+              Student.gender, Student.phone_number, Student.course_id),
+    Teacher: (Teacher.id, Teacher.user_id, Teacher.name),
+    Course: (Course.id, Course.name, Course.description, Course.schedule, Course.teacher_id),
+    Class: (Class.id, Class.name, Class.description, Class.schedule, Class.teacher_id, Class.credits),
+    Grade: (Grade.id, Grade.student_id, Grade.course_id, Grade.class_id, Grade.grade, Grade.term),
+    Enrollment: (Enrollment.id, Enrollment.student_id, Enrollment.course_id, Enrollment.class_id),
+    Attendance: (Attendance.id, Attendance.student_id, Attendance.course_id, Attendance.class_id,
+                 Attendance.date, Attendance.status),
+    Progress: (Progress.id, Progress.student_id, Progress.course_id, Progress.class_id,
+               Progress.progress_percentage),
+}
+
+
+def _encode_float(value):
+    return json.dumps(value)
+
+
+def _value_expression(column, name):
+    """Python source that renders the JSON for one (non-None) column value."""
+    column_type = column.type
+    if isinstance(column_type, Integer):
+        return f"str({name})"
+    if isinstance(column_type, (Float, Numeric)):
+        return f"_encode_float({name})"
+    if isinstance(column_type, (Date, DateTime)):
+        return f"'\"' + {name}.isoformat() + '\"'"
+    return f"_encode_str({name})"
+
+
+@lru_cache(maxsize=128)
+def compile_row_encoder(columns):
+    """
+    Build a function that renders one row tuple of ``columns`` as a JSON object.
+
+    The function is generated once per column set with the keys baked in as
+    literals and one type-specific expression per column, so encoding a row
+    costs a single string concatenation instead of building and walking a
+    dict. Dates and datetimes are rendered in ISO 8601.
+
+    :param columns: Tuple of SQLAlchemy columns, in the order they are selected
+    :return: Callable taking a row tuple and returning a JSON string
+    """
+    names = [f"v{index}" for index in range(len(columns))]
+    parts = []
+    for index, (column, name) in enumerate(zip(columns, names)):
+        key = encode_basestring_ascii(column.key)
+        prefix = ('{' if index == 0 else ',') + key + ':'
+        parts.append(f"{prefix!r} + ('null' if {name} is None else {_value_expression(column, name)})")
+    body = ' + '.join(parts) + " + '}'" if parts else "'{}'"
+    source = f"def encode_row(row):\n    {', '.join(names)}, = row\n    return {body}\n"
+    namespace = {'_encode_str': encode_basestring_ascii, '_encode_float': _encode_float}
+    exec(source, namespace)
+    return namespace['encode_row']
+
+
+def json_response(body, status=200):
+    """Wrap an already-encoded JSON string in a response."""
+    return Response(body, status=status, mimetype='application/json')
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that renders dates as ISO 8601 instead of HTTP dates."""
+
+    @staticmethod
+    def default(value):
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        return DefaultJSONProvider.default(value)
@@ -0,0 +1,160 @@
+import collections
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from logging.handlers import WatchedFileHandler
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.query_plans import find_table_scans
+
+logger = logging.getLogger('slow_queries')
+EXPLAINABLE = ('select', 'with', 'update', 'delete', 'insert')
+
+
+def parameter_shape(parameters, executemany):
+    """Describe bound parameters by type only, so no values end up in the log."""
+    if executemany:
+        rows = list(parameters)
+        return {'rows': len(rows), 'row': parameter_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+class SlowQueryRecorder:
+    """
+    Capture statements slower than a threshold, with their query plan.
+
+    Records go to a bounded in-process ring buffer and, when a log file is
+    configured, to a JSON-lines log shared by all workers.
+    """
+
+    def __init__(self, threshold_ms, buffer_size, explain=True):
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self.records = collections.deque(maxlen=buffer_size)
+        self.lock = threading.Lock()
+
+    def _plan(self, conn, cursor, statement, parameters):
+        if not statement.lstrip().lower().startswith(EXPLAINABLE):
+            return None, None
+        dialect = conn.dialect.name
+        prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+        # Use a raw DBAPI cursor so the EXPLAIN itself is not instrumented. It runs in
+        # the caller's transaction, so outside SQLite it is wrapped in a savepoint: a
+        # failing EXPLAIN would otherwise abort the transaction on Postgres.
+        savepoint = dialect != 'sqlite'
+        explain_cursor = cursor.connection.cursor()
+        try:
+            if savepoint:
+                explain_cursor.execute('SAVEPOINT slow_query_explain')
+            try:
+                explain_cursor.execute(prefix + statement, parameters)
+                rows = explain_cursor.fetchall()
+            except Exception as e:
+                if savepoint:
+                    explain_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                return [f"EXPLAIN failed: {e}"], None
+            finally:
+                if savepoint:
+                    explain_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        finally:
+            explain_cursor.close()
+        if dialect == 'sqlite':
+            plan = [row[-1] for row in rows]
+        else:
+            plan = [' '.join(str(value) for value in row) for row in rows]
+        return plan, find_table_scans(plan, dialect)
+
+    def record(self, conn, cursor, statement, parameters, executemany, duration):
+        plan = scans = None
+        if self.explain and not executemany:
+            plan, scans = self._plan(conn, cursor, statement, parameters)
+        entry = {
+            'timestamp': datetime.datetime.utcnow().isoformat() + 'Z',
+            'duration_ms': round(duration * 1000, 3),
+            'statement': statement,
+            'parameters': parameter_shape(parameters, executemany),
+            'route': f"{request.method} {request.endpoint}" if has_request_context() else None,
+            'plan': plan,
+            'table_scans': scans,
+        }
+        with self.lock:
+            self.records.append(entry)
+        logger.warning(json.dumps(entry))
+
+    def recent(self, limit):
+        if limit < 1:
+            return []
+        with self.lock:
+            return list(self.records)[-limit:][::-1]
+
+
+def read_log(path, limit):
+    """Newest ``limit`` records from the slow-query log file (all workers)."""
+    if limit < 1 or not path or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as handle:
+        handle.seek(0, os.SEEK_END)
+        position = handle.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= limit:
+            step = min(65536, position)
+            position -= step
+            handle.seek(position)
+            data = handle.read(step) + data
+    lines = [line for line in data.decode('utf-8', 'replace').splitlines() if line.strip()]
+    records = []
+    for line in reversed(lines):
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+        if len(records) >= limit:
+            break
+    return records
+
+
+def init_slow_query_log(app):
+    """
+    Record slow statements on every engine, configured by the SLOW_QUERY_* settings.
+
+    ``SLOW_QUERY_LOG_FILE`` is appended to by all workers and is not rotated
+    by the app; rotate it with logrotate or similar (``create`` mode, not
+    ``copytruncate``).
+    """
+    if app.config['SLOW_QUERY_THRESHOLD_MS'] <= 0:
+        return
+    recorder = SlowQueryRecorder(
+        app.config['SLOW_QUERY_THRESHOLD_MS'],
+        app.config['SLOW_QUERY_BUFFER_SIZE'],
+        explain=app.config['SLOW_QUERY_EXPLAIN'],
+    )
+    app.extensions['slow_queries'] = recorder
+
+    log_file = app.config['SLOW_QUERY_LOG_FILE']
+    if log_file and not logger.handlers:
+        # Every worker appends to the same file, so none of them may rotate it: rotate
+        # externally (e.g. logrotate) and each worker reopens the file once it moves
+        handler = WatchedFileHandler(log_file)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def check_duration(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['slow_query_start_time'].pop()
+        if duration >= recorder.threshold:
+            try:
+                recorder.record(conn, cursor, statement, parameters, executemany, duration)
+            except Exception:
+                logging.getLogger(__name__).exception("Failed to record slow query")
@@ -0,0 +1,17 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db
+
+
+def dialect_insert(model):
+    """
+    Return an INSERT for ``model`` that supports ``on_conflict_do_update``.
+
+    Upserts are only available through the dialect-specific insert constructs,
+    so this picks the one matching the bound database.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upserts are not supported on {dialect}")
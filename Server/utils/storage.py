@@ -0,0 +1,65 @@
+import os
+import tempfile
+import cloudinary
+import cloudinary.uploader
+
+
+class CloudinaryStorage:
+    """Store images in Cloudinary under a folder, keyed by public id."""
+
+    def __init__(self, cloud_name, api_key, api_secret, folder):
+        self.folder = folder
+        cloudinary.config(cloud_name=cloud_name, api_key=api_key, api_secret=api_secret)
+
+    def save(self, key, data, extension):
+        # Keys are content-addressed, so an existing object already has these bytes
+        result = cloudinary.uploader.upload(
+            data,
+            folder=self.folder,
+            public_id=key,
+            format=extension,
+            overwrite=False,
+            resource_type='image'
+        )
+        return result['secure_url']
+
+
+class LocalStorage:
+    """Write images under a directory served by the app; a stand-in for local development."""
+
+    def __init__(self, directory, base_url):
+        self.directory = directory
+        self.base_url = base_url.rstrip('/')
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, key, data, extension):
+        name = f"{key}.{extension}"
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so a concurrent reader never sees a partial file
+            handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(handle, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        return f"{self.base_url}/{name}"
+
+
+def get_storage(config):
+    """
+    Build the image storage backend selected by ``IMAGE_STORAGE`` in the app config.
+
+    :param config: Flask config mapping
+    :return: Storage instance exposing ``save(key, data, extension)`` that returns a URL
+    """
+    name = config['IMAGE_STORAGE']
+    if name == 'cloudinary':
+        return CloudinaryStorage(
+            config['CLOUDINARY_CLOUD_NAME'],
+            config['CLOUDINARY_API_KEY'],
+            config['CLOUDINARY_API_SECRET'],
+            config['IMAGE_FOLDER']
+        )
+    if name == 'local':
+        return LocalStorage(config['IMAGE_LOCAL_DIR'], config['IMAGE_LOCAL_BASE_URL'])
+    raise ValueError(f"Unknown IMAGE_STORAGE '{name}'")
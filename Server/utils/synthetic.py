@@ -0,0 +1,258 @@
+import datetime
+import itertools
+import random
+import re
+from faker import Faker
+from sqlalchemy import func, insert, select
+from models import db, User, Student, Teacher, Course, Class, Grade, Enrollment, Attendance, StudentProfile, Progress
+from utils.attendance_bitmap import rebuild_attendance_bitmaps
+from utils.attendance_summary import rebuild_attendance_summaries
+from utils.provisioning import hash_password
+from utils.search import rebuild_search_index
+
+# The accounts seed.py has always created, so existing logins keep working
+DEMO_ACCOUNTS = (
+    ('admin@example.com', 'adminpass', 'Admin'),
+    ('teacher@example.com', 'teacherpass', 'Teacher'),
+    ('student@example.com', 'studentpass', 'Student'),
+)
+SYNTHETIC_PASSWORD = 'password123'
+
+SUBJECTS = (
+    'Mathematics', 'English', 'Biology', 'Chemistry', 'Physics', 'History', 'Geography',
+    'Computer Science', 'Business Studies', 'Art and Design', 'Music', 'Physical Education',
+)
+GRADES = ('A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D', 'E')
+TERMS_PER_YEAR = 3
+CREDITS = (1.0, 1.0, 1.5, 0.5)
+SCHEDULES = ('MWF 8-9 AM', 'MWF 9-10 AM', 'MWF 11-12 AM', 'TTh 8-10 AM', 'TTh 10-12 AM', 'TTh 2-4 PM')
+
+
+def school_days(year):
+    """Weekdays of the academic year starting in September of ``year``, minus the winter break."""
+    day = datetime.date(year, 9, 1)
+    end = datetime.date(year + 1, 6, 30)
+    winter_break = (datetime.date(year, 12, 20), datetime.date(year + 1, 1, 4))
+    days = []
+    while day <= end:
+        if day.weekday() < 5 and not winter_break[0] <= day <= winter_break[1]:
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def _slug(value):
+    return re.sub(r'[^a-z0-9]+', '.', value.lower()).strip('.')
+
+
+def _insert_with_ids(model, rows):
+    """
+    Insert rows in one executemany and return their new ids, in input order.
+
+    RETURNING would make SQLite run one INSERT per row, so the rows go in as a
+    plain executemany and the ids are read back as the range above the previous
+    highest id. That relies on the generator being the only writer, as it is
+    when seeding.
+    """
+    if not rows:
+        return []
+    last_id = db.session.scalar(select(func.max(model.id))) or 0
+    db.session.execute(insert(model), rows)
+    ids = db.session.scalars(select(model.id).where(model.id > last_id).order_by(model.id)).all()
+    if len(ids) != len(rows):
+        raise RuntimeError(f"{model.__tablename__} was written to while the synthetic data was generated")
+    return ids
+
+
+def _insert_batches(model, rows, batch_size):
+    """Insert an iterable of row dicts with one executemany and commit per batch."""
+    rows = iter(rows)
+    inserted = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return inserted
+        db.session.execute(insert(model), batch)
+        db.session.commit()
+        inserted += len(batch)
+
+
+def generate_dataset(config, schools=1, teachers=10, students=200, courses=5, classes=20,
+                     classes_per_student=4, years=1, start_year=2023, seed=42, batch_size=10000,
+                     echo=print):
+    """
+    Fill the database with a realistic synthetic school dataset.
+
+    Everything is derived from ``seed``, so the same arguments (and Faker
+    version) always produce the same rows. Rows are built as plain dicts and
+    written with Core ``insert()`` executemany in batches of ``batch_size``;
+    attendance is streamed, so memory stays flat however many years are
+    generated. bcrypt runs once per distinct password, not once per user:
+    every synthetic account shares ``SYNTHETIC_PASSWORD``.
+
+    The schema has no school table, so a school is a group of teachers,
+    students, courses and classes sharing an email domain and name prefix.
+    Counts other than ``schools`` are per school.
+
+    :param config: Flask config mapping (for the BCRYPT_* settings)
+    :param echo: Callable receiving progress messages, or None for silence
+    :return: Dict mapping table names to the number of rows inserted
+    """
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    echo = echo or (lambda message: None)
+
+    rounds = config.get('BCRYPT_LOG_ROUNDS', 12)
+    prefix = config.get('BCRYPT_HASH_PREFIX', '2b')
+    handle_long_passwords = config.get('BCRYPT_HANDLE_LONG_PASSWORDS', False)
+    synthetic_hash = hash_password(SYNTHETIC_PASSWORD, rounds, prefix, handle_long_passwords)
+    counts = {}
+
+    # Demo accounts, then every teacher and student user, keyed by school
+    demo_ids = _insert_with_ids(User, [
+        {'email': email, 'password': hash_password(password, rounds, prefix, handle_long_passwords), 'role': role}
+        for email, password, role in DEMO_ACCOUNTS
+    ])
+    demo_teacher_user, demo_student_user = demo_ids[1], demo_ids[2]
+
+    school_domains = []
+    teacher_rows, student_rows = [], []
+    user_rows = []
+    for school in range(schools):
+        domain = f"{_slug(fake.last_name())}{school + 1}.example.edu"
+        school_domains.append(domain)
+        for index in range(teachers):
+            name = fake.name()
+            user_rows.append({'email': f"{_slug(name)}.t{len(user_rows)}@{domain}",
+                              'password': synthetic_hash, 'role': 'Teacher'})
+            teacher_rows.append({'school': school, 'name': name})
+        for index in range(students):
+            gender = rng.choice(('Female', 'Male'))
+            name = fake.name_female() if gender == 'Female' else fake.name_male()
+            user_rows.append({'email': f"{_slug(name)}.s{len(user_rows)}@{domain}",
+                              'password': synthetic_hash, 'role': 'Student'})
+            student_rows.append({'school': school, 'name': name, 'gender': gender})
+    user_ids = []
+    for start in range(0, len(user_rows), batch_size):
+        user_ids.extend(_insert_with_ids(User, user_rows[start:start + batch_size]))
+    teacher_user_ids = [user_id for user_id, row in zip(user_ids, user_rows) if row['role'] == 'Teacher']
+    student_user_ids = [user_id for user_id, row in zip(user_ids, user_rows) if row['role'] == 'Student']
+    counts['users'] = len(demo_ids) + len(user_ids)
+
+    # The demo teacher and student join the first school
+    teacher_rows.insert(0, {'school': 0, 'name': fake.name()})
+    teacher_user_ids.insert(0, demo_teacher_user)
+    student_rows.insert(0, {'school': 0, 'name': fake.name_female(), 'gender': 'Female'})
+    student_user_ids.insert(0, demo_student_user)
+
+    teacher_ids = _insert_with_ids(Teacher, [
+        {'user_id': user_id, 'name': row['name']} for user_id, row in zip(teacher_user_ids, teacher_rows)
+    ])
+    teachers_by_school = [[] for _ in range(schools)]
+    for teacher_id, row in zip(teacher_ids, teacher_rows):
+        teachers_by_school[row['school']].append(teacher_id)
+    counts['teachers'] = len(teacher_ids)
+
+    course_rows, class_rows = [], []
+    for school in range(schools):
+        subjects = rng.sample(SUBJECTS, min(courses, len(SUBJECTS)))
+        subjects += [f"{rng.choice(SUBJECTS)} {index + 2}" for index in range(courses - len(subjects))]
+        for subject in subjects:
+            course_rows.append({'name': subject, 'description': fake.sentence(nb_words=10),
+                                'schedule': rng.choice(SCHEDULES),
+                                'teacher_id': rng.choice(teachers_by_school[school]), 'school': school})
+        for index in range(classes):
+            class_rows.append({'name': f"{rng.choice(SUBJECTS)} {index // 4 + 1}{'ABCD'[index % 4]}",
+                               'description': f"Room {rng.randint(1, 40)}, {school_domains[school]}",
+                               'schedule': rng.choice(SCHEDULES),
+                               'teacher_id': rng.choice(teachers_by_school[school]),
+                               'credits': CREDITS[index % len(CREDITS)], 'school': school})
+    course_ids = _insert_with_ids(Course, [{k: v for k, v in row.items() if k != 'school'} for row in course_rows])
+    class_ids = _insert_with_ids(Class, [{k: v for k, v in row.items() if k != 'school'} for row in class_rows])
+    courses_by_school = [[] for _ in range(schools)]
+    classes_by_school = [[] for _ in range(schools)]
+    for course_id, row in zip(course_ids, course_rows):
+        courses_by_school[row['school']].append(course_id)
+    for class_id, row in zip(class_ids, class_rows):
+        classes_by_school[row['school']].append(class_id)
+    counts['courses'], counts['classes'] = len(course_ids), len(class_ids)
+
+    enrollment_date = datetime.date(start_year, 9, 1)
+    student_inserts = []
+    for user_id, row in zip(student_user_ids, student_rows):
+        row['course_id'] = rng.choice(courses_by_school[row['school']])
+        row['classes'] = rng.sample(classes_by_school[row['school']],
+                                    min(classes_per_student, len(classes_by_school[row['school']])))
+        # Per-student tendencies, so reports and rankings have a realistic spread
+        row['attendance'] = rng.uniform(0.78, 0.99)
+        row['ability'] = rng.gauss(0.0, 1.0)
+        student_inserts.append({
+            'user_id': user_id,
+            'name': row['name'],
+            'enrollment_date': enrollment_date,
+            'date_of_birth': datetime.date(start_year - rng.randint(14, 18), rng.randint(1, 12), rng.randint(1, 28)),
+            'gender': row['gender'],
+            'phone_number': fake.numerify('07## ### ###'),
+            'course_id': row['course_id'],
+        })
+    student_ids = []
+    for start in range(0, len(student_inserts), batch_size):
+        student_ids.extend(_insert_with_ids(Student, student_inserts[start:start + batch_size]))
+    for student_id, row in zip(student_ids, student_rows):
+        row['id'] = student_id
+    db.session.commit()
+    counts['students'] = len(student_ids)
+    echo(f"Created {counts['users']} users, {counts['teachers']} teachers and {counts['students']} students")
+
+    course_names = dict(zip(course_ids, (row['name'] for row in course_rows)))
+    counts['profiles'] = _insert_batches(StudentProfile, (
+        {'student_id': row['id'], 'enrollment_number': f"S{start_year % 100:02d}{row['id']:08d}",
+         'course': course_names[row['course_id']], 'year_of_study': 1}
+        for row in student_rows
+    ), batch_size)
+    counts['enrollments'] = _insert_batches(Enrollment, (
+        {'student_id': row['id'], 'course_id': row['course_id'], 'class_id': class_id}
+        for row in student_rows for class_id in row['classes']
+    ), batch_size)
+
+    def grade_rows():
+        for year in range(start_year, start_year + years):
+            for term in range(1, TERMS_PER_YEAR + 1):
+                for row in student_rows:
+                    for class_id in row['classes']:
+                        score = row['ability'] + rng.gauss(0.0, 0.7)
+                        index = min(max(int((1.6 - score) * 2.5), 0), len(GRADES) - 1)
+                        yield {'student_id': row['id'], 'course_id': row['course_id'], 'class_id': class_id,
+                               'grade': GRADES[index], 'term': f"{year}-T{term}"}
+    counts['grades'] = _insert_batches(Grade, grade_rows(), batch_size)
+
+    counts['progress'] = _insert_batches(Progress, (
+        {'student_id': row['id'], 'course_id': row['course_id'], 'class_id': class_id,
+         'progress_percentage': round(min(max(60 + 15 * row['ability'] + rng.gauss(0, 10), 0), 100), 1)}
+        for row in student_rows for class_id in row['classes']
+    ), batch_size)
+
+    def attendance_rows():
+        for year in range(start_year, start_year + years):
+            for date in school_days(year):
+                for row in student_rows:
+                    present = row['attendance']
+                    for class_id in row['classes']:
+                        draw = rng.random()
+                        if draw < present:
+                            status = 'Present'
+                        elif draw < present + (1 - present) * 0.4:
+                            status = 'Late'
+                        else:
+                            status = 'Absent'
+                        yield {'student_id': row['id'], 'course_id': row['course_id'], 'class_id': class_id,
+                               'date': date, 'status': status}
+    echo("Generating attendance...")
+    counts['attendances'] = _insert_batches(Attendance, attendance_rows(), batch_size)
+    rebuild_attendance_summaries()
+    counts['attendance_bitmaps'] = rebuild_attendance_bitmaps()
+    counts['search_documents'] = rebuild_search_index()
+    db.session.commit()
+    echo(f"Created {counts['attendances']} attendance records")
+    return counts
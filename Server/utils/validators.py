@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields, validate
+from marshmallow import Schema, ValidationError, fields, validate, validates_schema
 
 class UserSchema(Schema):
     name = fields.Str(required=True, validate=validate.Length(min=1))
@@ -30,7 +30,9 @@ class CourseSchema(Schema):
 class GradeSchema(Schema):
     student_id = fields.Int(required=True)
     course_id = fields.Int(required=True)
-    grade = fields.Float(required=True, validate=validate.Range(min=0, max=100))
+    class_id = fields.Int(allow_none=True)
+    grade = fields.Str(required=True, validate=validate.Length(min=1, max=5))
+    term = fields.Str(allow_none=True, validate=validate.Length(min=1, max=16))
 
 class EnrollmentSchema(Schema):
     student_id = fields.Int(required=True)
@@ -40,4 +42,31 @@ class AttendanceSchema(Schema):
     student_id = fields.Int(required=True)
     class_id = fields.Int(required=True)
     date = fields.Date(required=True)
-    status = fields.Str(required=True, validate=validate.OneOf(["present", "absent", "excused"]))
+    status = fields.Str(required=True, validate=validate.OneOf(["Present", "Absent", "Late"]))
+
+class AttendanceRosterSchema(Schema):
+    class_id = fields.Int(required=True)
+    course_id = fields.Int(allow_none=True)
+    date = fields.Date(required=True)
+    records = fields.List(fields.Dict(), required=True, validate=validate.Length(min=1))
+
+class UserProvisionSchema(Schema):
+    email = fields.Email(required=True)
+    password = fields.Str(required=True, validate=validate.Length(min=6))
+    role = fields.Str(required=True, validate=validate.OneOf(["Admin", "Teacher", "Student"]))
+    name = fields.Str(validate=validate.Length(min=1, max=255))
+    enrollment_date = fields.Date()
+    date_of_birth = fields.Date()
+    gender = fields.Str(allow_none=True, validate=validate.Length(max=10))
+    phone_number = fields.Str(allow_none=True, validate=validate.Length(max=20))
+    course_id = fields.Int()
+
+    @validates_schema
+    def validate_role_fields(self, data, **kwargs):
+        required = {
+            "Teacher": ["name"],
+            "Student": ["name", "enrollment_date", "date_of_birth", "course_id"],
+        }.get(data.get("role"), [])
+        missing = {field: ["Missing data for required field."] for field in required if data.get(field) is None}
+        if missing:
+            raise ValidationError(missing)